@@ -0,0 +1,114 @@
+"""Benchmark of the extraction of the advertisement fields from an HCI event.
+
+Compares AdvertisementView with the loop that parse_raw_data used before
+(copied below), which built every field of the advertisement, for the AD
+payloads of some common advertisements. Both are checked to give the same
+fields. parse_raw_data reuses a single view with scan(), that is the "reused"
+column, a new view is created per advertisement by parse_raw_reports and in
+the thread safe mode. The local name is only decoded when a route or vendor
+parser uses it, "+ name" is the time with the name.
+
+Usage: python benchmarks/advertisement_view.py [--repeat 20000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "package"))
+
+from bleparser.advertisement import AdvertisementView  # noqa: E402 pylint: disable=wrong-import-position
+
+PAYLOADS = {
+    "Apple": "02011a0aff4c001005031c2a8b6f",
+    "Microsoft": "1eff060001092002" + "00" * 23,
+    "Exposure notification": "0201060303" + "6ffd" + "171666fd" + "00" * 20,
+    "ATC": "02010610161a18a4c1380283f400a22f5f0bf819",
+    "Xiaomi, with name": "020106151695fe5020aa01da219335342d580d1004fe004802" + "0909" + "4c5957534443475120"[:16],
+    "Govee H5075, with name": "0d09475648353037355f423141360aff88ec00012d6e640001",
+}
+
+
+def legacy_fields(data, adpayload_start, adpayload_end):  # noqa: C901
+    """Return the advertisement fields, like the loop of the old parse_raw_data"""
+    adpayload_size = adpayload_end - adpayload_start
+    complete_local_name = ""
+    shortened_local_name = ""
+    service_class_uuid16 = None
+    service_class_uuid128 = None
+    service_data_list = []
+    man_spec_data_list = []
+
+    while adpayload_size > 1:
+        adstuct_size = data[adpayload_start] + 1
+        if adstuct_size > 1 and adstuct_size <= adpayload_size:
+            adstruct = data[adpayload_start:adpayload_start + adstuct_size]
+            adstuct_type = adstruct[1]
+            if adstuct_type == 0x02:
+                service_class_uuid16 = (adstruct[2] << 8) | adstruct[3]
+            elif adstuct_type == 0x03:
+                service_class_uuid16 = (adstruct[2] << 8) | adstruct[3]
+            elif adstuct_type == 0x06:
+                service_class_uuid128 = adstruct[2:]
+            elif adstuct_type == 0x08:
+                shortened_local_name = adstruct[2:].decode("utf-8")
+            elif adstuct_type == 0x09:
+                complete_local_name = adstruct[2:].decode("utf-8")
+            elif adstuct_type == 0x16 and adstuct_size > 4:
+                service_data_list.append(adstruct)
+            elif adstuct_type == 0xFF:
+                man_spec_data_list.append(adstruct)
+        adpayload_size -= adstuct_size
+        adpayload_start += adstuct_size
+
+    if complete_local_name:
+        local_name = complete_local_name
+    else:
+        local_name = shortened_local_name
+    return service_class_uuid16, service_class_uuid128, local_name, service_data_list, man_spec_data_list
+
+
+def view_fields(adv):
+    """Return the fields of an AdvertisementView, in the order of legacy_fields"""
+    return (
+        adv.service_class_uuid16,
+        adv.service_class_uuid128,
+        adv.local_name,
+        adv.service_data_list,
+        adv.man_spec_data_list,
+    )
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'AD payload':>24} {'old loop':>9} {'new view':>9} {'reused':>8} {'+ name':>8} {'speedup':>8}")
+    reused = AdvertisementView(b"")
+    for name, payload in PAYLOADS.items():
+        data = bytes.fromhex(payload)
+        end = len(data)
+        if legacy_fields(data, 0, end) != view_fields(AdvertisementView(data, 0, end)):
+            sys.exit(f"{name}: the old loop and the view give different fields")
+        timers = {
+            "legacy": lambda: legacy_fields(data, 0, end),
+            "view": lambda: AdvertisementView(data, 0, end),
+            "reused": lambda: reused.scan(data, 0, end),
+            "name": lambda: (reused.scan(data, 0, end), reused.local_name),
+        }
+        times = {key: [] for key in timers}
+        # interleaved, the machine noise hits all alike
+        for _ in range(5):
+            for key, timer in timers.items():
+                times[key].append(timeit.timeit(timer, number=args.repeat))
+        legacy, view, scan, scan_name = (min(times[key]) / args.repeat * 1e9 for key in timers)
+        print(
+            f"{name:>24} {legacy:>6.0f} ns {view:>6.0f} ns {scan:>5.0f} ns {scan_name:>5.0f} ns "
+            f"{legacy / scan:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark of parse_raw_data on bytes and on memoryviews.
+
+The vendor parsers get the AD structures as slices of the HCI event that is
+passed to parse_raw_data. For bytes these are bytes, for a memoryview (e.g. on
+a reused receive buffer) these are memoryviews. The benchmark parses the same
+events in both forms, for unsupported advertisements (noise) and for some
+supported devices. Duplicate filtering is off, so every event is parsed by
+the vendor parser.
+
+Usage: python benchmarks/buffers.py [--repeat 20000]
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "package"))
+
+from bleparser import BleParser  # noqa: E402 pylint: disable=wrong-import-position
+
+
+def hci_event(mac, adstructs):
+    """Return the HCI event of a legacy advertising report"""
+    report = bytes.fromhex("010000") + mac[::-1] + bytes([len(adstructs)]) + adstructs + b"\xcc"
+    return bytes([0x04, 0x3E, len(report) + 1, 0x02]) + report
+
+
+EVENTS = {
+    "Apple (noise)": hci_event(bytes.fromhex("5448E68F80A5"), bytes.fromhex("0201060aff4c001005031c2a8b6f")),
+    "Microsoft (noise)": hci_event(
+        bytes.fromhex("5448E68F80A6"), bytes.fromhex("1eff060001092002") + bytes(23)
+    ),
+    "ATC": bytes.fromhex("043e1d02010000f4830238c1a41110161a18a4c1380283f400a22f5f0bf819df"),
+    "Xiaomi": bytes.fromhex("043e2502010000219335342d5819020106151695fe5020aa01da219335342d580d1004fe004802c4"),
+    "BTHome V2": bytes.fromhex("043E1802010000A5808FE648540C0201060816D2FC4000090161CC"),
+    "Govee H5075": bytes.fromhex("043e1902010400aabb615960e30d0cff88ec00ba0af90f63020101b7"),
+}
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    parse_raw_data = BleParser().parse_raw_data
+    print(f"{'event':>20} {'bytes':>8} {'memoryview':>10} {'ratio':>6}")
+    for name, event in EVENTS.items():
+        view = memoryview(event)
+        assert parse_raw_data(event) == parse_raw_data(view)
+        # interleaved, the machine noise hits both forms alike
+        times = {"bytes": [], "memoryview": []}
+        for _ in range(5):
+            times["bytes"].append(timeit.timeit(lambda: parse_raw_data(event), number=args.repeat))
+            times["memoryview"].append(timeit.timeit(lambda: parse_raw_data(view), number=args.repeat))
+        bytes_time, view_time = (min(times[form]) / args.repeat * 1e9 for form in ("bytes", "memoryview"))
+        print(f"{name:>20} {bytes_time:>5.0f} ns {view_time:>7.0f} ns {view_time / bytes_time:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
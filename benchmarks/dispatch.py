@@ -0,0 +1,246 @@
+"""Benchmark of the routing of advertisements to the vendor parsers.
+
+Compares the routing table of BleParser with the if/elif chain that
+parse_advertisement used before (copied below, without the vendor parser
+calls), on unsupported advertisements (noise) and on advertisements of
+supported devices. Both return the name of the route, the benchmark checks
+that they agree on every advertisement.
+
+With --package, the time of parse_advertisement of another checkout is
+measured next to this one, for the same advertisements.
+
+Usage: python benchmarks/dispatch.py [--repeat 20000] [--package ../old/package]
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import timeit
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "package")
+
+SENSORPUSH_UUID128 = b'\xb0\x0a\x09\xec\xd7\x9d\xb8\x93\xba\x42\xd6\x11\x00\x00\x09\xef'
+
+# (service_class_uuid16, service_class_uuid128, local_name, service data, manufacturer specific data)
+NOISE = {
+    "Apple (not iBeacon)": (None, None, "", [], ["0aff4c001005031c2a8b6f"]),
+    "Microsoft": (None, None, "", [], ["1eff060001092002" + "00" * 23]),
+    "Samsung, with name": (None, None, "[TV] Samsung", [], ["0eff75004204018066a1b3c4d5e601"]),
+    "Exposure notification": (0xFD6F, None, "", ["171666fd" + "00" * 20], []),
+    "Google Fast Pair": (0xFE2C, None, "", ["06162cfe00c2"], []),
+}
+DEVICES = {
+    "ATC": (None, None, "", ["10161a18a4c1380283f400a22f5f0bf819"], []),
+    "Xiaomi": (None, None, "", ["151695fe5020aa01da219335342d580d1004fe004802"], []),
+    "BTHome V2": (None, None, "", ["0a16d2fc4000ca0202ca09"], []),
+    "Govee H5075": (None, None, "GVH5075_B1A6", [], ["09ff88ec00012d6e6400"]),
+    "Inkbird IBS-TH": (None, None, "sps", [], ["0aff1234" + "00" * 7]),
+    "Thermopro": (None, None, "TP357 (2A01)", [], ["07ffc2170127022c"]),
+    "AltBeacon": (None, None, "", [], ["1bff1801beac" + "00" * 22]),
+    "Acconeer": (None, None, "", [], ["12ffc0ac" + "00" * 15]),
+}
+
+
+def legacy_route(service_class_uuid16, service_class_uuid128, local_name, service_data_list, man_spec_data_list):  # noqa: C901
+    """Return the route name of the if/elif chain of the old parse_advertisement, or None"""
+    # pylint: disable=too-many-branches,too-many-return-statements,too-many-statements
+    if service_data_list:
+        for service_data in service_data_list:
+            uuid16 = (service_data[3] << 8) | service_data[2]
+            if uuid16 == 0x181A:
+                if len(service_data) == 22 or len(service_data) == 20:
+                    return "b-parasite"
+                return "ATC"
+            elif uuid16 in [0x181B, 0x181D]:
+                return "Mi Scale"
+            elif uuid16 in [0x181C, 0x181E]:
+                return "BTHome V1"
+            elif uuid16 in [0xAA20, 0xAA21, 0xAA22] and local_name == "ECo":
+                return "Relsib"
+            elif uuid16 == 0xF525:
+                return "Jaalee"
+            elif uuid16 == 0xFCD2:
+                return "BTHome V2"
+            elif uuid16 in [0xFD3D, 0x0D00]:
+                return "Switchbot"
+            elif uuid16 == 0xFD50:
+                return "HHCC"
+            elif uuid16 == 0xFDCD:
+                return "Qingping"
+            elif uuid16 == 0xFE95:
+                return "Xiaomi"
+            elif uuid16 == 0xFEAA:
+                if len(service_data) == 19:
+                    return "KKM"
+                elif len(service_data) >= 23:
+                    return "Ruuvitag (Eddystone)"
+            elif uuid16 == 0xFEE0:
+                return "Amazfit"
+            elif uuid16 == 0xFFF9:
+                return "Qingping"
+            elif uuid16 == 0x2A6E or uuid16 == 0x2A6F:
+                return "Teltonika"
+    elif man_spec_data_list:
+        for man_spec_data in man_spec_data_list:
+            comp_id = (man_spec_data[3] << 8) | man_spec_data[2]
+            data_len = man_spec_data[0]
+            if comp_id == 0x0001 and data_len in [0x09, 0x0C, 0x22, 0x25]:
+                return "Govee H5101/H5102/H5177"
+            elif comp_id == 0x004C and man_spec_data[4] == 0x02:
+                return "iBeacon"
+            elif comp_id == 0x00DC and data_len == 0x0E:
+                return "Oral-B"
+            elif comp_id == 0x0499:
+                return "Ruuvitag"
+            elif comp_id == 0x094F and data_len == 0x15:
+                return "Mikrotik"
+            elif comp_id == 0x06E8:
+                return "Almendo"
+            elif comp_id == 0x1000 and data_len == 0x15:
+                return "Moat"
+            elif comp_id == 0x0133 and data_len == 0x11:
+                return "BlueMaestro"
+            elif comp_id == 0x01AE and data_len == 0x0F:
+                return "SmartDry"
+            elif comp_id == 0x06D5:
+                return "Sensirion"
+            elif comp_id in [0x2111, 0x2112, 0x2121, 0x2122] and data_len == 0x0B:
+                return "Air Mentor"
+            elif comp_id == 0x8801 and data_len in [0x0C, 0x25]:
+                return "Govee H5179"
+            elif comp_id == 0xAA55 and data_len == 0x14:
+                return "Brifit"
+            elif comp_id == 0xEC88 and data_len in [0x09, 0x0A, 0x0C, 0x22, 0x24, 0x25]:
+                return "Govee H5051/H5071/H5072/H5075/H5074"
+            elif comp_id == 0xFFFF and data_len == 0x1E:
+                return "Kegtron"
+            elif comp_id == 0xA0AC and data_len == 0x0F and man_spec_data[14] in [0x06, 0x0D]:
+                return "Laica"
+            elif man_spec_data[2] == 0xC0 and data_len == 0x10:
+                return "Xiaogui"
+            elif man_spec_data[3] == 0x82 and data_len == 0x0E:
+                return "iNode"
+            elif man_spec_data[3] in [
+                0x91, 0x92, 0x93, 0x94, 0x95, 0x96, 0x9A, 0x9B, 0x9C, 0x9D
+            ] and data_len == 0x19:
+                return "iNode Care Sensors"
+            elif service_class_uuid16 == 0x20AA and data_len == 0x0E:
+                return "Jinou"
+            elif service_class_uuid16 == 0x5182 and data_len in [0x14, 0x2D]:
+                return "Govee H5182"
+            elif service_class_uuid16 == 0x5183 and data_len in [0x11, 0x2A]:
+                return "Govee H5183"
+            elif service_class_uuid16 == 0x5185 and data_len in [0x17, 0x30]:
+                return "Govee H5185"
+            elif service_class_uuid16 == 0xF0FF:
+                if comp_id in [0x0010, 0x0011, 0x0015, 0x0018] and data_len in [0x15, 0x17]:
+                    return "Thermoplus"
+                elif (comp_id in [0x0000, 0x0001] or local_name in ["iBBQ", "xBBQ", "sps", "tps"]) and (
+                    data_len in [0x0A, 0x0D, 0x0F, 0x13, 0x17]
+                ):
+                    return "Inkbird"
+            elif service_class_uuid128 == SENSORPUSH_UUID128 and data_len in [0x06, 0x08]:
+                return "SensorPush"
+            elif local_name in ["sps", "tps"] and data_len == 0x0A:
+                return "Inkbird IBS-TH"
+            elif local_name[0:5] in ["TP357", "TP359"] and data_len == 0x07:
+                return "Thermopro"
+            elif data_len == 0x1B and ((man_spec_data[4] << 8) | man_spec_data[5]) == 0xBEAC:
+                return "AltBeacon"
+            elif man_spec_data[0] == 0x12 and comp_id == 0xACC0:
+                return "Acconeer"
+    return None
+
+
+def advertisement_args(fields):
+    """Return the fields of an advertisement with the AD structures as bytes"""
+    uuid16, uuid128, local_name, service_data_list, man_spec_data_list = fields
+    return (
+        uuid16,
+        uuid128,
+        local_name,
+        [bytes.fromhex(data) for data in service_data_list],
+        [bytes.fromhex(data) for data in man_spec_data_list],
+    )
+
+
+def time_routing(fields, repeat):
+    """Return the time (in ns) of the if/elif chain and of the routing table, and the route names"""
+    # pylint: disable=import-outside-toplevel
+    from bleparser.advertisement import Advertisement
+    from bleparser.dispatch import get_routing_table
+
+    routing_table = get_routing_table()
+    args = advertisement_args(fields)
+    adv = Advertisement(*args)
+    if adv.service_data_list:
+        match, data_list = routing_table.match_service_data, adv.service_data_list
+    else:
+        match, data_list = routing_table.match_manufacturer_data, adv.man_spec_data_list
+
+    def table_route():
+        for data in data_list:
+            route = match(data, adv)
+            if route is not None:
+                return route
+        return None
+
+    route = table_route()
+    names = (legacy_route(*args), None if route is None else route.name)
+    legacy = min(timeit.repeat(lambda: legacy_route(*args), number=repeat, repeat=5)) / repeat * 1e9
+    table = min(timeit.repeat(table_route, number=repeat, repeat=5)) / repeat * 1e9
+    return legacy, table, names
+
+
+TIMER = """
+import logging, sys, timeit
+sys.path.insert(0, {package!r})
+logging.disable(logging.CRITICAL)
+from bleparser import BleParser
+parse_advertisement = BleParser().parse_advertisement
+for uuid16, uuid128, local_name, service_data_list, man_spec_data_list in {advertisements!r}:
+    args = (
+        bytes.fromhex("5448E68F80A5"), -60, uuid16, uuid128, local_name,
+        [bytes.fromhex(data) for data in service_data_list],
+        [bytes.fromhex(data) for data in man_spec_data_list],
+    )
+    print(min(timeit.repeat(lambda: parse_advertisement(*args), number={repeat}, repeat=5)) / {repeat} * 1e9)
+"""
+
+
+def time_parse_advertisement(package, advertisements, repeat):
+    """Return the times (in ns) of parse_advertisement of a package directory, in a fresh interpreter"""
+    code = TIMER.format(package=os.path.abspath(package), advertisements=advertisements, repeat=repeat)
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return [float(line) for line in output.split()]
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--package", help="package directory of another checkout to compare with")
+    args = parser.parse_args()
+
+    sys.path.insert(0, PACKAGE_DIR)
+    logging.disable(logging.CRITICAL)
+    advertisements = {**NOISE, **DEVICES}
+    print(f"{'advertisement':>24} {'route':>36} {'if/elif':>8} {'table':>8} {'speedup':>8}")
+    for name, fields in advertisements.items():
+        legacy, table, (legacy_name, table_name) = time_routing(fields, args.repeat)
+        if legacy_name != table_name:
+            sys.exit(f"{name}: the if/elif chain routes to {legacy_name}, the routing table to {table_name}")
+        print(f"{name:>24} {str(table_name):>36} {legacy:>5.0f} ns {table:>5.0f} ns {legacy / table:>7.2f}x")
+
+    if args.package:
+        print()
+        print(f"{'parse_advertisement':>24} {'this':>8} {'other':>8} {'speedup':>8}")
+        this = time_parse_advertisement(PACKAGE_DIR, list(advertisements.values()), args.repeat)
+        other = time_parse_advertisement(args.package, list(advertisements.values()), args.repeat)
+        for name, this_time, other_time in zip(advertisements, this, other):
+            print(f"{name:>24} {this_time:>5.0f} ns {other_time:>5.0f} ns {other_time / this_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
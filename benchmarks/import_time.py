@@ -0,0 +1,67 @@
+"""Benchmark of the import time of bleparser.
+
+Each statement is timed in a fresh interpreter, so nothing is cached in
+sys.modules. "eager" imports all vendor modules and pycryptodome, like
+bleparser did before the vendor parsers were loaded on first use.
+
+Usage: python benchmarks/import_time.py [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "package")
+
+# ATC advertisement (not encrypted)
+ATC_DATA = "043e1d02010000f4830238c1a41110161a18a4c1380283f400a22f5f0bf819df"
+
+STATEMENTS = {
+    "import": "import bleparser",
+    "import + first parse": (
+        "import bleparser\n"
+        f"bleparser.BleParser().parse_raw_data(bytes.fromhex('{ATC_DATA}'))"
+    ),
+    "eager": (
+        "import bleparser\n"
+        "import bleparser.dispatch\n"
+        "import Cryptodome.Cipher.AES\n"
+        "bleparser.dispatch.load_parsers()"
+    ),
+}
+
+TIMER = """
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def time_statement(statement, runs):
+    """Return the import times (in ms) of a statement, each in a new interpreter"""
+    env = dict(os.environ, PYTHONPATH=PACKAGE_DIR, PYTHONDONTWRITEBYTECODE="")
+    times = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", TIMER.format(statement=statement)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        times.append(float(output.split()[-1]) * 1000)
+    return times
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="number of interpreters per statement")
+    args = parser.parse_args()
+
+    for name, statement in STATEMENTS.items():
+        times = time_statement(statement, args.runs)
+        print(f"{name:<22} median {statistics.median(times):7.1f} ms   min {min(times):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
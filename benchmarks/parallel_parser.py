@@ -0,0 +1,91 @@
+"""Benchmark of the throughput of ParallelBleParser against a single process.
+
+Parses a corpus of advertisements (BTHome V2, ATC, Xiaomi MiBeacon and
+encrypted BTHome V2 of many devices, with several advertisements per device)
+with a parse_raw_data loop in this process, and with ParallelBleParser with
+several numbers of worker processes, in input order (imap) and in streamed
+order (imap_unordered). The worker processes are started before the timing.
+
+The workers only pay off when the parsing takes more time than sending the
+events and results between the processes, so compare the results on the
+machine that does the backfill.
+
+Usage: python benchmarks/parallel_parser.py [--workers 1 2 4 8] [--devices 1000] [--rounds 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "package"))
+
+from bleparser import BleParser  # noqa: E402 pylint: disable=wrong-import-position
+from bleparser.parallel import ParallelBleParser  # noqa: E402 pylint: disable=wrong-import-position
+# the corpus is built with the events of the thread safety benchmark
+from thread_safety import bthome_event, device_event  # noqa: E402 pylint: disable=wrong-import-position
+
+
+def corpus(devices, rounds, encrypted):
+    """Return (aeskeys, HCI events), rounds advertisements of each device"""
+    encrypted_devices = int(devices * encrypted)
+    aeskeys = {}
+    encrypted_events = []
+    for index in range(encrypted_devices):
+        mac, key, event = bthome_event(index)
+        aeskeys[mac] = key
+        encrypted_events.append(event)
+    events = []
+    for packet_id in range(1, rounds + 1):
+        events.extend(device_event(index, packet_id) for index in range(devices - encrypted_devices))
+        events.extend(encrypted_events)
+    return aeskeys, events
+
+
+def time_single(aeskeys, events):
+    """Return the throughput (events/s) of a parse_raw_data loop"""
+    parse_raw_data = BleParser(aeskeys=aeskeys, filter_duplicates=True).parse_raw_data
+    start = time.perf_counter()
+    for data in events:
+        parse_raw_data(data)
+    return len(events) / (time.perf_counter() - start)
+
+
+def time_parallel(aeskeys, events, workers, chunk_size):
+    """Return the throughput (events/s) of imap and imap_unordered"""
+    throughput = []
+    for ordered in (True, False):
+        with ParallelBleParser(workers, chunk_size, aeskeys=aeskeys, filter_duplicates=True) as parser:
+            imap = parser.imap if ordered else parser.imap_unordered
+            # warm up the workers
+            for _ in imap(events[:workers * chunk_size]):
+                pass
+            start = time.perf_counter()
+            for _ in imap(events):
+                pass
+            throughput.append(len(events) / (time.perf_counter() - start))
+    return throughput
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20, help="advertisements per device (at most 255)")
+    parser.add_argument("--encrypted", type=float, default=0.25, help="share of devices with encryption")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args()
+
+    aeskeys, events = corpus(args.devices, args.rounds, args.encrypted)
+    print(f"{len(events)} events, {os.cpu_count()} CPU cores")
+    single = time_single(aeskeys, events)
+    print(f"{'':>16} {'events/s':>10} {'speedup':>8}")
+    print(f"{'single process':>16} {single:>10.0f} {1:>7.2f}x")
+    for workers in args.workers:
+        ordered, unordered = time_parallel(aeskeys, events, workers, args.chunk_size)
+        print(f"{f'{workers} imap':>16} {ordered:>10.0f} {ordered / single:>7.2f}x")
+        print(f"{f'{workers} unordered':>16} {unordered:>10.0f} {unordered / single:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Multi-threaded stress benchmark of the thread safe mode of BleParser.
+
+Several threads parse the same advertisements into one parser, like scanners
+on separate adapters that receive the same advertisements. In each round,
+every device sends one new advertisement (BTHome V2, ATC and Xiaomi MiBeacon,
+each with a packet id) and all threads parse all of them. With
+filter_duplicates, each advertisement has to be reported exactly once, the
+benchmark counts the missing and duplicate reports and the throughput, with
+and without thread_safe.
+
+The thread safe parser is run twice: with the device registry striped like
+the device locks (the default), and with a single registry lock for all
+devices, like before the registry was striped. "registry waits" counts how
+often a thread had to wait for a registry lock that another thread held.
+
+A short thread switch interval makes races between the threads more likely.
+
+Usage: python benchmarks/thread_safety.py [--threads 4] [--devices 300] [--rounds 50] [--switch-interval 1e-6]
+"""
+import argparse
+from collections import Counter
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "package"))
+
+from bleparser import BleParser  # noqa: E402 pylint: disable=wrong-import-position
+from bleparser.registry import StripedDeviceRegistry  # noqa: E402 pylint: disable=wrong-import-position
+from bleparser.state import StripedDeviceStateStore  # noqa: E402 pylint: disable=wrong-import-position
+
+# parser attribute: registry column
+STATE_STORES = {
+    "lpacket_ids": "packet_ids",
+    "movements_list": "movements",
+    "adv_priority": "adv_priority",
+    "encryption_counters": "counters",
+}
+
+
+class CountingLock:
+    """RLock that counts the acquisitions that had to wait for another thread"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.waits = 0
+
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            self._lock.acquire()
+            # counted under the lock
+            self.waits += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
+
+def single_registry_lock(ble_parser):
+    """Give a thread safe parser a single registry lock for all devices"""
+    registry = StripedDeviceRegistry(
+        ble_parser.devices.maxsize,
+        ble_parser.devices.ttl,
+        resolver=ble_parser._resolve_device,  # pylint: disable=protected-access
+        stripes=1,
+    )
+    ble_parser.devices = registry
+    for name, column in STATE_STORES.items():
+        setattr(ble_parser, name, StripedDeviceStateStore(registry, column))
+
+
+def hci_event(mac, service_data):
+    """Return the HCI event of an advertisement with service data"""
+    adstructs = bytes.fromhex("020106") + bytes([len(service_data) + 1, 0x16]) + service_data
+    report = bytes.fromhex("010000") + mac[::-1] + bytes([len(adstructs)]) + adstructs + b"\xcc"
+    return bytes([0x04, 0x3E, len(report) + 1, 0x02]) + report
+
+
+def device_event(index, packet_id):
+    """Return the HCI event of device index with a packet id (1-255)"""
+    vendor = index % 3
+    mac = (0xA4C138000000 + index).to_bytes(6, "big")
+    if vendor == 0:
+        # BTHome V2, packet id and temperature
+        service_data = bytes.fromhex("d2fc4000") + bytes([packet_id]) + bytes.fromhex("02ca09")
+    elif vendor == 1:
+        # ATC1441 format, the last byte is the frame counter
+        service_data = bytes.fromhex("1a18") + mac + bytes.fromhex("00a22f5f0bf8") + bytes([packet_id])
+    else:
+        # Xiaomi LYWSDCGQ temperature and humidity, frame counter in byte 4
+        service_data = (
+            bytes.fromhex("95fe5020aa01") + bytes([packet_id]) + mac[::-1] + bytes.fromhex("0d1004fe004802")
+        )
+    return hci_event(mac, service_data)
+
+
+def bthome_event(index):
+    """Return (mac, key, HCI event) of an encrypted BTHome V2 advertisement, each device with its own key"""
+    # pylint: disable=import-outside-toplevel
+    from Cryptodome.Cipher import AES
+
+    mac = (0x5448E6000000 + index).to_bytes(6, "big")
+    key = (0x231D39C1D7CC1AB1AEE224CD096DB932 + index).to_bytes(16, "big")
+    count_id = index.to_bytes(4, "little")
+    cipher = AES.new(key, AES.MODE_CCM, nonce=mac + b"\xd2\xfc\x41" + count_id, mac_len=4)
+    # temperature and humidity
+    ciphertext, mic = cipher.encrypt_and_digest(bytes.fromhex("02ca0903bf13"))
+    return mac, key, hci_event(mac, b"\xd2\xfc\x41" + ciphertext + count_id + mic)
+
+
+def new_parser(mode):
+    """Return the parser for a mode (off, single registry lock or striped registry) and its registry locks"""
+    ble_parser = BleParser(filter_duplicates=True, thread_safe=mode != "off")
+    if mode == "off":
+        return ble_parser, []
+    if mode == "single registry lock":
+        single_registry_lock(ble_parser)
+    for stripe in ble_parser.devices.stripes:
+        stripe.lock = CountingLock()
+    return ble_parser, [stripe.lock for stripe in ble_parser.devices.stripes]
+
+
+def run(threads, devices, rounds, mode):
+    """Parse the rounds in threads, return (seconds, parsed events, Counter with the reports, errors, waits)"""
+    ble_parser, registry_locks = new_parser(mode)
+    rounds_events = [
+        [device_event(index, packet_id) for index in range(devices)]
+        for packet_id in range(1, rounds + 1)
+    ]
+    barrier = threading.Barrier(threads)
+    reports = Counter()
+    errors = []
+    lock = threading.Lock()
+
+    def scan(seed):
+        shuffle = random.Random(seed).shuffle
+        parse_raw_data = ble_parser.parse_raw_data
+        for events in rounds_events:
+            events = list(events)
+            # each adapter receives the advertisements in its own order
+            shuffle(events)
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                return
+            received = []
+            try:
+                for data in events:
+                    sensor_msg, tracker_msg = parse_raw_data(data)
+                    if sensor_msg is not None:
+                        received.append((sensor_msg["mac"], sensor_msg["packet"]))
+            except Exception as error:  # pylint: disable=broad-except
+                # the state of the parser is corrupted, stop all threads
+                errors.append(error)
+                barrier.abort()
+                return
+            with lock:
+                reports.update(received)
+
+    workers = [threading.Thread(target=scan, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = time.perf_counter() - start
+    return seconds, threads * devices * rounds, reports, errors, sum(lock.waits for lock in registry_locks)
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--devices", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=50, help="advertisements per device (at most 255)")
+    parser.add_argument("--switch-interval", type=float, default=1e-6, help="thread switch interval in seconds")
+    args = parser.parse_args()
+    sys.setswitchinterval(args.switch_interval)
+
+    expected = args.devices * args.rounds
+    print(f"{args.threads} threads, {args.devices} devices, {expected} advertisements, each parsed by every thread")
+    failed = False
+    for mode in ("off", "single registry lock", "striped registry"):
+        seconds, parsed, reports, errors, waits = run(args.threads, args.devices, args.rounds, mode)
+        label = f"thread_safe={mode != 'off'!s:<5} {'' if mode == 'off' else mode:<20}"
+        if errors:
+            print(f"{label} crashed: {errors[0]!r}")
+            failed = failed or mode != "off"
+            continue
+        missing = expected - len(reports)
+        duplicates = sum(reports.values()) - len(reports)
+        print(
+            f"{label} {parsed / seconds:>9.0f} events/s {sum(reports.values()):>7} reports "
+            f"{missing:>5} missing {duplicates:>5} duplicates {waits:>6} registry waits"
+        )
+        failed = failed or (mode != "off" and (missing or duplicates))
+    if failed:
+        print("FAILED: the thread safe mode reported missing or duplicate advertisements")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark of the scaling of one thread safe BleParser over 1 to N threads.
+
+Each thread parses the same shared corpus of advertisements (BTHome V2, ATC,
+Xiaomi MiBeacon and encrypted BTHome V2 of many devices) with parse_raw_data
+into one parser with thread_safe=True, and the total throughput is compared
+with a single thread. With the GIL, or on a single CPU core, the threads take
+turns, the throughput stays at best flat and the benchmark only shows the
+overhead of the threads and locks. The parser has no lock that all threads
+take for every advertisement (the device locks and the device registry are
+striped by MAC address), so on a free-threaded Python build
+(e.g. python3.13t) with several cores the threads can parse in parallel. The
+throughput on such a build hasn't been measured yet, run this benchmark there
+to get the numbers.
+
+Usage: python benchmarks/thread_scaling.py [--threads 1 2 4 8] [--devices 1000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "package"))
+
+from bleparser import BleParser  # noqa: E402 pylint: disable=wrong-import-position
+# the corpus is built with the events of the thread safety benchmark
+from thread_safety import bthome_event, device_event  # noqa: E402 pylint: disable=wrong-import-position
+
+
+def corpus(devices, encrypted):
+    """Return (aeskeys, HCI events) of the shared corpus, encrypted is the share of encrypted devices"""
+    aeskeys = {}
+    events = []
+    encrypted_devices = int(devices * encrypted)
+    for index in range(devices - encrypted_devices):
+        events.append(device_event(index, 1))
+    for index in range(encrypted_devices):
+        mac, key, event = bthome_event(index)
+        aeskeys[mac] = key
+        events.append(event)
+    return aeskeys, events
+
+
+def run(threads, aeskeys, events, repeat):
+    """Return the throughput (events/s) of threads that each parse the corpus repeat times"""
+    ble_parser = BleParser(aeskeys=aeskeys, thread_safe=True, decrypt_backoff=0)
+    barrier = threading.Barrier(threads + 1)
+
+    def scan():
+        parse_raw_data = ble_parser.parse_raw_data
+        barrier.wait()
+        for _ in range(repeat):
+            for data in events:
+                parse_raw_data(data)
+
+    workers = [threading.Thread(target=scan) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return threads * repeat * len(events) / (time.perf_counter() - start)
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--encrypted", type=float, default=0.25, help="share of devices with encryption")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the corpus per thread")
+    args = parser.parse_args()
+
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if is_gil_enabled else 'disabled'}, "
+          f"{os.cpu_count()} CPU cores")
+    aeskeys, events = corpus(args.devices, args.encrypted)
+    # warm up the vendor parsers, routes and ciphers
+    run(1, aeskeys, events, 1)
+    if is_gil_enabled or os.cpu_count() == 1:
+        print("The threads can't run in parallel here, this measures the overhead of the threads, not the scaling")
+    print(f"{'threads':>7} {'events/s':>10} {'speedup':>8} {'efficiency':>10}")
+    baseline = None
+    for threads in args.threads:
+        throughput = run(threads, aeskeys, events, args.repeat)
+        if baseline is None:
+            baseline = throughput / threads
+        speedup = throughput / baseline
+        print(f"{threads:>7} {throughput:>10.0f} {speedup:>7.2f}x {speedup / threads:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark of the memory of forked worker processes, with and without preloading.
+
+Starts a fresh parent process for each mode, which forks N workers. Each
+worker parses the advertisements of the test suite (all vendors) and the
+corpus of the other benchmarks with a BleParser of its own, runs a full
+garbage collection like a long-running worker eventually does, and then
+waits while its unique set size (USS, the memory that is not shared with the
+parent or the other workers) is read from /proc.
+
+- lazy: the vendor modules are imported in each worker on first use
+- preload: preload_tables(freeze=False) is called before forking
+- preload + freeze: preload_tables() is called before forking, which also
+  moves all objects to the permanent generation of the garbage collector
+
+Linux only, /proc/<pid>/smaps_rollup (or smaps) is read.
+
+Usage: python benchmarks/worker_memory.py [--workers 8 16] [--devices 1000]
+"""
+import argparse
+import contextlib
+import gc
+import glob
+import io
+import logging
+import multiprocessing
+import os
+import re
+import statistics
+import sys
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "package")
+sys.path.insert(0, PACKAGE_DIR)
+
+from bleparser import BleParser  # noqa: E402 pylint: disable=wrong-import-position
+from bleparser.parallel import preload_tables  # noqa: E402 pylint: disable=wrong-import-position
+# the corpus is built with the events of the other benchmarks in this directory
+from thread_safety import device_event  # noqa: E402 pylint: disable=wrong-import-position
+
+MODES = ("lazy", "preload", "preload + freeze")
+
+
+def corpus(devices):
+    """Return the HCI events of the test suite and of a number of BTHome, ATC and Xiaomi devices"""
+    events = []
+    for path in sorted(glob.glob(os.path.join(PACKAGE_DIR, "tests", "test_*.py"))):
+        with open(path, encoding="utf-8") as test_file:
+            data_strings = re.findall(r'data_string = "(04[0-9a-fA-F]+)"', test_file.read())
+        events.extend(bytes.fromhex(data) for data in data_strings)
+    events.extend(device_event(index, 1) for index in range(devices))
+    return events
+
+
+def uss(pid):
+    """Return the unique set size of a process in kB"""
+    path = f"/proc/{pid}/smaps_rollup"
+    if not os.path.exists(path):
+        path = f"/proc/{pid}/smaps"
+    total = 0
+    with open(path, encoding="ascii") as smaps:
+        for line in smaps:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1])
+    return total
+
+
+def worker(events, ready, done):
+    """Parse the events, collect the garbage and wait until the memory is measured"""
+    parse_raw_data = BleParser().parse_raw_data
+    # the HHCC parser prints the packet id
+    with contextlib.redirect_stdout(io.StringIO()):
+        for data in events:
+            try:
+                parse_raw_data(data)
+            except Exception:  # pylint: disable=broad-except
+                pass
+    gc.collect()
+    ready.put(os.getpid())
+    done.wait()
+
+
+def measure(mode, workers, devices, results):
+    """Fork the workers of a mode and put the USS of each worker (kB) on results"""
+    # the test suite has advertisements without keys and invalid advertisements
+    logging.disable(logging.CRITICAL)
+    events = corpus(devices)
+    if mode != "lazy":
+        preload_tables(freeze=mode == "preload + freeze")
+    context = multiprocessing.get_context("fork")
+    ready = context.Queue()
+    done = context.Event()
+    processes = [context.Process(target=worker, args=(events, ready, done)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    pids = [ready.get() for _ in processes]
+    results.put([uss(pid) for pid in pids])
+    done.set()
+    for process in processes:
+        process.join()
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 16])
+    parser.add_argument("--devices", type=int, default=1000)
+    args = parser.parse_args()
+
+    if not os.path.exists(f"/proc/{os.getpid()}/smaps"):
+        sys.exit("This benchmark reads /proc/<pid>/smaps, which is only available on Linux")
+    # each mode starts from a fresh interpreter, nothing is imported or frozen yet
+    spawn = multiprocessing.get_context("spawn")
+    print(f"{'workers':>7} {'mode':>16} {'USS/worker':>11} {'max':>9} {'total':>9}")
+    for workers in args.workers:
+        for mode in MODES:
+            results = spawn.Queue()
+            process = spawn.Process(target=measure, args=(mode, workers, args.devices, results))
+            process.start()
+            sizes = results.get()
+            process.join()
+            print(f"{workers:>7} {mode:>16} {statistics.mean(sizes) / 1024:>8.1f} MB "
+                  f"{max(sizes) / 1024:>6.1f} MB {sum(sizes) / 1024:>6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark of the per-advertisement cost of the Xiaomi parser.
+
+Parses Xiaomi MiBeacon advertisements and reports the time per advertisement,
+and the time of the diagnostics that were built for every advertisement
+before they were deferred to log time: the sinfo description and the hex
+strings of debug messages (with DEBUG disabled).
+
+Run it again with --package pointing at the package directory of an older
+checkout to compare the parse times of both versions.
+
+Usage: python benchmarks/xiaomi_diagnostics.py [--packets 100000] [--package ../old/package]
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "package")
+
+ADVERTISEMENTS = {
+    # LYWSDCGQ temperature and humidity, not encrypted
+    "not encrypted": "043e2502010000219335342d5819020106151695fe5020aa01da219335342d580d1004fe004802c4",
+    # LYWSD03MMC, MiBeacon V5 encrypted
+    "encrypted": (
+        "043e2a02010000f4830238c1a41e0201061a1695fe58585b0550f4830238c1a4"
+        "95ef58763c26000097e2abb5e2"
+    ),
+    # LYWSDCGQ, not in the whitelist with discovery disabled
+    "not whitelisted": "043e2502010000219335342d5819020106151695fe5020aa01da219335342d580d1004fe004802c4",
+}
+AESKEYS = {bytes.fromhex("A4C1380283F4"): bytes.fromhex("e9ea895fac7cca6d30532432a516f3a8")}
+
+
+def time_parse(data_string, packets, discovery):
+    """Return the time (in ns) to parse an advertisement, best of 5 runs"""
+    # pylint: disable=import-outside-toplevel
+    from bleparser import BleParser
+
+    data = bytes.fromhex(data_string)
+    parse_raw_data = BleParser(aeskeys=AESKEYS, discovery=discovery).parse_raw_data
+    return min(timeit.repeat(lambda: parse_raw_data(data), number=packets, repeat=5)) / packets * 1e9
+
+
+def time_diagnostics(packets):
+    """Return the time (in ns) of the eager and the deferred diagnostics of an advertisement"""
+    # pylint: disable=import-outside-toplevel
+    from bleparser.helpers import LazyHex
+    from bleparser.xiaomi import xiaomi_info
+
+    logger = logging.getLogger("bleparser.benchmark")
+    data = memoryview(bytes.fromhex(ADVERTISEMENTS["not encrypted"])[22:-1])
+    payload = data[15:]
+
+    def eager():
+        xiaomi_info(data, "LYWSDCGQ", payload)
+        logger.debug("Invalid data length, adv: %s", data.hex())
+
+    def deferred():
+        logger.debug("Invalid data length, adv: %s", LazyHex(data))
+
+    return [
+        min(timeit.repeat(func, number=packets, repeat=5)) / packets * 1e9
+        for func in (eager, deferred)
+    ]
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packets", type=int, default=100000, help="advertisements per run")
+    parser.add_argument("--package", default=PACKAGE_DIR, help="directory with the bleparser package")
+    args = parser.parse_args()
+    sys.path.insert(0, args.package)
+    logging.basicConfig(level=logging.WARNING)
+
+    for name, data_string in ADVERTISEMENTS.items():
+        parse_time = time_parse(data_string, args.packets, discovery=name != "not whitelisted")
+        print(f"parse {name:<16} {parse_time:8.0f} ns/packet")
+    try:
+        eager, deferred = time_diagnostics(args.packets)
+    except ImportError:
+        # package without deferred diagnostics
+        return
+    print(f"diagnostics eager        {eager:8.0f} ns/packet")
+    print(f"diagnostics deferred     {deferred:8.0f} ns/packet")
+    print(f"saving                   {eager - deferred:8.0f} ns/packet")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,49 +2,32 @@
 from typing import Optional
 import logging
 
-from .acconeer import parse_acconeer
-from .airmentor import parse_airmentor
-from .almendo import parse_almendo
-from .altbeacon import parse_altbeacon
-from .amazfit import parse_amazfit
-from .atc import parse_atc
-from .bluemaestro import parse_bluemaestro
-from .bparasite import parse_bparasite
-from .brifit import parse_brifit
-from .bthome import parse_bthome
-from .const import TILT_TYPES
-from .govee import parse_govee
-from .helpers import to_mac, to_unformatted_mac
-from .hhcc import parse_hhcc
-from .ibeacon import parse_ibeacon
-from .inkbird import parse_inkbird
-from .inode import parse_inode
-from .jaalee import parse_jaalee
-from .jinou import parse_jinou
-from .kegtron import parse_kegtron
-from .kkm import parse_kkm
-from .laica import parse_laica
-from .mikrotik import parse_mikrotik
-from .miscale import parse_miscale
-from .moat import parse_moat
-from .oral_b import parse_oral_b
-from .qingping import parse_qingping
-from .relsib import parse_relsib
-from .ruuvitag import parse_ruuvitag
-from .sensorpush import parse_sensorpush
-from .sensirion import parse_sensirion
-from .switchbot import parse_switchbot
-from .smartdry import parse_smartdry
-from .teltonika import parse_teltonika
-from .thermoplus import parse_thermoplus
-from .thermopro import parse_thermopro
-from .tilt import parse_tilt
-from .xiaomi import parse_xiaomi
-from .xiaogui import parse_xiaogui
+from .advertisement import Advertisement, AdvertisementView, iter_advertising_reports
+
+from .crypto import CipherCache, DecryptBackoff, ThreadLocalCipherCache
+from .dispatch import get_routing_table
+from .helpers import LazyHex, LazyMac, LazyStr, to_unformatted_mac
+from .inventory import DeviceInventory, Whitelist
+from .keystore import KeyStore  # noqa: F401
+from .registry import (
+    FLAG_REPORT_UNKNOWN_WHITELIST,
+    FLAG_SENSOR_WHITELIST,
+    FLAG_TRACKER_WHITELIST,
+    DeviceRegistry,
+    StripedDeviceRegistry,
+    StripedLock,
+)
+from .state import DeviceStateStore, StripedDeviceStateStore
+
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _bytes_list(adstructs):
+    """Return a list with AD structures as bytes, for log messages"""
+    return [bytes(adstruct) for adstruct in adstructs]
+
+
 class BleParser:
     """Parser for BLE advertisements"""
     def __init__(
@@ -55,34 +38,154 @@ class BleParser:
         sensor_whitelist=None,
         tracker_whitelist=None,
         report_unknown_whitelist=None,
-        aeskeys=None
+        aeskeys=None,
+        device_state_size=65536,
+        device_state_ttl=None,
+        inventory=None,
+        decrypt_backoff=1.0,
+        decrypt_backoff_max=None,
+        thread_safe=False,
+        lock_stripes=64
     ):
         self.report_unknown = report_unknown
         self.discovery = discovery
         self.filter_duplicates = filter_duplicates
-        if sensor_whitelist is None:
-            self.sensor_whitelist = []
-        else:
-            self.sensor_whitelist = sensor_whitelist
-        if tracker_whitelist is None:
-            self.tracker_whitelist = []
-        else:
-            self.tracker_whitelist = tracker_whitelist
-        if report_unknown_whitelist is None:
-            self.report_unknown_whitelist = []
-        else:
-            self.report_unknown_whitelist = report_unknown_whitelist
-        if aeskeys is None:
-            self.aeskeys = {}
+        if inventory is None:
+            inventory = DeviceInventory(
+                sensor_whitelist, tracker_whitelist, report_unknown_whitelist, aeskeys
+            )
+        elif any(
+            arg is not None for arg in (sensor_whitelist, tracker_whitelist, report_unknown_whitelist, aeskeys)
+        ):
+            raise ValueError("Use either an inventory or whitelists and aeskeys, not both")
+        self.inventory = inventory
+        self._bind_whitelists(inventory)
+        self.thread_safe = thread_safe
+        self.ciphers = ThreadLocalCipherCache() if thread_safe else CipherCache()
+        self.decrypt_backoff = DecryptBackoff(decrypt_backoff, decrypt_backoff_max)
+
+        if thread_safe:
+            # parse from several threads, the advertisements of a device are parsed one at a time
+            self.device_locks = StripedLock(lock_stripes)
+            self.devices = StripedDeviceRegistry(
+                device_state_size, device_state_ttl, resolver=self._resolve_device, stripes=lock_stripes
+            )
+            state_store = StripedDeviceStateStore
         else:
-            self.aeskeys = aeskeys
+            self.device_locks = None
+            self.devices = DeviceRegistry(device_state_size, device_state_ttl, resolver=self._resolve_device)
+            state_store = DeviceStateStore
+        # parse_advertisement and parse_raw_data refill the same Advertisement(View),
+        # unless they are called from several threads (or nested, see parse_raw_data)
+        self._advertisement = None if thread_safe else Advertisement(None, None, "", [], [])
+        self._advertisement_view = None if thread_safe else AdvertisementView(b"")
+        self.lpacket_ids = state_store(self.devices, "packet_ids")
+        self.movements_list = state_store(self.devices, "movements")
+        self.adv_priority = state_store(self.devices, "adv_priority")
+        self.encryption_counters = state_store(self.devices, "counters")
+        inventory.aeskeys.subscribe(self._keys_changed)
+
+        self.routing_table = get_routing_table()
+
+    @property
+    def sensor_whitelist(self):
+        """MAC addresses and UUIDs of the sensors that are reported without discovery, see Whitelist"""
+        return self._sensor_whitelist
+
+    @sensor_whitelist.setter
+    def sensor_whitelist(self, sensor_whitelist):
+        self.set_inventory(self.inventory.replace(sensor_whitelist=sensor_whitelist))
+
+    @property
+    def tracker_whitelist(self):
+        """MAC addresses and UUIDs of the device trackers, see Whitelist"""
+        return self._tracker_whitelist
+
+    @tracker_whitelist.setter
+    def tracker_whitelist(self, tracker_whitelist):
+        self.set_inventory(self.inventory.replace(tracker_whitelist=tracker_whitelist))
+
+    @property
+    def report_unknown_whitelist(self):
+        """MAC addresses and UUIDs of the devices to log the advertisements of, see Whitelist"""
+        return self._report_unknown_whitelist
+
+    @report_unknown_whitelist.setter
+    def report_unknown_whitelist(self, report_unknown_whitelist):
+        self.set_inventory(self.inventory.replace(report_unknown_whitelist=report_unknown_whitelist))
+
+    @property
+    def aeskeys(self):
+        """Encryption keys, keyed on MAC address"""
+        return self.inventory.aeskeys
+
+    @aeskeys.setter
+    def aeskeys(self, aeskeys):
+        self.set_inventory(self.inventory.replace(aeskeys=aeskeys))
+
+    def set_inventory(self, inventory):
+        """Replace the whitelists and encryption keys.
+
+        The inventory is swapped in with a single assignment, so advertisements
+        are parsed with either the old or the new inventory, never a mix of both.
+        The whitelist flags in the device registry are looked up again, and the
+        ciphers of the old keys and the decryption backoff are removed.
+        """
+        old_keys = self.inventory.aeskeys
+        if inventory.aeskeys is not old_keys:
+            old_keys.unsubscribe(self._keys_changed)
+            inventory.aeskeys.subscribe(self._keys_changed)
+        self.inventory = inventory
+        self._bind_whitelists(inventory)
+        self.devices.refresh()
+        self.ciphers.clear()
+        self.decrypt_backoff.clear()
+
+    def _bind_whitelists(self, inventory):
+        """Wrap the whitelists of the inventory, so they can be updated like lists or sets"""
+        self._sensor_whitelist = Whitelist(inventory.sensor_whitelist, self, "sensor_whitelist")
+        self._tracker_whitelist = Whitelist(inventory.tracker_whitelist, self, "tracker_whitelist")
+        self._report_unknown_whitelist = Whitelist(
+            inventory.report_unknown_whitelist, self, "report_unknown_whitelist"
+        )
 
-        self.lpacket_ids = {}
-        self.movements_list = {}
-        self.adv_priority = {}
+    def _keys_changed(self, changes):
+        """Drop the ciphers and backoff of devices with a changed key.
+
+        Called by the key store of the inventory with a {mac: old key} dictionary.
+        """
+        decrypt_backoff = self.decrypt_backoff
+        ciphers = self.ciphers
+        for mac, old_key in changes.items():
+            decrypt_backoff.reset(mac)
+            if old_key is not None:
+                ciphers.discard(old_key)
+
+    def device_state_info(self):
+        """Return the statistics of the device registry"""
+        return self.devices.info()
+
+    def _resolve_device(self, mac):
+        """Return the whitelist flags of a device for the device registry"""
+        inventory = self.inventory
+        flags = 0
+        if mac in inventory.sensor_whitelist:
+            flags |= FLAG_SENSOR_WHITELIST
+        if mac in inventory.tracker_whitelist:
+            flags |= FLAG_TRACKER_WHITELIST
+        if mac in inventory.report_unknown_whitelist:
+            flags |= FLAG_REPORT_UNKNOWN_WHITELIST
+        return flags
 
     def parse_raw_data(self, data):
-        """Parse the raw data."""
+        """Parse the raw data.
+
+        The AD structures are passed to the vendor parsers as slices of data.
+        Values that end up in the results or in the parser state (MAC addresses,
+        UUIDs, names) are converted to bytes, so data can be a reused buffer
+        (bytearray or memoryview). The advertisement fields are extracted in a
+        single pass, see AdvertisementView.
+        """
         # check if packet is Extended scan result
         is_ext_packet = True if data[3] == 0x0D else False
         # check for no BR/EDR + LE General discoverable mode flags
@@ -107,60 +210,71 @@ class BleParser:
         if rssi > 127:
             rssi = rssi - 256
         # MAC address
-        mac = (data[8 if is_ext_packet else 7:14 if is_ext_packet else 13])[::-1]
-        complete_local_name = ""
-        shortened_local_name = ""
-        service_class_uuid16 = None
-        service_class_uuid128 = None
-        service_data_list = []
-        man_spec_data_list = []
-
-        while adpayload_size > 1:
-            adstuct_size = data[adpayload_start] + 1
-            if adstuct_size > 1 and adstuct_size <= adpayload_size:
-                adstruct = data[adpayload_start:adpayload_start + adstuct_size]
-                # https://www.bluetooth.com/specifications/assigned-numbers/generic-access-profile/
-                adstuct_type = adstruct[1]
-                if adstuct_type == 0x02:
-                    # AD type 'Incomplete List of 16-bit Service Class UUIDs'
-                    service_class_uuid16 = (adstruct[2] << 8) | adstruct[3]
-                elif adstuct_type == 0x03:
-                    # AD type 'Complete List of 16-bit Service Class UUIDs'
-                    service_class_uuid16 = (adstruct[2] << 8) | adstruct[3]
-                elif adstuct_type == 0x06:
-                    # AD type '128-bit Service Class UUIDs'
-                    service_class_uuid128 = adstruct[2:]
-                elif adstuct_type == 0x08:
-                    # AD type 'shortened local name'
-                    shortened_local_name = adstruct[2:].decode("utf-8")
-                elif adstuct_type == 0x09:
-                    # AD type 'complete local name'
-                    complete_local_name = adstruct[2:].decode("utf-8")
-                elif adstuct_type == 0x16 and adstuct_size > 4:
-                    # AD type 'Service Data - 16-bit UUID'
-                    service_data_list.append(adstruct)
-                elif adstuct_type == 0xFF:
-                    # AD type 'Manufacturer Specific Data'
-                    man_spec_data_list.append(adstruct)
-                    # https://www.bluetooth.com/specifications/assigned-numbers/company-identifiers/
-            adpayload_size -= adstuct_size
-            adpayload_start += adstuct_size
-
-        if complete_local_name:
-            local_name = complete_local_name
-        else:
-            local_name = shortened_local_name
-
-        sensor_data, tracker_data = self.parse_advertisement(
-            mac,
-            rssi,
-            service_class_uuid16,
-            service_class_uuid128,
-            local_name,
-            service_data_list,
-            man_spec_data_list
-        )
-        return sensor_data, tracker_data
+        mac = data[8 if is_ext_packet else 7:14 if is_ext_packet else 13][::-1]
+        if not isinstance(mac, bytes):
+            # slice of a bytearray or memoryview, the MAC address ends up in the results and parser state
+            mac = bytes(mac)
+        adv = self._advertisement_view
+        if adv is None:
+            # thread safe mode, or a nested call from a vendor parser or log handler
+            adv = AdvertisementView(data, adpayload_start, adpayload_start + adpayload_size)
+            return self.parse_advertisement_view(mac, rssi, adv)
+        # the view is taken while it is in use, so a nested call doesn't scan over it
+        self._advertisement_view = None
+        try:
+            adv.scan(data, adpayload_start, adpayload_start + adpayload_size)
+            return self._parse_advertisement_view(mac, rssi, adv)
+        finally:
+            self._advertisement_view = adv
+
+    def parse_raw_reports(self, data):
+        """Parse an HCI LE (Extended) Advertising Report event with one or more reports.
+
+        parse_raw_data only accepts events with a single report. Controllers can
+        pack several reports in one event, this generator yields a
+        (sensor_msg, tracker_msg) tuple for each report in the event, in the order
+        of the reports.
+        """
+        parse_advertisement_view = self.parse_advertisement_view
+        for mac, rssi, adpayload_start, adpayload_end in iter_advertising_reports(data):
+            adv = AdvertisementView(data, adpayload_start, adpayload_end)
+            yield parse_advertisement_view(mac, rssi, adv)
+
+    def parse_raw_batch(self, events):
+        """Parse a batch of raw HCI events.
+
+        Returns a list with a (sensor_data, tracker_data) tuple for each event, in
+        the same order as the events. The events are parsed one after the other, so
+        duplicate filtering and advertisement priority work the same as with
+        parse_raw_data.
+        """
+        parse_raw_data = self.parse_raw_data
+        try:
+            results = [None] * len(events)
+        except TypeError:
+            # iterable without length (e.g. a generator)
+            return [parse_raw_data(data) for data in events]
+        for index, data in enumerate(events):
+            results[index] = parse_raw_data(data)
+        return results
+
+    def parse_advertisement_batch(self, advertisements):
+        """Parse a batch of advertisements.
+
+        Each advertisement is a tuple with the positional arguments of
+        parse_advertisement (mac, rssi, service_class_uuid16, ...). Returns a list
+        with a (sensor_data, tracker_data) tuple for each advertisement, in the same
+        order as the advertisements.
+        """
+        parse_advertisement = self.parse_advertisement
+        try:
+            results = [None] * len(advertisements)
+        except TypeError:
+            # iterable without length (e.g. a generator)
+            return [parse_advertisement(*adv) for adv in advertisements]
+        for index, adv in enumerate(advertisements):
+            results[index] = parse_advertisement(*adv)
+        return results
 
     def parse_advertisement(
             self,
@@ -173,240 +287,98 @@ class BleParser:
             man_spec_data_list: Optional[list] = None
     ):
         """parse BLE advertisement"""
-        sensor_data = None
-        tracker_data = None
-        unknown_sensor = False
         if service_data_list is None:
             service_data_list = []
         if man_spec_data_list is None:
             man_spec_data_list = []
 
-        while not sensor_data:
-            if service_data_list:
-                for service_data in service_data_list:
-                    # parse data for sensors with service data
-                    uuid16 = (service_data[3] << 8) | service_data[2]
-                    if uuid16 == 0x181A:
-                        # UUID16 = Environmental Sensing (used by ATC or b-parasite)
-                        if len(service_data) == 22 or len(service_data) == 20:
-                            sensor_data = parse_bparasite(self, service_data, mac, rssi)
-                        else:
-                            sensor_data = parse_atc(self, service_data, mac, rssi)
-                        break
-                    elif uuid16 in [0x181B, 0x181D]:
-                        # UUID16 = Body Composition and Weight Scale (used by Mi Scale)
-                        sensor_data = parse_miscale(self, service_data, mac, rssi)
-                        break
-                    elif uuid16 in [0x181C, 0x181E]:
-                        # UUID16 = User Data and Bond Management (used by BTHome V1)
-                        sensor_data = parse_bthome(self, service_data, uuid16, mac, rssi)
-                        break
-                    elif uuid16 in [0xAA20, 0xAA21, 0xAA22] and local_name == "ECo":
-                        # UUID16 = Relsib
-                        sensor_data = parse_relsib(self, service_data, mac, rssi)
-                        break
-                    elif uuid16 == 0xF525:
-                        # UUID16 = Jaalee
-                        sensor_data = parse_jaalee(self, service_data, mac, rssi)
-                        break
-                    elif uuid16 == 0xFCD2:
-                        # UUID16 = Allterco Robotics ltd (BTHome V2)
-                        sensor_data = parse_bthome(self, service_data, uuid16, mac, rssi)
-                        break
-                    elif uuid16 in [0xFD3D, 0x0D00]:
-                        # UUID16 = unknown (used by Switchbot)
-                        sensor_data = parse_switchbot(self, service_data, mac, rssi)
-                        break
-                    elif uuid16 == 0xFD50:
-                        # UUID16 = Hangzhou Tuya Information Technology Co., Ltd (HHCC)
-                        sensor_data = parse_hhcc(self, service_data, mac, rssi)
-                        break
-                    elif uuid16 == 0xFDCD:
-                        # UUID16 = Qingping
-                        sensor_data = parse_qingping(self, service_data, mac, rssi)
-                        break
-                    elif uuid16 == 0xFE95:
-                        # UUID16 = Xiaomi
-                        sensor_data = parse_xiaomi(self, service_data, mac, rssi)
-                        break
-                    elif uuid16 == 0xFEAA:
-                        if len(service_data) == 19:
-                            # UUID16 = Google (used by KKM)
-                            sensor_data = parse_kkm(self, service_data, mac, rssi)
-                            break
-                        elif len(service_data) >= 23:
-                            # UUID16 = Google (used by Ruuvitag V2/V4)
-                            sensor_data = parse_ruuvitag(self, service_data, mac, rssi)
-                            break
-                    elif uuid16 == 0xFEE0:
-                        # UUID16 = Anhui Huami Information Technology Co., Ltd. (Amazfit)
-                        sensor_data = parse_amazfit(self, service_data, mac, rssi)
-                        break
-                    elif uuid16 == 0xFFF9:
-                        # UUID16 = FIDO (used by Cleargrass)
-                        sensor_data = parse_qingping(self, service_data, mac, rssi)
-                        break
-                    elif uuid16 == 0x2A6E or uuid16 == 0x2A6F:
-                        # UUID16 = Temperature and Humidity (used by Teltonika)
-                        if len(service_data_list) == 2:
-                            service_data = b"".join(service_data_list)
-                        sensor_data = parse_teltonika(self, service_data, local_name, mac, rssi)
-                        break
-                    else:
-                        unknown_sensor = True
-            elif man_spec_data_list:
-                for man_spec_data in man_spec_data_list:
-                    # parse data for sensors with manufacturer specific data
-                    comp_id = (man_spec_data[3] << 8) | man_spec_data[2]
-                    data_len = man_spec_data[0]
-                    # Filter on Company Identifier
-                    if comp_id == 0x0001 and data_len in [0x09, 0x0C, 0x22, 0x25]:
-                        # Govee H5101/H5102/H5177
-                        sensor_data = parse_govee(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0x004C and man_spec_data[4] == 0x02:
-                        # iBeacon
-                        if int.from_bytes(man_spec_data[6:22], byteorder='big') in TILT_TYPES:
-                            sensor_data, tracker_data = parse_tilt(self, man_spec_data, mac, rssi)
-                        else:
-                            sensor_data, tracker_data = parse_ibeacon(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0x00DC and data_len == 0x0E:
-                        # Oral-b
-                        sensor_data = parse_oral_b(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0x0499:
-                        # Ruuvitag V3/V5
-                        sensor_data = parse_ruuvitag(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0x094F and data_len == 0x15:
-                        # Mikrotik
-                        sensor_data = parse_mikrotik(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0x06E8:
-                        # Almendo (Blusensor)
-                        sensor_data = parse_almendo(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0x1000 and data_len == 0x15:
-                        # Moat S2
-                        sensor_data = parse_moat(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0x0133 and data_len == 0x11:
-                        # BlueMaestro
-                        sensor_data = parse_bluemaestro(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0x01AE and data_len == 0x0F:
-                        # SmartDry
-                        sensor_data = parse_smartdry(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0x06D5:
-                        # Sensirion
-                        sensor_data = parse_sensirion(self, man_spec_data, local_name, mac, rssi)
-                        break
-                    elif comp_id in [0x2111, 0x2112, 0x2121, 0x2122] and data_len == 0x0B:
-                        # Air Mentor
-                        sensor_data = parse_airmentor(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0x8801 and data_len in [0x0C, 0x25]:
-                        # Govee H5179
-                        sensor_data = parse_govee(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0xAA55 and data_len == 0x14:
-                        # Brifit
-                        sensor_data = parse_brifit(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0xEC88 and data_len in [0x09, 0x0A, 0x0C, 0x22, 0x24, 0x25]:
-                        # Govee H5051/H5071/H5072/H5075/H5074
-                        sensor_data = parse_govee(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0xFFFF and data_len == 0x1E:
-                        # Kegtron
-                        sensor_data = parse_kegtron(self, man_spec_data, mac, rssi)
-                        break
-                    elif comp_id == 0xA0AC and data_len == 0x0F and man_spec_data[14] in [0x06, 0x0D]:
-                        # Laica
-                        sensor_data = parse_laica(self, man_spec_data, mac, rssi)
-                        break
+        adv = self._advertisement
+        if adv is None:
+            # thread safe mode, or a nested call from a vendor parser or log handler
+            adv = Advertisement(
+                service_class_uuid16,
+                service_class_uuid128,
+                local_name,
+                service_data_list,
+                man_spec_data_list
+            )
+            return self.parse_advertisement_view(mac, rssi, adv)
+        # the routes and vendor parsers don't keep the Advertisement after the call, it is taken
+        # while it is in use, so a nested call doesn't overwrite it
+        self._advertisement = None
+        adv.service_class_uuid16 = service_class_uuid16
+        adv.service_class_uuid128 = service_class_uuid128
+        adv.local_name = local_name
+        adv.service_data_list = service_data_list
+        adv.man_spec_data_list = man_spec_data_list
+        try:
+            return self._parse_advertisement_view(mac, rssi, adv)
+        finally:
+            self._advertisement = adv
 
-                    # Filter on part of the UUID16
-                    elif man_spec_data[2] == 0xC0 and data_len == 0x10:
-                        # Xiaogui Scale
-                        sensor_data = parse_xiaogui(self, man_spec_data, mac, rssi)
-                        break
-                    elif man_spec_data[3] == 0x82 and data_len == 0x0E:
-                        # iNode
-                        sensor_data = parse_inode(self, man_spec_data, mac, rssi)
-                        break
-                    elif man_spec_data[3] in [
-                        0x91, 0x92, 0x93, 0x94, 0x95, 0x96, 0x9A, 0x9B, 0x9C, 0x9D
-                    ] and data_len == 0x19:
-                        # iNode Care Sensors
-                        sensor_data = parse_inode(self, man_spec_data, mac, rssi)
-                        break
+    def parse_advertisement_view(self, mac: bytes, rssi: int, adv):
+        """parse BLE advertisement from an Advertisement or AdvertisementView"""
+        device_locks = self.device_locks
+        if device_locks is None:
+            return self._parse_advertisement_view(mac, rssi, adv)
+        # the state of a device (packet id, priority, ...) is read and updated under its lock
+        with device_locks.lock(mac):
+            return self._parse_advertisement_view(mac, rssi, adv)
 
-                    # Filter on service class uuid16
-                    elif service_class_uuid16 == 0x20AA and data_len == 0x0E:
-                        # Jinou BEC07-5
-                        sensor_data = parse_jinou(self, man_spec_data, mac, rssi)
-                        break
-                    elif service_class_uuid16 == 0x5182 and data_len in [0x14, 0x2D]:
-                        # Govee H5182
-                        sensor_data = parse_govee(self, man_spec_data, mac, rssi)
-                        break
-                    elif service_class_uuid16 == 0x5183 and data_len in [0x11, 0x2A]:
-                        # Govee H5183
-                        sensor_data = parse_govee(self, man_spec_data, mac, rssi)
-                        break
-                    elif service_class_uuid16 == 0x5185 and data_len in [0x17, 0x30]:
-                        # Govee H5185
-                        sensor_data = parse_govee(self, man_spec_data, mac, rssi)
-                        break
-                    elif service_class_uuid16 == 0xF0FF:
-                        if comp_id in [0x0010, 0x0011, 0x0015, 0x0018] and data_len in [0x15, 0x17]:
-                            # Thermoplus
-                            sensor_data = parse_thermoplus(self, man_spec_data, mac, rssi)
-                            break
-                        elif (comp_id in [0x0000, 0x0001] or local_name in ["iBBQ", "xBBQ", "sps", "tps"]) and (
-                            data_len in [0x0A, 0x0D, 0x0F, 0x13, 0x17]
+    def _parse_advertisement_view(self, mac: bytes, rssi: int, adv):
+        """parse BLE advertisement, see parse_advertisement_view"""
+        sensor_data = None
+        tracker_data = None
+        route = None
+        # an AdvertisementView has the offsets of the AD structures in its payload (buf), an
+        # AD structure is only sliced out of it for a route
+        buf = adv.data
+        service_data = adv.service_data_list if buf is None else adv.service_data_offsets
+        if service_data:
+            # parse data for sensors with service data, the routes are found with one dict lookup
+            # on the UUID16, see RoutingTable.match_service_data
+            service_data_routes = self.routing_table.service_data
+            for data in service_data:
+                if buf is None:
+                    routes = service_data_routes.get((data[3] << 8) | data[2])
+                else:
+                    routes = service_data_routes.get((buf[data + 3] << 8) | buf[data + 2])
+                    if routes is not None:
+                        data = buf[data:data + buf[data] + 1]
+                if routes is not None:
+                    for candidate in routes:
+                        if (candidate.lengths is None or len(data) in candidate.lengths) and (
+                            candidate.check is None or candidate.check(data, adv)
                         ):
-                            # Inkbird
-                            sensor_data = parse_inkbird(self, man_spec_data, local_name, mac, rssi)
+                            route = candidate
                             break
-                        else:
-                            unknown_sensor = True
-
-                    # Filter on service class uuid128
-                    elif service_class_uuid128 == (
-                        b'\xb0\x0a\x09\xec\xd7\x9d\xb8\x93\xba\x42\xd6\x11\x00\x00\x09\xef'
-                    ) and data_len in [0x06, 0x08]:
-                        # Sensorpush
-                        sensor_data = parse_sensorpush(self, man_spec_data, mac, rssi)
-                        break
-
-                    # Filter on complete local name
-                    elif local_name in ["sps", "tps"] and data_len == 0x0A:
-                        # Inkbird IBS-TH
-                        sensor_data = parse_inkbird(self, man_spec_data, local_name, mac, rssi)
-                        break
-                    elif local_name[0:5] in ["TP357", "TP359"] and data_len == 0x07:
-                        # Thermopro
-                        sensor_data = parse_thermopro(self, man_spec_data, local_name[0:5], mac, rssi)
+                    if route is not None:
                         break
-
-                    # Filter on other parts of the manufacturer specific data
-                    elif data_len == 0x1B and ((man_spec_data[4] << 8) | man_spec_data[5]) == 0xBEAC:
-                        # AltBeacon
-                        sensor_data, tracker_data = parse_altbeacon(self, man_spec_data, comp_id, mac, rssi)
+        else:
+            # parse data for sensors with manufacturer specific data
+            man_spec_data = adv.man_spec_data_list if buf is None else adv.man_spec_data_offsets
+            if man_spec_data:
+                match = self.routing_table.match_manufacturer_data
+                for data in man_spec_data:
+                    if buf is not None:
+                        data = buf[data:data + buf[data] + 1]
+                    route = match(data, adv)
+                    if route is not None:
                         break
 
-                    elif man_spec_data[0] == 0x12 and comp_id == 0xACC0:  # Acconeer
-                        sensor_data = parse_acconeer(self, man_spec_data, mac, rssi)
-                        break
-                    else:
-                        unknown_sensor = True
+        if route is not None:
+            # the vendor parser is called directly, without a wrapper
+            parse = route.parse
+            if parse is None:
+                parse = route.load()
+            if route.handler is not None:
+                sensor_data, tracker_data = route.handler(parse, self, data, mac, rssi, adv)
+            elif route.with_name:
+                sensor_data = parse(self, data, adv.local_name, mac, rssi)
             else:
-                unknown_sensor = True
-            if unknown_sensor and self.report_unknown == "Other":
+                sensor_data = parse(self, data, mac, rssi)
+        else:
+            if self.report_unknown == "Other":
                 _LOGGER.info(
                     "Unknown advertisement received for mac: %s"
                     "service data: %s"
@@ -414,18 +386,29 @@ class BleParser:
                     "local name: %s"
                     "UUID16: %s,"
                     "UUID128: %s",
-                    to_mac(mac),
-                    service_data_list,
-                    man_spec_data_list,
-                    local_name,
-                    service_class_uuid16,
-                    service_class_uuid128,
+                    LazyMac(mac),
+                    LazyStr(_bytes_list, adv.service_data_list),
+                    LazyStr(_bytes_list, adv.man_spec_data_list),
+                    adv.local_name,
+                    adv.service_class_uuid16,
+                    adv.service_class_uuid128,
                 )
-            break
+
+        inventory = self.inventory
+        if not inventory.tracker_whitelist and not inventory.report_unknown_whitelist:
+            # no device trackers to report and no advertisements to log
+            return sensor_data, None
+        # the lookup of the whitelist flags doesn't add the device to the registry
+        flags = self.devices.device_flags(mac)
 
         # check for monitored device trackers
-        tracker_id = tracker_data['tracker_id'] if tracker_data and 'tracker_id' in tracker_data else mac
-        if tracker_id in self.tracker_whitelist:
+        if tracker_data and 'tracker_id' in tracker_data:
+            tracker_id = tracker_data['tracker_id']
+            is_tracker = tracker_id in inventory.tracker_whitelist
+        else:
+            tracker_id = mac
+            is_tracker = flags & FLAG_TRACKER_WHITELIST
+        if is_tracker:
             if tracker_data is not None:
                 tracker_data.update({"is connected": True})
             else:
@@ -437,8 +420,11 @@ class BleParser:
         else:
             tracker_data = None
 
-        if self.report_unknown_whitelist:
-            if tracker_id in self.report_unknown_whitelist:
+        if inventory.report_unknown_whitelist:
+            if (
+                flags & FLAG_REPORT_UNKNOWN_WHITELIST if tracker_id is mac
+                else tracker_id in inventory.report_unknown_whitelist
+            ):
                 _LOGGER.info(
                     "BLE advertisement received from MAC/UUID %s: "
                     "service data: %s"
@@ -446,12 +432,12 @@ class BleParser:
                     "local name: %s"
                     "UUID16: %s,"
                     "UUID128: %s",
-                    tracker_id.hex(),
-                    service_data_list,
-                    man_spec_data_list,
-                    local_name,
-                    service_class_uuid16,
-                    service_class_uuid128
+                    LazyHex(tracker_id),
+                    LazyStr(_bytes_list, adv.service_data_list),
+                    LazyStr(_bytes_list, adv.man_spec_data_list),
+                    adv.local_name,
+                    adv.service_class_uuid16,
+                    adv.service_class_uuid128
                 )
 
         return sensor_data, tracker_data
@@ -1,9 +1,10 @@
 """Parser for Acconeer BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -24,7 +25,6 @@ def parse_acconeer(self, data, source_mac, rssi):
     firmware = "Acconeer"
     acconeer_mac = source_mac
     device_id = data[4]
-    xvalue = data[5:]
     result = {"firmware": firmware}
 
     if msg_length == 19 and device_id in ACCONEER_SENSOR_IDS:
@@ -36,7 +36,7 @@ def parse_acconeer(self, data, source_mac, rssi):
             temperature,
             presence,
             reserved2
-        ) = unpack("<HhHQ", xvalue)
+        ) = unpack_from("<HhHQ", data, 5)
 
         if "presence" in measurements:
             result.update({
@@ -59,27 +59,24 @@ def parse_acconeer(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Acconeer DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # Check for duplicate messages
-    packet_id = xvalue.hex()
-    try:
-        prev_packet = self.lpacket_ids[acconeer_mac]
-    except KeyError:
-        # start with empty first packet
-        prev_packet = None
+    packet_id = data[5:].hex()
+    devices, slot = self.devices.lookup(acconeer_mac)
+    prev_packet = devices.packet_ids[slot]
     if prev_packet == packet_id:
         # only process new messages
         if self.filter_duplicates is True:
             return None
-    self.lpacket_ids[acconeer_mac] = packet_id
+    devices.packet_ids[slot] = packet_id
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and acconeer_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(acconeer_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(acconeer_mac))
         return None
 
     result.update({
@@ -0,0 +1,244 @@
+"""Advertisement fields that are passed to the routes and vendor parsers"""
+
+# HCI LE Meta event subevent codes
+LE_ADVERTISING_REPORT = 0x02
+LE_EXTENDED_ADVERTISING_REPORT = 0x0D
+
+# Size of a report without the AD structures (including the RSSI of a legacy report)
+LEGACY_REPORT_HEADER_SIZE = 10
+EXTENDED_REPORT_HEADER_SIZE = 24
+
+# AD types, see https://www.bluetooth.com/specifications/assigned-numbers/generic-access-profile/
+AD_TYPE_UUID16_INCOMPLETE = 0x02
+AD_TYPE_UUID16_COMPLETE = 0x03
+AD_TYPE_UUID128 = 0x06
+AD_TYPE_SHORTENED_LOCAL_NAME = 0x08
+AD_TYPE_COMPLETE_LOCAL_NAME = 0x09
+AD_TYPE_SERVICE_DATA = 0x16
+AD_TYPE_MANUFACTURER_DATA = 0xFF
+
+# AD types of the UUIDs and local names that are extracted by AdvertisementView
+_FIELD_AD_TYPES = frozenset((
+    AD_TYPE_UUID16_INCOMPLETE,
+    AD_TYPE_UUID16_COMPLETE,
+    AD_TYPE_UUID128,
+    AD_TYPE_SHORTENED_LOCAL_NAME,
+    AD_TYPE_COMPLETE_LOCAL_NAME,
+))
+
+
+def _find_service_data(service_data_list, uuid16):
+    """Return the first service data AD structure with the given UUID16"""
+    for adstruct in service_data_list:
+        if ((adstruct[3] << 8) | adstruct[2]) == uuid16:
+            return adstruct
+    return None
+
+
+def _find_manufacturer_data(man_spec_data_list, company_id):
+    """Return the first manufacturer specific data AD structure with the given company id"""
+    for adstruct in man_spec_data_list:
+        if len(adstruct) >= 4 and ((adstruct[3] << 8) | adstruct[2]) == company_id:
+            return adstruct
+    return None
+
+
+class Advertisement:
+    """Advertisement fields that are used by the routes, next to the AD structure itself"""
+    # the AD structures are separate objects, not offsets in a payload like in AdvertisementView
+    data = None
+
+    __slots__ = (
+        "service_class_uuid16",
+        "service_class_uuid128",
+        "local_name",
+        "service_data_list",
+        "man_spec_data_list",
+    )
+
+    def __init__(
+        self,
+        service_class_uuid16,
+        service_class_uuid128,
+        local_name,
+        service_data_list,
+        man_spec_data_list
+    ):
+        self.service_class_uuid16 = service_class_uuid16
+        self.service_class_uuid128 = service_class_uuid128
+        self.local_name = local_name
+        self.service_data_list = service_data_list
+        self.man_spec_data_list = man_spec_data_list
+
+    def service_data(self, uuid16):
+        """Return the service data AD structure with the given UUID16, or None"""
+        return _find_service_data(self.service_data_list, uuid16)
+
+    def manufacturer_data(self, company_id):
+        """Return the manufacturer specific data AD structure with the given company id, or None"""
+        return _find_manufacturer_data(self.man_spec_data_list, company_id)
+
+
+class AdvertisementView:
+    """Advertisement fields of the AD structures in the payload of an HCI advertising report.
+
+    The payload is scanned once, in a single pass that records the offsets of
+    the service data and manufacturer specific data AD structures and extracts
+    the UUIDs. The AD structures are only sliced out of data when they are
+    accessed (service_data_list, man_spec_data_list), the parser routes on
+    the offsets, so advertisements without a matching route don't pay for the
+    slices. Local names are only decoded when they are accessed for the first
+    time, so advertisements that are not routed on their name don't pay for
+    it (or fail on an invalid name). The view keeps a reference to data, which
+    must not change while the view is used. A view can be reused for the next
+    advertisement with scan(), which saves the object creation.
+    """
+    __slots__ = (
+        "data",
+        "service_class_uuid16",
+        "service_class_uuid128",
+        "service_data_offsets",
+        "man_spec_data_offsets",
+        "_service_data_list",
+        "_man_spec_data_list",
+        "_complete_local_name",
+        "_shortened_local_name",
+        "_local_name",
+    )
+
+    def __init__(self, data, start=0, end=None):
+        self.scan(data, start, end)
+
+    def scan(self, data, start=0, end=None):
+        """Extract the fields of another AD payload, the view is reused for it"""
+        if end is None:
+            end = len(data)
+        self.data = data
+        self.service_class_uuid16 = None
+        self.service_class_uuid128 = None
+        self._service_data_list = None
+        self._man_spec_data_list = None
+        self._complete_local_name = None
+        self._shortened_local_name = None
+        self._local_name = None
+        # most advertisements have at most one AD structure of each type, a tuple of offsets
+        # is cheaper to build than a list
+        service_data_offsets = ()
+        man_spec_data_offsets = ()
+        last = end - 1
+        while start < last:
+            adstruct_end = start + data[start] + 1
+            if adstruct_end > end:
+                break
+            # the sizes are checked per AD type, an empty AD structure has no AD type
+            ad_type = data[start + 1]
+            if ad_type == AD_TYPE_MANUFACTURER_DATA:
+                if adstruct_end - start > 1:
+                    man_spec_data_offsets += (start,)
+            elif ad_type == AD_TYPE_SERVICE_DATA:
+                if adstruct_end - start > 4:
+                    service_data_offsets += (start,)
+            elif ad_type in _FIELD_AD_TYPES and adstruct_end - start > 2:
+                if ad_type == AD_TYPE_COMPLETE_LOCAL_NAME:
+                    self._complete_local_name = data[start + 2:adstruct_end]
+                elif ad_type == AD_TYPE_SHORTENED_LOCAL_NAME:
+                    self._shortened_local_name = data[start + 2:adstruct_end]
+                elif ad_type == AD_TYPE_UUID128:
+                    self.service_class_uuid128 = bytes(data[start + 2:adstruct_end])
+                elif adstruct_end - start > 3:
+                    # AD_TYPE_UUID16_INCOMPLETE or AD_TYPE_UUID16_COMPLETE
+                    self.service_class_uuid16 = (data[start + 2] << 8) | data[start + 3]
+            start = adstruct_end
+        self.service_data_offsets = service_data_offsets
+        self.man_spec_data_offsets = man_spec_data_offsets
+
+    @property
+    def service_data_list(self):
+        """Service data AD structures, as slices of data"""
+        service_data_list = self._service_data_list
+        if service_data_list is None:
+            data = self.data
+            service_data_list = self._service_data_list = [
+                data[start:start + data[start] + 1] for start in self.service_data_offsets
+            ]
+        return service_data_list
+
+    @property
+    def man_spec_data_list(self):
+        """Manufacturer specific data AD structures, as slices of data"""
+        man_spec_data_list = self._man_spec_data_list
+        if man_spec_data_list is None:
+            data = self.data
+            man_spec_data_list = self._man_spec_data_list = [
+                data[start:start + data[start] + 1] for start in self.man_spec_data_offsets
+            ]
+        return man_spec_data_list
+
+    @property
+    def local_name(self):
+        """Complete local name, or the shortened local name if there is no complete local name"""
+        local_name = self._local_name
+        if local_name is None:
+            name = self._complete_local_name
+            local_name = "" if name is None else str(name, "utf-8")
+            if not local_name:
+                name = self._shortened_local_name
+                local_name = "" if name is None else str(name, "utf-8")
+            self._local_name = local_name
+        return local_name
+
+    def service_data(self, uuid16):
+        """Return the service data AD structure with the given UUID16, or None"""
+        return _find_service_data(self.service_data_list, uuid16)
+
+    def manufacturer_data(self, company_id):
+        """Return the manufacturer specific data AD structure with the given company id, or None"""
+        return _find_manufacturer_data(self.man_spec_data_list, company_id)
+
+
+def iter_advertising_reports(data):
+    """Iterate over the reports in an HCI LE (Extended) Advertising Report event.
+
+    Controllers can pack several reports in one event (Num_Reports > 1), with
+    the fields of each report one after the other. Yields (mac, rssi, start, end)
+    for each report, with start and end the offsets of the AD structures in
+    data. Nothing is yielded for an event with an invalid length, a truncated
+    report stops the iteration.
+    """
+    msg_length = len(data)
+    if msg_length < 5 or data[2] + 3 != msg_length:
+        return
+    if data[3] not in (LE_ADVERTISING_REPORT, LE_EXTENDED_ADVERTISING_REPORT):
+        return
+    is_ext_packet = data[3] == LE_EXTENDED_ADVERTISING_REPORT
+
+    report_start = 5
+    for _ in range(data[4]):
+        if is_ext_packet:
+            adpayload_start = report_start + EXTENDED_REPORT_HEADER_SIZE
+            if adpayload_start > msg_length:
+                return
+            adpayload_end = adpayload_start + data[adpayload_start - 1]
+            if adpayload_end > msg_length:
+                return
+            rssi = data[report_start + 13]
+            mac = data[report_start + 3:report_start + 9][::-1]
+            next_report_start = adpayload_end
+        else:
+            adpayload_start = report_start + LEGACY_REPORT_HEADER_SIZE - 1
+            if adpayload_start > msg_length:
+                return
+            adpayload_end = adpayload_start + data[adpayload_start - 1]
+            # the RSSI follows the AD structures
+            if adpayload_end >= msg_length:
+                return
+            rssi = data[adpayload_end]
+            mac = data[report_start + 2:report_start + 8][::-1]
+            next_report_start = adpayload_end + 1
+        if not isinstance(mac, bytes):
+            mac = bytes(mac)
+        # strange positive RSSI workaround
+        if rssi > 127:
+            rssi = rssi - 256
+        yield mac, rssi, adpayload_start, adpayload_end
+        report_start = next_report_start
@@ -1,10 +1,11 @@
 """Parser for Air Mentor BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 import math
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -19,9 +20,8 @@ def parse_airmentor(self, data, source_mac, rssi):
         firmware = "Air Mentor"
         airmentor_mac = source_mac
         msg_type = data[2]
-        xvalue = data[4:]
         if msg_type in [0x12, 0x22]:
-            (tvoc, temp, temp_cal, humi, aqi) = unpack(">HHBBH", xvalue)
+            (tvoc, temp, temp_cal, humi, aqi) = unpack_from(">HHBBH", data, 4)
             temperature = (temp - 4000) * 0.01
             temperature_calibrated = temperature - temp_cal * 0.1
             humi = round(float(int("0x2d", 16)) * math.exp(temperature * 17.62 / (temperature + 243.12)) / math.exp(
@@ -48,7 +48,7 @@ def parse_airmentor(self, data, source_mac, rssi):
                 "air quality": air_quality
             }
         if msg_type in [0x11, 0x21]:
-            (co2, pm25, pm10, co, o3) = unpack(">HHHBB", xvalue)
+            (co2, pm25, pm10, co, o3) = unpack_from(">HHHBB", data, 4)
             # CO and O3 are not used
             result = {
                 "co2": co2,
@@ -62,14 +62,14 @@ def parse_airmentor(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Air Mentor DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and airmentor_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(airmentor_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(airmentor_mac))
         return None
 
     result.update({
@@ -1,8 +1,9 @@
 """Parser for Almendo bluSensor BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -27,8 +28,8 @@ def parse_almendo(self, data, source_mac, rssi):
             if version == 1 and dmodel == 0x0A:
                 # Almendo bluSensor V1 format (BSP02AIQ)
                 # sensor_state, temp, humi, co2e, tvoc, aiq
-                (_, temp, humi, co2e, tvoc, aqi) = unpack(
-                    "<BhHHHB", data[10:20]
+                (_, temp, humi, co2e, tvoc, aqi) = unpack_from(
+                    "<BhHHHB", data, 10
                 )
 
                 result.update(
@@ -53,15 +54,15 @@ def parse_almendo(self, data, source_mac, rssi):
                 "BLE ADV from UNKNOWN Almendo DEVICE: RSSI: %s, "
                 "MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex(),
+                LazyMac(source_mac),
+                LazyHex(data),
             )
         return None
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and source_mac not in self.sensor_whitelist:
         _LOGGER.debug(
             "Discovery is disabled. MAC: %s is not whitelisted!",
-            to_mac(source_mac),
+            LazyMac(source_mac),
         )
         return None
     if version != 1:
@@ -69,6 +70,6 @@ def parse_almendo(self, data, source_mac, rssi):
             "Protocol version %i on device %s not yet known "
             "by the Almendo parser",
             version,
-            to_mac(source_mac),
+            LazyMac(source_mac),
         )
     return result
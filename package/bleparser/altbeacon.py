@@ -1,6 +1,6 @@
 """Parser for AltBeacon BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 from typing import Final
 
 from .const import (
@@ -21,7 +21,8 @@ from .const import (
     DEFAULT_MANUFACTURER,
 )
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_uuid,
     to_unformatted_mac,
 )
@@ -35,7 +36,10 @@ def parse_altbeacon(self, data: str, comp_id: int, source_mac: str, rssi: float)
     """parser for Alt Beacon"""
     if len(data) >= 27:
         uuid = data[6:22]
-        (major, minor, power) = unpack(">HHb", data[22:27])
+        if not isinstance(uuid, bytes):
+            # slice of a memoryview, the UUID ends up in the results
+            uuid = bytes(uuid)
+        (major, minor, power) = unpack_from(">HHb", data, 22)
 
         tracker_data = {
             CONF_RSSI: rssi,
@@ -65,8 +69,8 @@ def parse_altbeacon(self, data: str, comp_id: int, source_mac: str, rssi: float)
                 "BLE ADV from UNKNOWN %s DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 DEVICE_TYPE,
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None, None
 
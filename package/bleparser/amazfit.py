@@ -1,9 +1,10 @@
 """Parser for Amazfit BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -17,7 +18,6 @@ def parse_amazfit(self, data, source_mac, rssi):
     if msg_length == 24:
         device_type = "Amazfit Smart Scale"
         firmware = "Amazfit"
-        xvalue = data[4:25]
         # Not all info is known
         # byte 0-4: unknown
         # byte 5-6: impedance / 10
@@ -26,7 +26,7 @@ def parse_amazfit(self, data, source_mac, rssi):
         # byte 12: pulse
         # byte 13: unknown
         # byte 14-19: user information, not used yet
-        (impedance, weight, unk_1, unk_2, pulse) = unpack("<5xHHBHB1x6x", xvalue)
+        (impedance, weight, unk_1, unk_2, pulse) = unpack_from("<5xHHBHB1x6x", data, 4)
         if unk_1 == 0 and unk_2 == 0:
             result = {
                 "non-stabilized weight": weight / 200,
@@ -46,14 +46,14 @@ def parse_amazfit(self, data, source_mac, rssi):
         if self.report_unknown == "Amazfit":
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Amazfit Scale DEVICE: MAC: %s, ADV: %s",
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and source_mac.lower() not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(source_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(source_mac))
         return None
 
     result.update({
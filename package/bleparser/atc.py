@@ -1,12 +1,13 @@
 """Parser for ATC BLE advertisements"""
 import logging
-from struct import unpack
-from Cryptodome.Cipher import AES
+from struct import unpack, unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
+from .registry import MISSING
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,9 +19,8 @@ def parse_atc(self, data, source_mac, rssi):
     if msg_length == 19:
         # Parse BLE message in Custom format without encryption
         firmware = "ATC (Custom)"
-        atc_mac_reversed = data[4:10]
-        atc_mac = atc_mac_reversed[::-1]
-        (temp, humi, volt, batt, packet_id, trg) = unpack("<hHHBBB", data[10:])
+        atc_mac = data[9:3:-1]
+        (temp, humi, volt, batt, packet_id, trg) = unpack_from("<hHHBBB", data, 10)
         result = {
             "temperature": temp / 100,
             "humidity": humi / 100,
@@ -36,7 +36,7 @@ def parse_atc(self, data, source_mac, rssi):
         # Parse BLE message in ATC format
         firmware = "ATC (Atc1441)"
         atc_mac = data[4:10]
-        (temp, humi, batt, volt, packet_id) = unpack(">hBBHB", data[10:])
+        (temp, humi, batt, volt, packet_id) = unpack_from(">hBBHB", data, 10)
         result = {
             "temperature": temp / 10,
             "humidity": humi,
@@ -101,28 +101,28 @@ def parse_atc(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN ATC DEVICE: RSSI: %s, MAC: %s, AdStruct: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
+    if not isinstance(atc_mac, bytes):
+        # slice of a memoryview, the MAC address ends up in the results and parser state
+        atc_mac = bytes(atc_mac)
+
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and atc_mac not in self.sensor_whitelist:
         return None
 
-    try:
-        prev_packet = self.lpacket_ids[atc_mac]
-    except KeyError:
-        # start with empty first packet
-        prev_packet = None
-    try:
-        old_adv_priority = self.adv_priority[atc_mac]
-    except KeyError:
+    devices, slot = self.devices.lookup(atc_mac)
+    prev_packet = devices.packet_ids[slot]
+    old_adv_priority = devices.adv_priority[slot]
+    if old_adv_priority == MISSING:
         # start with initial adv priority
         old_adv_priority = 0
     if adv_priority > old_adv_priority:
         # always process advertisements with a higher priority
-        self.adv_priority[atc_mac] = adv_priority
+        devices.adv_priority[slot] = adv_priority
     elif adv_priority == old_adv_priority:
         if self.filter_duplicates is True:
             # only process messages with same priority that have a changed packet id
@@ -131,9 +131,9 @@ def parse_atc(self, data, source_mac, rssi):
     else:
         # do not process advertisements with lower priority
         old_adv_priority -= 1
-        self.adv_priority[atc_mac] = old_adv_priority
+        devices.adv_priority[slot] = old_adv_priority
         return None
-    self.lpacket_ids[atc_mac] = packet_id
+    devices.packet_ids[slot] = packet_id
 
     result.update({
         "rssi": rssi,
@@ -148,35 +148,39 @@ def parse_atc(self, data, source_mac, rssi):
 
 def decrypt_atc(self, data, atc_mac):
     """Try to find encryption key for current device"""
+    # skip devices that failed decryption recently
+    if self.decrypt_backoff.blocked(atc_mac):
+        return None
     try:
         key = self.aeskeys[atc_mac]
         if len(key) != 16:
             _LOGGER.error("Encryption key should be 16 bytes (32 characters) long")
     except KeyError:
         # no encryption key found
-        _LOGGER.error("No encryption key found for ATC device with MAC: %s", to_mac(atc_mac))
+        if self.decrypt_backoff.failure(atc_mac):
+            _LOGGER.error("No encryption key found for ATC device with MAC: %s", LazyMac(atc_mac))
         return None
     # prepare the data for decryption
     nonce = b"".join([atc_mac[::-1], data[:5]])
     cipherpayload = data[5:-4]
     aad = b"\x11"
     token = data[-4:]
-    cipher = AES.new(key, AES.MODE_CCM, nonce=nonce, mac_len=4)
-    cipher.update(aad)
+    cipher = self.ciphers.cipher(key)
     # decrypt the data
     try:
-        decrypted_payload = cipher.decrypt_and_verify(cipherpayload, token)
+        decrypted_payload = cipher.decrypt(nonce, cipherpayload, aad, token)
     except ValueError as error:
-        _LOGGER.warning("Decryption failed: %s", error)
-        _LOGGER.debug("token: %s", token.hex())
-        _LOGGER.debug("nonce: %s", nonce.hex())
-        _LOGGER.debug("encrypted_payload: %s", cipherpayload.hex())
+        if self.decrypt_backoff.failure(atc_mac):
+            _LOGGER.warning("Decryption failed: %s", error)
+        _LOGGER.debug("token: %s", LazyHex(token))
+        _LOGGER.debug("nonce: %s", LazyHex(nonce))
+        _LOGGER.debug("encrypted_payload: %s", LazyHex(cipherpayload))
         return None
     if decrypted_payload is None:
         _LOGGER.warning(
             "Decryption failed for %s, decrypted payload is None",
-            to_mac(atc_mac),
+            LazyMac(atc_mac),
         )
         return None
-
+    self.decrypt_backoff.success(atc_mac)
     return decrypted_payload
@@ -1,9 +1,10 @@
 """Parser for BlueMaestro BLE advertisements."""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -16,12 +17,11 @@ def parse_bluemaestro(self, data, source_mac, rssi):
     firmware = "BlueMaestro"
     device_id = data[4]
     bluemaestro_mac = source_mac
-    msg = data[5:]
     if msg_length == 18 and device_id == 0x17:
         # BlueMaestro Tempo Disc THD
         device_type = "Tempo Disc THD"
         # pylint: disable=unused-variable
-        (batt, time_interval, log_cnt, temp, humi, dew_point, mode) = unpack("!BhhhHhH", msg)
+        (batt, time_interval, log_cnt, temp, humi, dew_point, mode) = unpack_from("!BhhhHhH", data, 5)
         result = {
             "temperature": temp / 10,
             "humidity": humi / 10,
@@ -32,7 +32,7 @@ def parse_bluemaestro(self, data, source_mac, rssi):
         # BlueMaestro Tempo Disc THPD (sends P instead of D, no D is send)
         device_type = "Tempo Disc THPD"
         # pylint: disable=unused-variable
-        (batt, time_interval, log_cnt, temp, humi, press, mode) = unpack("!BhhhHhH", msg)
+        (batt, time_interval, log_cnt, temp, humi, press, mode) = unpack_from("!BhhhHhH", data, 5)
         result = {
             "temperature": temp / 10,
             "humidity": humi / 10,
@@ -44,14 +44,14 @@ def parse_bluemaestro(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN BlueMaestro DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in whitelist, if needed
     if self.discovery is False and bluemaestro_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(bluemaestro_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(bluemaestro_mac))
         return None
 
     result.update({
@@ -1,9 +1,10 @@
 """Parser for BParasite BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -14,10 +15,10 @@ def parse_bparasite(self, data, source_mac, rssi):
     """Check for adstruc length"""
     msg_length = len(data)
     if msg_length == 22:  # TODO: Use protocol bits?
-        bpara_mac = data[14:20]
+        bpara_mac = bytes(data[14:20])
         device_type = "b-parasite V1.1.0"
         firmware = "b-parasite V1.1.0 (with illuminance)"
-        (protocol, packet_id, batt, temp, humi, moist, mac, light) = unpack(">BBHhHH6sH", data[4:])
+        (protocol, packet_id, batt, temp, humi, moist, mac, light) = unpack_from(">BBHhHH6sH", data, 4)
         result = {
             "temperature": temp / (100 if (protocol >> 4) == 2 else 1000),
             "humidity": (humi / 65536) * 100,
@@ -27,10 +28,10 @@ def parse_bparasite(self, data, source_mac, rssi):
             "data": True
         }
     elif msg_length == 20:
-        bpara_mac = data[14:20]
+        bpara_mac = bytes(data[14:20])
         device_type = "b-parasite V1.0.0"
         firmware = "b-parasite V1.0.0 (without illuminance)"
-        (protocol, packet_id, batt, temp, humi, moist, mac) = unpack(">BBHhHH6s", data[4:])
+        (protocol, packet_id, batt, temp, humi, moist, mac) = unpack_from(">BBHhHH6s", data, 4)
         result = {
             "temperature": temp / (100 if (protocol >> 4) == 2 else 1000),
             "humidity": (humi / 65536) * 100,
@@ -43,9 +44,9 @@ def parse_bparasite(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN b-parasite DEVICE: RSSI: %s, MAC: %s, AdStruct(%d): %s",
                 rssi,
-                to_mac(source_mac),
+                LazyMac(source_mac),
                 msg_length,
-                data.hex()
+                LazyHex(data)
             )
         return None
 
@@ -53,18 +54,15 @@ def parse_bparasite(self, data, source_mac, rssi):
     if self.discovery is False and bpara_mac not in self.sensor_whitelist:
         return None
 
-    try:
-        prev_packet = self.lpacket_ids[bpara_mac]
-    except KeyError:
-        # start with empty first packet
-        prev_packet = None
+    devices, slot = self.devices.lookup(bpara_mac)
+    prev_packet = devices.packet_ids[slot]
 
     if self.filter_duplicates is True:
         # only process messages with same priority that have a changed packet id
         if prev_packet == packet_id:
             return None
 
-    self.lpacket_ids[bpara_mac] = packet_id
+    devices.packet_ids[slot] = packet_id
 
     result.update({
         "rssi": rssi,
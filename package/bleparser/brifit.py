@@ -1,9 +1,10 @@
 """Parser for Brifit BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -21,9 +22,8 @@ def parse_brifit(self, data, source_mac, rssi):
             device_type = None
         firmware = "Brifit"
 
-        brifit_mac = data[6:12]
-        xvalue = data[12:19]
-        (volt, temp, humi, batt) = unpack(">HhHB", xvalue)
+        brifit_mac = bytes(data[6:12])
+        (volt, temp, humi, batt) = unpack_from(">HhHB", data, 12)
         result = {
             "temperature": temp / 100,
             "humidity": humi / 100,
@@ -37,8 +37,8 @@ def parse_brifit(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Brifit DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
@@ -49,7 +49,7 @@ def parse_brifit(self, data, source_mac, rssi):
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and brifit_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(brifit_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(brifit_mac))
         return None
 
     result.update({
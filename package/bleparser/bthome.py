@@ -1,37 +1,41 @@
 """Parser for BTHome (DIY sensors) advertisements"""
+from functools import lru_cache
 import logging
 import struct
-from typing import Any
-from Cryptodome.Cipher import AES
+from typing import NamedTuple, Optional
 
 from .bthome_const import MEAS_TYPES
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def decimal_places(factor: float) -> int:
+    """Return the number of decimal places of a factor (e.g. 2 for 0.01)"""
+    return -int(f"{factor:e}".split("e")[-1])
+
+
 def parse_uint(data_obj: bytes, factor: float = 1.0) -> float:
     """Convert bytes (as unsigned integer) and factor to float."""
-    decimal_places = -int(f"{factor:e}".split("e")[-1])
     return round(
-        int.from_bytes(data_obj, "little", signed=False) * factor, decimal_places
+        int.from_bytes(data_obj, "little", signed=False) * factor, decimal_places(factor)
     )
 
 
 def parse_int(data_obj: bytes, factor: float = 1.0) -> float:
     """Convert bytes (as signed integer) and factor to float."""
-    decimal_places = -int(f"{factor:e}".split("e")[-1])
     return round(
-        int.from_bytes(data_obj, "little", signed=True) * factor, decimal_places
+        int.from_bytes(data_obj, "little", signed=True) * factor, decimal_places(factor)
     )
 
 
 def parse_float(data_obj: bytes, factor: float = 1.0):
     """Convert bytes (as float) and factor to float."""
-    decimal_places = -int(f"{factor:e}".split("e")[-1])
     if len(data_obj) == 2:
         [val] = struct.unpack("e", data_obj)
     elif len(data_obj) == 4:
@@ -41,12 +45,12 @@ def parse_float(data_obj: bytes, factor: float = 1.0):
     else:
         _LOGGER.error("only 2, 4 or 8 byte long floats are supported in BTHome BLE")
         return None
-    return round(val * factor, decimal_places)
+    return round(val * factor, decimal_places(factor))
 
 
 def parse_string(data_obj: bytes) -> str:
     """Convert bytes to string."""
-    return data_obj.decode("UTF-8")
+    return str(data_obj, "UTF-8")
 
 
 dispatch = {
@@ -56,53 +60,117 @@ dispatch = {
     0x03: parse_string,
 }
 
+# Data formats of BTHome objects
+FORMAT_UINT = 0
+FORMAT_INT = 1
+FORMAT_FLOAT = 2
+FORMAT_STRING = 3
+DATA_FORMATS = {
+    "unsigned_integer": FORMAT_UINT,
+    "signed_integer": FORMAT_INT,
+    "float": FORMAT_FLOAT,
+    "string": FORMAT_STRING,
+}
+
+
+class MeasDecoder(NamedTuple):
+    """Decoder of a BTHome measurement type, compiled from MEAS_TYPES"""
+    key: str
+    unit: Optional[str]
+    data_length: int
+    data_format: int
+    factor: float
+    # None for a factor of 1 (the value is not scaled or rounded)
+    decimal_places: Optional[int]
+    # Old Shelly buttons send 0xFE when held, rather than 0x80.
+    is_button: bool
+
+
+def compile_meas_types(meas_types):
+    """Return a {measurement type: MeasDecoder} table for a MEAS_TYPES dictionary"""
+    return {
+        meas_type: MeasDecoder(
+            key=meas.meas_format,
+            unit=meas.unit_of_measurement,
+            data_length=meas.data_length,
+            data_format=DATA_FORMATS[meas.data_format],
+            factor=meas.factor,
+            decimal_places=(
+                None if meas.factor == 1 and isinstance(meas.factor, int) else decimal_places(meas.factor)
+            ),
+            is_button=meas.meas_format == "button",
+        )
+        for meas_type, meas in meas_types.items()
+    }
+
+
+MEAS_DECODERS = compile_meas_types(MEAS_TYPES)
+
+
+class BTHomePacket:
+    """Per-advertisement state of the BTHome parser.
+
+    The values of the advertisement that is parsed are kept in a packet object
+    that is passed along the parse functions, rather than on the parser, so one
+    parser (with one set of keys and duplicate filter state) can parse
+    advertisements in several threads or tasks at once.
+    """
+    __slots__ = ("uuid16", "mac", "rssi", "firmware", "packet_id", "device_type", "device")
+
+    def __init__(self, uuid16, mac, rssi):
+        self.uuid16 = uuid16
+        self.mac = mac
+        self.rssi = rssi
+        self.firmware = None
+        self.packet_id = None
+        self.device_type = "BTHome"
+        # (registry, slot) of the device, looked up once per advertisement
+        self.device = None
+
+    def lookup(self, devices):
+        """Return (registry, slot) of the device in the DeviceRegistry devices"""
+        if self.device is None:
+            self.device = devices.lookup(self.mac)
+        return self.device
+
 
 def parse_bthome(self, data, uuid16, source_mac, rssi):
     """BTHome BLE parser"""
-    self.uuid16 = uuid16
-    self.bthome_mac = source_mac
-    self.rssi = rssi
+    packet = BTHomePacket(uuid16, source_mac, rssi)
 
-    if self.uuid16 == 0xFCD2:
+    if uuid16 == 0xFCD2:
         # BTHome V2 format
-        return parse_bthome_v2(self, data)
-    elif self.uuid16 in [0x181C, 0x181E]:
+        return parse_bthome_v2(self, packet, data)
+    elif uuid16 in [0x181C, 0x181E]:
         # BTHome V1 format
-        return parse_bthome_v1(self, data)
+        return parse_bthome_v1(self, packet, data)
     else:
         return None
 
 
-def parse_bthome_v1(self, data):
+def parse_bthome_v1(self, packet, data):
     "Parse data in BTHome V1 format"
-    self.device_type = "BTHome"
-    self.packet_id = None
     sw_version = 1
     payload = data[4:]
-    if self.uuid16 == 0x181C:
+    if packet.uuid16 == 0x181C:
         # Non-encrypted BTHome V1 format
-        self.firmware = "BTHome V1"
-        self.packet_id = None
-    elif self.uuid16 == 0x181E:
+        packet.firmware = "BTHome V1"
+    elif packet.uuid16 == 0x181E:
         # Encrypted BTHome V1 format
-        self.firmware = "BTHome V1 (encrypted)"
-        try:
-            payload, count_id = decrypt_data(self, payload, sw_version)
-        except (ValueError, TypeError):
+        packet.firmware = "BTHome V1 (encrypted)"
+        payload, count_id = decrypt_data(self, packet, payload, sw_version)
+        if payload is None:
             return None
 
-        self.packet_id = parse_uint(count_id)
+        packet.packet_id = int.from_bytes(count_id, "little")
     else:
         return None
 
-    return parse_payload(self, payload, sw_version)
+    return parse_payload(self, packet, payload, sw_version)
 
 
-def parse_bthome_v2(self, data):
+def parse_bthome_v2(self, packet, data):
     "Parse data in BTHome V2 format"
-    self.device_type = "BTHome"
-    self.packet_id = None
-
     adv_info = data[4]
 
     # Determine if encryption is used and check BTHome version
@@ -110,9 +178,9 @@ def parse_bthome_v2(self, data):
     sw_version = (adv_info >> 5) & 7  # 3 bits (5-7)
     if sw_version == 2:
         if encryption == 1:
-            self.firmware = f"BTHome V{sw_version} (encrypted)"
+            packet.firmware = f"BTHome V{sw_version} (encrypted)"
         else:
-            self.firmware = f"BTHome V{sw_version}"
+            packet.firmware = f"BTHome V{sw_version}"
     else:
         _LOGGER.error(
             "Sensor is set to use BTHome version %s, which is not existing. "
@@ -124,34 +192,33 @@ def parse_bthome_v2(self, data):
     payload = data[5:]
 
     if encryption == 1:
-        try:
-            payload, count_id = decrypt_data(self, payload, sw_version)
-        except (ValueError, TypeError):
+        payload, count_id = decrypt_data(self, packet, payload, sw_version)
+        if payload is None:
             return None
 
-        self.packet_id = parse_uint(count_id)
+        packet.packet_id = int.from_bytes(count_id, "little")
 
-    return parse_payload(self, payload, sw_version)
+    return parse_payload(self, packet, payload, sw_version)
 
 
-def parse_payload(self, payload, sw_version):
+def parse_payload(self, packet, payload, sw_version):
     "Parse the payload"
     payload_length = len(payload)
     next_obj_start = 0
     prev_obj_meas_type = 0
-    result = {}
-    measurements: list[dict[str, Any]] = []
-    postfix_dict: dict[int, int] = {}
-    obj_data_format: str | int
+    # (measurement type, decoder, value) of each object, value is None for invalid objects
+    measurements = []
+    seen_meas_types = set()
+    dup_meas_types = set()
 
-    # Create a list with all individual objects
+    # Decode the individual objects
     while payload_length >= next_obj_start + 1:
         obj_start = next_obj_start
 
         if sw_version == 1:
             # BTHome V1
             obj_meas_type = payload[obj_start + 1]
-            obj_data_unit = MEAS_TYPES[obj_meas_type].unit_of_measurement
+            decoder = MEAS_DECODERS[obj_meas_type]
             obj_control_byte = payload[obj_start]
             obj_data_length = (obj_control_byte >> 0) & 31  # 5 bits (0-4)
             obj_data_format = (obj_control_byte >> 5) & 7  # 3 bits (5-7)
@@ -165,162 +232,134 @@ def parse_payload(self, payload, sw_version):
                     "BTHome device is not sending object ids in numerical order (from low to "
                     "high object id). This can cause issues with your BTHome receiver, "
                     "payload: %s",
-                    payload.hex(),
+                    LazyHex(payload),
                 )
-            if obj_meas_type not in MEAS_TYPES:
+            decoder = MEAS_DECODERS.get(obj_meas_type)
+            if decoder is None:
                 _LOGGER.debug(
                     "Invalid Object ID found in payload: %s",
-                    payload.hex(),
+                    LazyHex(payload),
                 )
                 break
             prev_obj_meas_type = obj_meas_type
-            obj_data_length = MEAS_TYPES[obj_meas_type].data_length
-            obj_data_format = MEAS_TYPES[obj_meas_type].data_format
-            obj_data_unit = MEAS_TYPES[obj_meas_type].unit_of_measurement
+            obj_data_length = decoder.data_length
+            obj_data_format = decoder.data_format
             obj_data_start = obj_start + 1
             next_obj_start = obj_start + obj_data_length + 1
 
         if obj_data_length == 0:
             _LOGGER.debug(
                 "Invalid payload data length found with length 0, payload: %s",
-                payload.hex(),
+                LazyHex(payload),
             )
             continue
 
         if payload_length < next_obj_start:
-            _LOGGER.debug("Invalid payload data length, payload: %s", payload.hex())
+            _LOGGER.debug("Invalid payload data length, payload: %s", LazyHex(payload))
             break
-        measurements.append(
-            {
-                "data format": obj_data_format,
-                "data unit": obj_data_unit,
-                "data length": obj_data_length,
-                "measurement type": obj_meas_type,
-                "measurement data": payload[obj_data_start:next_obj_start],
-                "device id": None,
-            }
-        )
-
-    # Get a list of measurement types that are included more than once.
-    seen_meas_types = set()
-    dup_meas_types = set()
-    for meas in measurements:
-        if meas["measurement type"] in seen_meas_types:
-            dup_meas_types.add(meas["measurement type"])
-        else:
-            seen_meas_types.add(meas["measurement type"])
-
-    # Parse each object into readable information
-    for meas in measurements:
-        if meas["measurement type"] not in MEAS_TYPES:
-            _LOGGER.debug(
-                "UNKNOWN measurement type %s in BTHome BLE payload! Adv: %s",
-                meas["measurement type"],
-                payload.hex(),
-            )
-            continue
-
-        # Old Shelly buttons send 0xFE when held, rather than 0x80.
-        if (
-            MEAS_TYPES[meas["measurement type"]].meas_format == "button" and
-            meas["measurement data"] == b"\xFE"
-        ):
-            meas["measurement data"] = b'\x80'
-
-        if meas["measurement type"] in dup_meas_types:
-            # Add a postfix for advertisements with multiple measurements of the same type
-            postfix_counter = postfix_dict.get(meas["measurement type"], 0) + 1
-            postfix_dict[meas["measurement type"]] = postfix_counter
-            postfix = f"_{postfix_counter}"
-        else:
-            postfix = ""
 
-        meas_type = MEAS_TYPES[meas["measurement type"]]
-        meas_unit = meas_type.unit_of_measurement
-        meas_format = f"{meas_type.meas_format}{postfix}"
-        meas_factor = meas_type.factor
+        data_obj = payload[obj_data_start:next_obj_start]
+        if decoder.is_button and data_obj == b"\xFE":
+            data_obj = b"\x80"
         value: None | str | int | float
 
-        if meas["data format"] == 0 or meas["data format"] == "unsigned_integer":
-            value = parse_uint(meas["measurement data"], meas_factor)
-        elif meas["data format"] == 1 or meas["data format"] == "signed_integer":
-            value = parse_int(meas["measurement data"], meas_factor)
-        elif meas["data format"] == 2 or meas["data format"] == "float":
-            value = parse_float(meas["measurement data"], meas_factor)
-        elif meas["data format"] == 3 or meas["data format"] == "string":
-            value = parse_string(meas["measurement data"])
+        if obj_data_format <= FORMAT_INT:
+            value = int.from_bytes(data_obj, "little", signed=obj_data_format == FORMAT_INT)
+            if decoder.decimal_places is not None:
+                value = round(value * decoder.factor, decoder.decimal_places)
+        elif obj_data_format == FORMAT_FLOAT:
+            value = parse_float(data_obj, decoder.factor)
+        elif obj_data_format == FORMAT_STRING:
+            value = parse_string(data_obj)
         else:
             _LOGGER.error(
                 "UNKNOWN dataobject in BTHome BLE payload! Adv: %s",
-                payload.hex(),
+                LazyHex(payload),
             )
-            continue
+            value = None
 
+        if obj_meas_type in seen_meas_types:
+            dup_meas_types.add(obj_meas_type)
+        else:
+            seen_meas_types.add(obj_meas_type)
+        measurements.append((obj_meas_type, decoder, value))
+
+    result = {}
+    postfix_dict: dict[int, int] = {}
+    for meas_type, decoder, value in measurements:
+        key = decoder.key
+        if dup_meas_types and meas_type in dup_meas_types:
+            # Add a postfix for advertisements with multiple measurements of the same type
+            postfix_counter = postfix_dict.get(meas_type, 0) + 1
+            postfix_dict[meas_type] = postfix_counter
+            key = f"{key}_{postfix_counter}"
         if value is not None:
-            result.update({meas_format: value})
-            if meas_unit == "lbs":
+            result[key] = value
+            if decoder.unit == "lbs":
                 # Weight measurement with non-standard unit of measurement (lb)
-                result.update({"weight unit": meas_unit})
+                result["weight unit"] = decoder.unit
 
     if not result:
         if self.report_unknown == "BTHome":
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Home Assistant BLE DEVICE: RSSI: %s, MAC: %s, ADV: %s",
-                self.rssi,
-                to_mac(self.bthome_mac),
-                payload.hex()
+                packet.rssi,
+                LazyMac(packet.mac),
+                LazyHex(payload)
             )
         return None
 
     # Check for packet id in payload
     if result.get("packet"):
-        self.packet_id = result["packet"]
+        packet.packet_id = result["packet"]
 
     # Check for duplicate messages
-    if self.packet_id:
-        try:
-            prev_packet = self.lpacket_ids[self.bthome_mac]
-        except KeyError:
-            # start with empty first packet
-            prev_packet = None
-        if prev_packet == self.packet_id:
+    if packet.packet_id:
+        devices, slot = packet.lookup(self.devices)
+        prev_packet = devices.packet_ids[slot]
+        if prev_packet == packet.packet_id:
             # only process new messages
             if self.filter_duplicates is True:
                 return None
-        self.lpacket_ids[self.bthome_mac] = self.packet_id
+        devices.packet_ids[slot] = packet.packet_id
     else:
-        self.packet_id = "no packet id"
+        packet.packet_id = "no packet id"
 
     # check for MAC presence in sensor whitelist, if needed
-    if self.discovery is False and self.bthome_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(self.bthome_mac))
+    if self.discovery is False and packet.mac not in self.sensor_whitelist:
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(packet.mac))
         return None
 
     result.update({
-        "rssi": self.rssi,
-        "mac": to_unformatted_mac(self.bthome_mac),
-        "packet": self.packet_id,
-        "type": self.device_type,
-        "firmware": self.firmware,
+        "rssi": packet.rssi,
+        "mac": to_unformatted_mac(packet.mac),
+        "packet": packet.packet_id,
+        "type": packet.device_type,
+        "firmware": packet.firmware,
         "data": True
     })
     return result
 
 
-def decrypt_data(self, data: bytes, sw_version: int):
+def decrypt_data(self, packet: BTHomePacket, data: bytes, sw_version: int):
     """Decrypt encrypted BTHome advertisements"""
     # check for minimum length of encrypted advertisement
     if len(data) < (15 if sw_version == 1 else 14):
-        _LOGGER.debug("Invalid data length (for decryption), adv: %s", data.hex())
+        _LOGGER.debug("Invalid data length (for decryption), adv: %s", LazyHex(data))
+    # skip devices that failed decryption recently
+    if self.decrypt_backoff.blocked(packet.mac):
+        return None, None
     # try to find encryption key for current device
     try:
-        key = self.aeskeys[self.bthome_mac]
+        key = self.aeskeys[packet.mac]
         if len(key) != 16:
-            _LOGGER.error("Encryption key should be 16 bytes (32 characters) long")
+            if self.decrypt_backoff.failure(packet.mac):
+                _LOGGER.error("Encryption key should be 16 bytes (32 characters) long")
             return None, None
     except KeyError:
         # no encryption key found
-        _LOGGER.error("No encryption key found for device with MAC %s", to_mac(self.bthome_mac))
+        if self.decrypt_backoff.failure(packet.mac):
+            _LOGGER.error("No encryption key found for device with MAC %s", LazyMac(packet.mac))
         return None, None
 
     # prepare the data for decryption
@@ -332,24 +371,33 @@ def decrypt_data(self, data: bytes, sw_version: int):
     count_id = data[-8:-4]
     mic = data[-4:]
 
+    # the counter is not encrypted, so duplicates are filtered before decryption
+    counter = int.from_bytes(count_id, "little")
+    devices, slot = packet.lookup(self.devices)
+    if self.filter_duplicates is True and devices.counters[slot] == counter:
+        return None, None
+
     # nonce: mac [6], uuid16 [2 (v1) or 3 (v2)], count_id [4]
-    nonce = b"".join([self.bthome_mac, uuid, count_id])
-    cipher = AES.new(key, AES.MODE_CCM, nonce=nonce, mac_len=4)
-    if sw_version == 1:
-        cipher.update(b"\x11")
+    nonce = b"".join([packet.mac, uuid, count_id])
+    cipher = self.ciphers.cipher(key)
+    aad = b"\x11" if sw_version == 1 else b""
 
     try:
-        decrypted_payload = cipher.decrypt_and_verify(encrypted_payload, mic)
+        decrypted_payload = cipher.decrypt(nonce, encrypted_payload, aad, mic)
     except ValueError as error:
-        _LOGGER.warning("Decryption failed: %s", error)
-        _LOGGER.debug("mic: %s", mic.hex())
-        _LOGGER.debug("nonce: %s", nonce.hex())
-        _LOGGER.debug("encrypted_payload: %s", encrypted_payload.hex())
-        return None
+        if self.decrypt_backoff.failure(packet.mac):
+            _LOGGER.warning("Decryption failed: %s", error)
+        _LOGGER.debug("mic: %s", LazyHex(mic))
+        _LOGGER.debug("nonce: %s", LazyHex(nonce))
+        _LOGGER.debug("encrypted_payload: %s", LazyHex(encrypted_payload))
+        return None, None
     if decrypted_payload is None:
         _LOGGER.error(
             "Decryption failed for %s, decrypted payload is None",
-            to_mac(self.bthome_mac),
+            LazyMac(packet.mac),
         )
         return None, None
+    # only advertisements that pass the MIC check update the counter
+    devices.counters[slot] = counter
+    self.decrypt_backoff.success(packet.mac)
     return decrypted_payload, count_id
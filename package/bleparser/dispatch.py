@@ -0,0 +1,360 @@
+"""Routing tables for dispatching BLE advertisements to the vendor parsers"""
+from importlib import import_module
+
+from .const import TILT_TYPES
+
+# Vendor parser modules, each module has a parse_<module> function. The modules
+# are imported on first use, see get_parser.
+VENDOR_MODULES = (
+    "acconeer",
+    "airmentor",
+    "almendo",
+    "altbeacon",
+    "amazfit",
+    "atc",
+    "bluemaestro",
+    "bparasite",
+    "brifit",
+    "bthome",
+    "govee",
+    "hhcc",
+    "ibeacon",
+    "inkbird",
+    "inode",
+    "jaalee",
+    "jinou",
+    "kegtron",
+    "kkm",
+    "laica",
+    "mikrotik",
+    "miscale",
+    "moat",
+    "oral_b",
+    "qingping",
+    "relsib",
+    "ruuvitag",
+    "sensorpush",
+    "sensirion",
+    "switchbot",
+    "smartdry",
+    "teltonika",
+    "thermoplus",
+    "thermopro",
+    "tilt",
+    "xiaomi",
+    "xiaogui",
+)
+
+_PARSERS = {}
+
+
+def get_parser(vendor):
+    """Return the parser function of a vendor module, import the module on first use"""
+    try:
+        return _PARSERS[vendor]
+    except KeyError:
+        if vendor not in VENDOR_MODULES:
+            raise
+        module = import_module(f".{vendor}", __package__)
+        parse_func = _PARSERS[vendor] = getattr(module, f"parse_{vendor}")
+        return parse_func
+
+
+def load_parsers():
+    """Import all vendor modules, e.g. before forking worker processes"""
+    for vendor in VENDOR_MODULES:
+        get_parser(vendor)
+
+
+# Fields of a manufacturer specific data AD structure that can be used as routing key
+COMP_ID = 0
+BYTE_2 = 1
+BYTE_3 = 2
+SERVICE_CLASS_UUID16 = 3
+SERVICE_CLASS_UUID128 = 4
+LOCAL_NAME = 5
+LOCAL_NAME_PREFIX = 6
+BEACON_CODE = 7
+
+SENSORPUSH_UUID128 = b'\xb0\x0a\x09\xec\xd7\x9d\xb8\x93\xba\x42\xd6\x11\x00\x00\x09\xef'
+
+
+class Route:
+    """Single routing rule, with an optional length and extra check on the AD structure.
+
+    The parser function of the vendor module is looked up on the first match
+    (parse, see load). Most vendor parsers are called directly with
+    (parser, data, mac, rssi), or with the local name before the mac
+    (with_name). A handler is only used by the routes that pass other
+    arguments or that return tracker data as well.
+    """
+    __slots__ = ("name", "vendor", "handler", "with_name", "check", "field", "keys", "lengths", "parse")
+
+    def __init__(self, name, target, check=None, field=None, keys=None, lengths=None):
+        self.name = name
+        self.vendor, self.handler, self.with_name = target
+        self.check = check
+        self.field = field
+        self.keys = keys
+        self.lengths = lengths
+        self.parse = None
+
+    def load(self):
+        """Return the parser function of the vendor module of the route, see get_parser"""
+        parse = self.parse
+        if parse is None:
+            parse = self.parse = get_parser(self.vendor)
+        return parse
+
+    def __repr__(self):
+        return f"Route({self.name})"
+
+
+# Route targets: (vendor module, handler or None, the parser needs the local name)
+def _sensor(vendor):
+    """Vendor parser that only returns sensor data"""
+    return vendor, None, False
+
+
+def _sensor_with_name(vendor):
+    """Vendor parser that needs the local name"""
+    return vendor, None, True
+
+
+def _handler(vendor, handler):
+    """Vendor parser that is called by handler(parse, parser, data, mac, rssi, adv)"""
+    return vendor, handler, False
+
+
+def _beacon(parse, parser, data, mac, rssi, adv):
+    """iBeacon (Tilt uses iBeacon with specific UUIDs)"""
+    if int.from_bytes(data[6:22], byteorder='big') in TILT_TYPES:
+        parse = _TILT.parse
+        if parse is None:
+            parse = _TILT.load()
+    return parse(parser, data, mac, rssi)
+
+
+def _bthome(parse, parser, data, mac, rssi, adv):
+    """BTHome V1 and V2"""
+    uuid16 = (data[3] << 8) | data[2]
+    return parse(parser, data, uuid16, mac, rssi), None
+
+
+def _teltonika(parse, parser, data, mac, rssi, adv):
+    """Teltonika sends temperature and humidity in separate service data structures"""
+    if len(adv.service_data_list) == 2:
+        data = b"".join(adv.service_data_list)
+    return parse(parser, data, adv.local_name, mac, rssi), None
+
+
+def _altbeacon(parse, parser, data, mac, rssi, adv):
+    """AltBeacon"""
+    comp_id = (data[3] << 8) | data[2]
+    return parse(parser, data, comp_id, mac, rssi)
+
+
+def _thermopro(parse, parser, data, mac, rssi, adv):
+    """Thermopro uses the first 5 characters of the local name as device type"""
+    return parse(parser, data, adv.local_name[0:5], mac, rssi), None
+
+
+def _comp_id(data):
+    return (data[3] << 8) | data[2]
+
+
+# Tilt is routed by the iBeacon handler, after the check of the iBeacon route
+_TILT = Route("Tilt", _sensor("tilt"))
+
+# Service data routes, keyed on UUID16
+# (name, uuid16 list, lengths of the AD structure or None, extra check or None, target)
+SERVICE_DATA_ROUTES = [
+    # Environmental Sensing is used by ATC and b-parasite
+    ("ATC", [0x181A], [length for length in range(256) if length not in (20, 22)], None, _sensor("atc")),
+    ("b-parasite", [0x181A], [20, 22], None, _sensor("bparasite")),
+    ("Mi Scale", [0x181B, 0x181D], None, None, _sensor("miscale")),
+    ("BTHome V1", [0x181C, 0x181E], None, None, _handler("bthome", _bthome)),
+    ("Relsib", [0xAA20, 0xAA21, 0xAA22], None, lambda data, adv: adv.local_name == "ECo", _sensor("relsib")),
+    ("Jaalee", [0xF525], None, None, _sensor("jaalee")),
+    ("BTHome V2", [0xFCD2], None, None, _handler("bthome", _bthome)),
+    ("Switchbot", [0xFD3D, 0x0D00], None, None, _sensor("switchbot")),
+    ("HHCC", [0xFD50], None, None, _sensor("hhcc")),
+    ("Qingping", [0xFDCD, 0xFFF9], None, None, _sensor("qingping")),
+    ("Xiaomi", [0xFE95], None, None, _sensor("xiaomi")),
+    ("KKM", [0xFEAA], [19], None, _sensor("kkm")),
+    ("Ruuvitag (Eddystone)", [0xFEAA], range(23, 256), None, _sensor("ruuvitag")),
+    ("Amazfit", [0xFEE0], None, None, _sensor("amazfit")),
+    ("Teltonika", [0x2A6E, 0x2A6F], None, None, _handler("teltonika", _teltonika)),
+]
+
+# Manufacturer specific data routes, in order of priority
+# (name, key field, key list, data lengths (first byte of AD structure) or None, extra check or None, target)
+MANUFACTURER_DATA_ROUTES = [
+    # Filter on Company Identifier
+    ("Govee H5101/H5102/H5177", COMP_ID, [0x0001], [0x09, 0x0C, 0x22, 0x25], None, _sensor("govee")),
+    ("iBeacon", COMP_ID, [0x004C], None, lambda data, adv: data[4] == 0x02, _handler("ibeacon", _beacon)),
+    ("Oral-B", COMP_ID, [0x00DC], [0x0E], None, _sensor("oral_b")),
+    ("Ruuvitag", COMP_ID, [0x0499], None, None, _sensor("ruuvitag")),
+    ("Mikrotik", COMP_ID, [0x094F], [0x15], None, _sensor("mikrotik")),
+    ("Almendo", COMP_ID, [0x06E8], None, None, _sensor("almendo")),
+    ("Moat", COMP_ID, [0x1000], [0x15], None, _sensor("moat")),
+    ("BlueMaestro", COMP_ID, [0x0133], [0x11], None, _sensor("bluemaestro")),
+    ("SmartDry", COMP_ID, [0x01AE], [0x0F], None, _sensor("smartdry")),
+    ("Sensirion", COMP_ID, [0x06D5], None, None, _sensor_with_name("sensirion")),
+    ("Air Mentor", COMP_ID, [0x2111, 0x2112, 0x2121, 0x2122], [0x0B], None, _sensor("airmentor")),
+    ("Govee H5179", COMP_ID, [0x8801], [0x0C, 0x25], None, _sensor("govee")),
+    ("Brifit", COMP_ID, [0xAA55], [0x14], None, _sensor("brifit")),
+    (
+        "Govee H5051/H5071/H5072/H5075/H5074", COMP_ID, [0xEC88], [0x09, 0x0A, 0x0C, 0x22, 0x24, 0x25], None,
+        _sensor("govee"),
+    ),
+    ("Kegtron", COMP_ID, [0xFFFF], [0x1E], None, _sensor("kegtron")),
+    ("Laica", COMP_ID, [0xA0AC], [0x0F], lambda data, adv: data[14] in (0x06, 0x0D), _sensor("laica")),
+    # Filter on part of the UUID16
+    ("Xiaogui", BYTE_2, [0xC0], [0x10], None, _sensor("xiaogui")),
+    ("iNode", BYTE_3, [0x82], [0x0E], None, _sensor("inode")),
+    (
+        "iNode Care Sensors", BYTE_3, [0x91, 0x92, 0x93, 0x94, 0x95, 0x96, 0x9A, 0x9B, 0x9C, 0x9D], [0x19], None,
+        _sensor("inode"),
+    ),
+    # Filter on service class uuid16
+    ("Jinou", SERVICE_CLASS_UUID16, [0x20AA], [0x0E], None, _sensor("jinou")),
+    ("Govee H5182", SERVICE_CLASS_UUID16, [0x5182], [0x14, 0x2D], None, _sensor("govee")),
+    ("Govee H5183", SERVICE_CLASS_UUID16, [0x5183], [0x11, 0x2A], None, _sensor("govee")),
+    ("Govee H5185", SERVICE_CLASS_UUID16, [0x5185], [0x17, 0x30], None, _sensor("govee")),
+    (
+        "Thermoplus", SERVICE_CLASS_UUID16, [0xF0FF], [0x15, 0x17],
+        lambda data, adv: _comp_id(data) in (0x0010, 0x0011, 0x0015, 0x0018),
+        _sensor("thermoplus")
+    ),
+    (
+        "Inkbird", SERVICE_CLASS_UUID16, [0xF0FF], [0x0A, 0x0D, 0x0F, 0x13, 0x17],
+        lambda data, adv: _comp_id(data) in (0x0000, 0x0001) or adv.local_name in ("iBBQ", "xBBQ", "sps", "tps"),
+        _sensor_with_name("inkbird")
+    ),
+    # Other advertisements with service class uuid16 0xF0FF are not parsed any further
+    ("Unknown (0xF0FF)", SERVICE_CLASS_UUID16, [0xF0FF], None, None, (None, None, False)),
+    # Filter on service class uuid128
+    ("SensorPush", SERVICE_CLASS_UUID128, [SENSORPUSH_UUID128], [0x06, 0x08], None, _sensor("sensorpush")),
+    # Filter on complete local name
+    ("Inkbird IBS-TH", LOCAL_NAME, ["sps", "tps"], [0x0A], None, _sensor_with_name("inkbird")),
+    ("Thermopro", LOCAL_NAME_PREFIX, ["TP357", "TP359"], [0x07], None, _handler("thermopro", _thermopro)),
+    # Filter on other parts of the manufacturer specific data
+    ("AltBeacon", BEACON_CODE, [0xBEAC], [0x1B], None, _handler("altbeacon", _altbeacon)),
+    ("Acconeer", COMP_ID, [0xACC0], [0x12], None, _sensor("acconeer")),
+]
+
+
+def _man_key(field, data, adv):
+    """Return the value of a routing key field that is not extracted inline"""
+    if field == SERVICE_CLASS_UUID16:
+        return adv.service_class_uuid16
+    if field == SERVICE_CLASS_UUID128:
+        return adv.service_class_uuid128
+    if field == LOCAL_NAME:
+        return adv.local_name
+    if field == LOCAL_NAME_PREFIX:
+        return adv.local_name[0:5]
+    # BEACON_CODE
+    return (data[4] << 8) | data[5]
+
+
+class RoutingTable:
+    """Precompiled routing index for BLE advertisements.
+
+    Service data is indexed on UUID16. Manufacturer specific data is indexed on
+    the length of the AD structure, which gives an ordered list of probes
+    (key field + dict) that only contains the routes that can match that length.
+    """
+
+    def __init__(self, service_data_routes=None, manufacturer_data_routes=None):
+        if service_data_routes is None:
+            service_data_routes = SERVICE_DATA_ROUTES
+        if manufacturer_data_routes is None:
+            manufacturer_data_routes = MANUFACTURER_DATA_ROUTES
+
+        self.service_data = {}
+        for name, uuids, lengths, check, target in service_data_routes:
+            route = Route(name, target, check, lengths=None if lengths is None else frozenset(lengths))
+            for uuid16 in uuids:
+                self.service_data[uuid16] = self.service_data.get(uuid16, ()) + (route,)
+
+        routes = [
+            (
+                field,
+                tuple(keys),
+                None if lengths is None else frozenset(lengths),
+                Route(name, target, check, field, frozenset(keys))
+            )
+            for name, field, keys, lengths, check, target in manufacturer_data_routes
+        ]
+        probes_cache = {}
+        self.manufacturer_data = []
+        for data_len in range(256):
+            applicable = tuple(
+                (field, keys, route) for field, keys, lengths, route in routes
+                if lengths is None or data_len in lengths
+            )
+            if applicable not in probes_cache:
+                probes_cache[applicable] = _compile_probes(applicable)
+            self.manufacturer_data.append(probes_cache[applicable])
+
+    def match_service_data(self, data, adv):
+        """Return the route for a service data AD structure, or None"""
+        routes = self.service_data.get((data[3] << 8) | data[2])
+        if routes is not None:
+            for route in routes:
+                if (route.lengths is None or len(data) in route.lengths) and (
+                    route.check is None or route.check(data, adv)
+                ):
+                    return route
+        return None
+
+    def match_manufacturer_data(self, data, adv):
+        """Return the route for a manufacturer specific data AD structure, or None"""
+        for field, index in self.manufacturer_data[data[0]]:
+            # the common keys are extracted inline, adv is only read for the lengths that need it
+            if field == COMP_ID:
+                routes = index.get((data[3] << 8) | data[2])
+            elif field == BYTE_2:
+                routes = index.get(data[2])
+            elif field == BYTE_3:
+                routes = index.get(data[3])
+            elif field == SERVICE_CLASS_UUID16:
+                routes = index.get(adv.service_class_uuid16)
+            elif field == LOCAL_NAME:
+                routes = index.get(adv.local_name)
+            else:
+                routes = index.get(_man_key(field, data, adv))
+            if routes is not None:
+                for route in routes:
+                    if route.check is None or route.check(data, adv):
+                        return route if route.vendor is not None else None
+        return None
+
+
+def _compile_probes(applicable):
+    """Group consecutive routes with the same key field into one dict lookup"""
+    # routes without vendor only stop the routes after them, drop them at the end of the probes
+    applicable = list(applicable)
+    while applicable and applicable[-1][2].vendor is None:
+        applicable.pop()
+    probes = []
+    for field, keys, route in applicable:
+        if not probes or probes[-1][0] != field:
+            probes.append((field, {}))
+        index = probes[-1][1]
+        for key in keys:
+            index[key] = index.get(key, ()) + (route,)
+    return tuple(probes)
+
+
+_ROUTING_TABLE = None
+
+
+def get_routing_table():
+    """Return the shared routing table, compile it on first use"""
+    global _ROUTING_TABLE
+    if _ROUTING_TABLE is None:
+        _ROUTING_TABLE = RoutingTable()
+    return _ROUTING_TABLE
@@ -1,14 +1,19 @@
 """Parser for Govee BLE advertisements"""
 import logging
-from struct import unpack
+import re
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# re searches any bytes-like object in place, "in" doesn't search a memoryview for a subsequence
+INTELLI_ROCKS = re.compile(b"INTELLI_ROCKS")
+
 
 def decode_temps(packet_value: int) -> float:
     """Decode temperature values (to one decimal place)"""
@@ -35,7 +40,7 @@ def parse_govee(self, data, source_mac, rssi):
     """Parser for Govee sensors"""
     # The parser needs to handle the bug in the Govee BLE advertisement
     # data as INTELLI_ROCKS sometimes ends up glued on to the end of the message
-    if len(data) > 25 and b"INTELLI_ROCKS" in data:
+    if len(data) > 25 and INTELLI_ROCKS.search(data):
        data = data[:-25]
     msg_length = len(data)
     firmware = "Govee"
@@ -60,11 +65,11 @@ def parse_govee(self, data, source_mac, rssi):
         result.update({"temperature": temp, "humidity": humi, "battery": batt})
     elif msg_length == 11 and device_id == 0xEC88:
         device_type = "H5074"
-        (temp, humi, batt) = unpack("<hHB", data[5:10])
+        (temp, humi, batt) = unpack_from("<hHB", data, 5)
         result.update({"temperature": temp / 100, "humidity": humi / 100, "battery": batt})
     elif msg_length == 13 and device_id == 0xEC88:
         device_type = "H5051/H5071"
-        (temp, humi, batt) = unpack("<hHB", data[5:10])
+        (temp, humi, batt) = unpack_from("<hHB", data, 5)
         result.update({"temperature": temp / 100, "humidity": humi / 100, "battery": batt})
     elif msg_length == 13 and device_id == 0x0001:
         packet_5178 = data[7:10].hex()
@@ -90,22 +95,22 @@ def parse_govee(self, data, source_mac, rssi):
         else:
             _LOGGER.debug(
                 "Unknown sensor id for Govee H5178, please report to the developers, data: %s",
-                data.hex()
+                LazyHex(data)
             )
     elif msg_length == 13 and device_id == 0x8801:
         device_type = "H5179"
-        (temp, humi, batt) = unpack("<hHB", data[8:13])
+        (temp, humi, batt) = unpack_from("<hHB", data, 8)
         result.update({"temperature": temp / 100, "humidity": humi / 100, "battery": batt})
     elif msg_length == 18:
         device_type = "H5183"
-        (temp_probe_1, temp_alarm_1) = unpack(">hh", data[12:16])
+        (temp_probe_1, temp_alarm_1) = unpack_from(">hh", data, 12)
         result.update({
             "temperature probe 1": decode_temps_probes(temp_probe_1),
             "temperature alarm probe 1": decode_temps_probes(temp_alarm_1)
         })
     elif msg_length == 21:
         device_type = "H5182"
-        (temp_probe_1, temp_alarm_1, dummy, temp_probe_2, temp_alarm_2) = unpack(">hhbhh", data[12:21])
+        (temp_probe_1, temp_alarm_1, dummy, temp_probe_2, temp_alarm_2) = unpack_from(">hhbhh", data, 12)
         result.update({
             "temperature probe 1": decode_temps_probes(temp_probe_1),
             "temperature alarm probe 1": decode_temps_probes(temp_alarm_1),
@@ -114,7 +119,7 @@ def parse_govee(self, data, source_mac, rssi):
         })
     elif msg_length == 24:
         device_type = "H5185"
-        (temp_probe_1, temp_alarm_1, dummy, temp_probe_2, temp_alarm_2) = unpack(">hhhhh", data[12:22])
+        (temp_probe_1, temp_alarm_1, dummy, temp_probe_2, temp_alarm_2) = unpack_from(">hhhhh", data, 12)
         result.update({
             "temperature probe 1": decode_temps_probes(temp_probe_1),
             "temperature alarm probe 1": decode_temps_probes(temp_alarm_1),
@@ -126,14 +131,14 @@ def parse_govee(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Govee DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and govee_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(govee_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(govee_mac))
         return None
 
     result.update({
@@ -2,16 +2,73 @@
 from uuid import UUID
 
 
-def to_uuid(uuid: str) -> str:
+def to_uuid(uuid: bytes) -> str:
     """Return formatted UUID"""
-    return str(UUID(''.join(f'{i:02X}' for i in uuid)))
+    return str(UUID(bytes=bytes(uuid)))
 
 
-def to_mac(addr: str) -> str:
+def to_mac(addr: bytes) -> str:
     """Return formatted MAC address"""
-    return ':'.join(f'{i:02X}' for i in addr)
+    return addr.hex(":").upper()
 
 
-def to_unformatted_mac(addr: int):
+def to_unformatted_mac(addr: bytes) -> str:
     """Return unformatted MAC address"""
-    return ''.join(f'{i:02X}' for i in addr[:])
+    return addr.hex().upper()
+
+
+def normalize_id(value):
+    """Return a MAC address or UUID as bytes.
+
+    Accepts bytes-like objects and hex strings, with or without separators
+    (e.g. "A4:C1:38:02:83:F4" or "e2c56db5-dffb-48d2-b060-d0f5a71096e0").
+    """
+    if isinstance(value, str):
+        return bytes.fromhex(value.replace(":", "").replace("-", ""))
+    return bytes(value)
+
+
+def normalize_key(value):
+    """Return an encryption key as bytes, accepts bytes-like objects and hex strings"""
+    if isinstance(value, str):
+        return bytes.fromhex(value)
+    return bytes(value)
+
+
+class LazyHex:
+    """Hex string of a bytes-like object, built when a log message is formatted.
+
+    The arguments of a log call are evaluated for every advertisement, also when
+    the log level is disabled. Pass LazyHex(data) instead of data.hex() to only
+    convert the data when the message is actually logged.
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return self.data.hex()
+
+
+class LazyMac:
+    """Formatted MAC address, built when a log message is formatted (see LazyHex)"""
+    __slots__ = ("mac",)
+
+    def __init__(self, mac):
+        self.mac = mac
+
+    def __str__(self):
+        return to_mac(self.mac)
+
+
+class LazyStr:
+    """Result of func(*args), built when a log message is formatted (see LazyHex)"""
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self):
+        return str(self.func(*self.args))
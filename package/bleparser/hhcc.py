@@ -1,6 +1,6 @@
 """Parser for HHCC BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .const import (
     CONF_MAC,
@@ -16,7 +16,8 @@ from .const import (
     CONF_TEMPERATURE,
 )
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -28,13 +29,10 @@ def parse_hhcc(self, data: str, source_mac: bytes, rssi: float):
     if len(data) == 13:
         device_type = "HHCCJCY10"
         hhcc_mac = source_mac
-        xvalue_1 = data[4:7]
-        xvalue_2 = data[7:10]
-        xvalue_3 = data[10:13]
         packet_id = data[4:13].hex()
-        (moist, temp) = unpack(">BH", xvalue_1)
-        (illu,) = unpack(">i", b'\x00' + xvalue_2)
-        (batt, cond) = unpack(">BH", xvalue_3)
+        (moist, temp) = unpack_from(">BH", data, 4)
+        illu = int.from_bytes(data[7:10], "big")
+        (batt, cond) = unpack_from(">BH", data, 10)
         sensor_data = {
             CONF_TYPE: device_type,
             CONF_PACKET: packet_id,
@@ -53,30 +51,27 @@ def parse_hhcc(self, data: str, source_mac: bytes, rssi: float):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN HHCC DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # Check for duplicate messages
     if packet_id:
         print("packet_id is", packet_id)
-        try:
-            prev_packet = self.lpacket_ids[hhcc_mac]
-        except KeyError:
-            # start with empty first packet
-            prev_packet = None
+        devices, slot = self.devices.lookup(hhcc_mac)
+        prev_packet = devices.packet_ids[slot]
         if prev_packet == packet_id:
             # only process new messages
             if self.filter_duplicates is True:
                 return None
-        self.lpacket_ids[hhcc_mac] = packet_id
+        devices.packet_ids[slot] = packet_id
     else:
         packet_id = "no packet id"
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and hhcc_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(hhcc_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(hhcc_mac))
         return None
 
     return sensor_data
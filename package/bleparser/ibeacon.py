@@ -1,6 +1,6 @@
 """Parser for iBeacon BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 from typing import Final
 
 from .const import (
@@ -19,7 +19,8 @@ from .const import (
     CONF_CYPRESS_HUMIDITY,
 )
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_uuid,
     to_unformatted_mac,
 )
@@ -32,8 +33,8 @@ DEVICE_TYPE: Final = "iBeacon"
 def parse_ibeacon(self, data: str, source_mac: str, rssi: float):
     """Parse iBeacon advertisements"""
     if data[5] == 0x15 and len(data) >= 27:
-        uuid = data[6:22]
-        (major, minor, power) = unpack(">HHb", data[22:27])
+        uuid = bytes(data[6:22])
+        (major, minor, power) = unpack_from(">HHb", data, 22)
 
         tracker_data = {
             CONF_RSSI: rssi,
@@ -62,8 +63,8 @@ def parse_ibeacon(self, data: str, source_mac: str, rssi: float):
                 "BLE ADV from UNKNOWN %s DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 DEVICE_TYPE,
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None, None
 
@@ -1,9 +1,10 @@
 """Parser for Inkbird BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -26,8 +27,7 @@ def parse_inkbird(self, data, complete_local_name, source_mac, rssi):
     result = {"firmware": firmware}
     if msg_length == 11 and complete_local_name in ["sps", "tps"]:
         inkbird_mac = source_mac
-        xvalue = data[2:10]
-        (temp, hum, probe, modbus, bat) = unpack("<hHBHB", xvalue[0:8])
+        (temp, hum, probe, modbus, bat) = unpack_from("<hHBHB", data, 2)
 
         if probe == 0:
             result.update({"temperature": temp / 100})
@@ -40,7 +40,7 @@ def parse_inkbird(self, data, complete_local_name, source_mac, rssi):
             _LOGGER.error(
                 "Inkbird is reporting different probe number. Please report the "
                 "following data to the developers. data: %s ",
-                data.hex()
+                LazyHex(data)
             )
             return None
 
@@ -56,14 +56,13 @@ def parse_inkbird(self, data, complete_local_name, source_mac, rssi):
     elif msg_length == 14:
         device_type = "iBBQ-1"
         inkbird_mac = data[6:12]
-        xvalue = data[12:14]
         if source_mac not in [inkbird_mac, inkbird_mac[::-1]]:
             _LOGGER.debug(
                 "Inkbird MAC address doesn't match data MAC address. Data: %s",
-                data.hex()
+                LazyHex(data)
             )
             return None
-        (temp_1,) = unpack("<h", xvalue)
+        (temp_1,) = unpack_from("<h", data, 12)
         result.update(
             {
                 "temperature probe 1": convert_temperature(temp_1),
@@ -72,14 +71,13 @@ def parse_inkbird(self, data, complete_local_name, source_mac, rssi):
     elif msg_length == 16:
         device_type = "iBBQ-2"
         inkbird_mac = data[6:12]
-        xvalue = data[12:16]
         if source_mac not in [inkbird_mac, inkbird_mac[::-1]]:
             _LOGGER.debug(
                 "Inkbird MAC address doesn't match data MAC address. Data: %s",
-                data.hex()
+                LazyHex(data)
             )
             return None
-        (temp_1, temp_2) = unpack("<HH", xvalue)
+        (temp_1, temp_2) = unpack_from("<HH", data, 12)
         result.update(
             {
                 "temperature probe 1": convert_temperature(temp_1),
@@ -88,15 +86,14 @@ def parse_inkbird(self, data, complete_local_name, source_mac, rssi):
         )
     elif msg_length == 20:
         inkbird_mac = data[6:12]
-        xvalue = data[12:20]
         if source_mac not in [inkbird_mac, inkbird_mac[::-1]]:
             _LOGGER.debug(
                 "Inkbird MAC address doesn't match data MAC address. Data: %s",
-                data.hex()
+                LazyHex(data)
             )
             return None
         device_type = "iBBQ-4"
-        (temp_1, temp_2, temp_3, temp_4) = unpack("<hhhh", xvalue)
+        (temp_1, temp_2, temp_3, temp_4) = unpack_from("<hhhh", data, 12)
         result.update(
             {
                 "temperature probe 1": convert_temperature(temp_1),
@@ -107,12 +104,11 @@ def parse_inkbird(self, data, complete_local_name, source_mac, rssi):
         )
     elif msg_length == 24:
         inkbird_mac = data[6:12]
-        xvalue = data[12:24]
         if source_mac not in [inkbird_mac, inkbird_mac[::-1]]:
-            _LOGGER.debug("Inkbird MAC address doesn't match data MAC address. Data: %s", data.hex())
+            _LOGGER.debug("Inkbird MAC address doesn't match data MAC address. Data: %s", LazyHex(data))
             return None
         device_type = "iBBQ-6"
-        (temp_1, temp_2, temp_3, temp_4, temp_5, temp_6) = unpack("<hhhhhh", xvalue)
+        (temp_1, temp_2, temp_3, temp_4, temp_5, temp_6) = unpack_from("<hhhhhh", data, 12)
         result.update(
             {
                 "temperature probe 1": convert_temperature(temp_1),
@@ -128,14 +124,14 @@ def parse_inkbird(self, data, complete_local_name, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Inkbird DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and source_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(source_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(source_mac))
         return None
 
     result.update({
@@ -1,10 +1,11 @@
 """Parser for iNode BLE advertisements"""
 import logging
 import math
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -50,12 +51,11 @@ def parse_inode(self, data, source_mac, rssi):
     firmware = "iNode"
     inode_mac = source_mac
     device_id = data[3]
-    xvalue = data[4:]
     result = {"firmware": firmware}
     # Advertisement structure information https://docs.google.com/document/d/1hcBpZ1RSgHRL6wu4SlTq2bvtKSL5_sFjXMu_HRyWZiQ
     if msg_length == 15 and device_id == 0x82:
         # iNode Energy Meter
-        (raw_avg, raw_sum, options, battery_light, week_day_data) = unpack("<HIHBH", xvalue)
+        (raw_avg, raw_sum, options, battery_light, week_day_data) = unpack_from("<HIHBH", data, 4)
         # Average of previous minute (avg) and sum (sum)
         unit = (options >> 14) & 3
         constant = options & 0x3FFF
@@ -115,7 +115,7 @@ def parse_inode(self, data, source_mac, rssi):
             raw_time1,
             raw_time2,
             signature
-        ) = unpack("<HHHHHHHQ", xvalue)
+        ) = unpack_from("<HHHHHHHQ", data, 4)
 
         if "temperature" in measurements:
             if device_id in [0x91, 0x94, 0x95, 0x96]:
@@ -203,28 +203,25 @@ def parse_inode(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN iNode DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
     device_type = INODE_CARE_SENSORS_IDS[device_id]
 
     # Check for duplicate messages
-    packet_id = xvalue.hex()
-    try:
-        prev_packet = self.lpacket_ids[inode_mac]
-    except KeyError:
-        # start with empty first packet
-        prev_packet = None
+    packet_id = data[4:].hex()
+    devices, slot = self.devices.lookup(inode_mac)
+    prev_packet = devices.packet_ids[slot]
     if prev_packet == packet_id:
         # only process new messages
         if self.filter_duplicates is True:
             return None
-    self.lpacket_ids[inode_mac] = packet_id
+    devices.packet_ids[slot] = packet_id
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and inode_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(inode_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(inode_mac))
         return None
 
     result.update({
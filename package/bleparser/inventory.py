@@ -0,0 +1,141 @@
+"""Inventory of the whitelisted devices and encryption keys"""
+import json
+
+from .helpers import normalize_id, normalize_key  # noqa: F401
+from .keystore import KeyStore
+
+
+class DeviceInventory:
+    """Immutable index with the whitelists and encryption keys of the parser.
+
+    The MAC addresses, iBeacon/AltBeacon UUIDs and keys are normalised to bytes
+    once, when the inventory is created. The whitelists are frozensets, so a
+    membership check doesn't depend on the number of devices. An inventory is
+    never modified, a new inventory is created instead and swapped in as a
+    whole with BleParser.set_inventory(). The keys are kept in a KeyStore, which
+    can be passed as aeskeys to share it between inventories and to change the
+    keys without replacing the inventory.
+    """
+    __slots__ = (
+        "sensor_whitelist",
+        "tracker_whitelist",
+        "report_unknown_whitelist",
+        "aeskeys",
+    )
+
+    def __init__(
+        self,
+        sensor_whitelist=(),
+        tracker_whitelist=(),
+        report_unknown_whitelist=(),
+        aeskeys=None,
+    ):
+        self.sensor_whitelist = frozenset(normalize_id(mac) for mac in sensor_whitelist or ())
+        self.tracker_whitelist = frozenset(normalize_id(mac) for mac in tracker_whitelist or ())
+        self.report_unknown_whitelist = frozenset(
+            normalize_id(mac) for mac in report_unknown_whitelist or ()
+        )
+        if not isinstance(aeskeys, KeyStore):
+            aeskeys = KeyStore(aeskeys)
+        self.aeskeys = aeskeys
+
+    def __repr__(self):
+        return (
+            f"DeviceInventory(sensors={len(self.sensor_whitelist)}, "
+            f"trackers={len(self.tracker_whitelist)}, "
+            f"report_unknown={len(self.report_unknown_whitelist)}, "
+            f"aeskeys={len(self.aeskeys)})"
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create an inventory from a dictionary.
+
+        The dictionary has the same keys as the arguments of the inventory
+        ("sensor_whitelist", "tracker_whitelist", "report_unknown_whitelist" and
+        "aeskeys"), all keys are optional.
+        """
+        unknown = set(data) - set(cls.__slots__)
+        if unknown:
+            raise ValueError(f"Unknown inventory keys: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    @classmethod
+    def from_file(cls, path):
+        """Create an inventory from a JSON file with the format of from_dict"""
+        with open(path, encoding="utf-8") as inventory_file:
+            return cls.from_dict(json.load(inventory_file))
+
+    def replace(self, **changes):
+        """Return a new inventory with some of the whitelists or keys replaced"""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data.update(changes)
+        return DeviceInventory(**data)
+
+
+class Whitelist(frozenset):
+    """Whitelist of a parser, a frozenset that can be updated like a list or set.
+
+    The updates normalise the MAC addresses and UUIDs and swap in a new
+    inventory with the changed whitelist, as an assignment to the whitelist
+    of the parser does. The whitelist object itself never changes: read the
+    whitelist from the parser again to see the update.
+    """
+    __slots__ = ("_parser", "_name")
+
+    def __new__(cls, macs, parser, name):
+        whitelist = super().__new__(cls, macs)
+        whitelist._parser = parser
+        whitelist._name = name
+        return whitelist
+
+    def __reduce__(self):
+        return frozenset, (frozenset(self),)
+
+    def _replace(self, macs):
+        """Swap in a new inventory of the parser with the whitelist replaced by macs"""
+        parser = self._parser
+        parser.set_inventory(parser.inventory.replace(**{self._name: macs}))
+
+    def _current(self):
+        """Return the whitelist in the current inventory of the parser"""
+        return getattr(self._parser.inventory, self._name)
+
+    def add(self, mac):
+        """Add a MAC address or UUID to the whitelist"""
+        self.update([mac])
+
+    def append(self, mac):
+        """Add a MAC address or UUID to the whitelist, as with the lists of earlier versions"""
+        self.update([mac])
+
+    def extend(self, macs):
+        """Add MAC addresses and UUIDs to the whitelist, as with the lists of earlier versions"""
+        self.update(macs)
+
+    def update(self, macs):
+        """Add MAC addresses and UUIDs to the whitelist"""
+        macs = {normalize_id(mac) for mac in macs}
+        current = self._current()
+        if not macs <= current:
+            self._replace(current | macs)
+
+    def remove(self, mac):
+        """Remove a MAC address or UUID from the whitelist, raise KeyError if it isn't whitelisted"""
+        mac = normalize_id(mac)
+        current = self._current()
+        if mac not in current:
+            raise KeyError(mac)
+        self._replace(current - {mac})
+
+    def discard(self, mac):
+        """Remove a MAC address or UUID from the whitelist if it is whitelisted"""
+        mac = normalize_id(mac)
+        current = self._current()
+        if mac in current:
+            self._replace(current - {mac})
+
+    def clear(self):
+        """Remove all MAC addresses and UUIDs from the whitelist"""
+        if self._current():
+            self._replace(())
@@ -1,9 +1,10 @@
 """Parser for Jaalee BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -18,12 +19,11 @@ def parse_jaalee(self, data, source_mac, rssi):
     if msg_length == 15:
         device_type = "JHT"
         batt = data[4]
-        jaalee_mac_reversed = data[5:11]
-        jaalee_mac = jaalee_mac_reversed[::-1]
+        jaalee_mac = bytes(data[10:4:-1])
         if jaalee_mac != source_mac:
-            _LOGGER.debug("Jaalee MAC address doesn't match data MAC address. Data: %s", data.hex())
+            _LOGGER.debug("Jaalee MAC address doesn't match data MAC address. Data: %s", LazyHex(data))
             return None
-        (temp, humi) = unpack(">HH", data[11:])
+        (temp, humi) = unpack_from(">HH", data, 11)
         temp = round(0.0026821682 * temp - 46.873, 2)
         humi = round(0.0019213762 * humi - 6.332, 2)
 
@@ -39,14 +39,14 @@ def parse_jaalee(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Jaalee DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and jaalee_mac.lower() not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(jaalee_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(jaalee_mac))
         return None
 
     result.update({
@@ -1,9 +1,10 @@
 """Parser for Kegtron BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -30,15 +31,13 @@ def parse_kegtron(self, data, source_mac, rssi):
     if msg_length == 31:
         firmware = "Kegtron"
         kegtron_mac = source_mac
-        (device_id,) = unpack(">B", data[10:11])
+        device_id = data[10]
         if device_id & (1 << 6):
             device_type = "Kegtron KT-200"
         else:
             device_type = "Kegtron KT-100"
 
-        xvalue = data[4:]
-
-        (keg_size, vol_start, vol_disp, port, port_name) = unpack(">HHHB20s", xvalue)
+        (keg_size, vol_start, vol_disp, port, port_name) = unpack_from(">HHHB20s", data, 4)
 
         if keg_size in KEGTRON_SIZE_DICT:
             keg_size = KEGTRON_SIZE_DICT[keg_size]
@@ -80,7 +79,7 @@ def parse_kegtron(self, data, source_mac, rssi):
 
         # check for MAC presence in sensor whitelist, if needed
         if self.discovery is False and kegtron_mac not in self.sensor_whitelist:
-            _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(kegtron_mac))
+            _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(kegtron_mac))
             return None
 
         result.update({
@@ -96,7 +95,7 @@ def parse_kegtron(self, data, source_mac, rssi):
         if self.report_unknown == "Kegtron":
             _LOGGER.debug(
                 "UNKNOWN dataobject from Kegtron DEVICE: MAC: %s, ADV: %s",
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
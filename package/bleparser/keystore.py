@@ -0,0 +1,269 @@
+"""Store with the encryption keys of the devices"""
+from collections.abc import Mapping
+import csv
+import json
+import logging
+import struct
+import threading
+from types import MappingProxyType
+import weakref
+
+from .helpers import normalize_id, normalize_key, to_mac
+
+_LOGGER = logging.getLogger(__name__)
+
+# 16 byte keys, or 12 byte keys of MiBeacon v2/v3 devices
+KEY_LENGTHS = (16, 12)
+
+# Shared memory layout: header (magic, number of keys) and a record per key
+SHM_MAGIC = b"BLEK"
+SHM_HEADER = struct.Struct("<4sI")
+SHM_RECORD = struct.Struct("<6sB16s")
+
+
+def validate_key(mac, key):
+    """Return the MAC address and key as bytes, raise ValueError for an invalid key"""
+    try:
+        mac = normalize_id(mac)
+        key = normalize_key(key)
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"Invalid MAC address or encryption key for {mac!r}: {error}") from error
+    if len(mac) != 6:
+        raise ValueError(f"Invalid MAC address {mac.hex()}")
+    if len(key) not in KEY_LENGTHS:
+        raise ValueError(
+            f"Encryption key of {to_mac(mac)} should be 16 bytes (32 characters) "
+            "or 12 bytes (24 characters) long"
+        )
+    return mac, key
+
+
+def validate_keys(keys, strict=True):
+    """Return the valid MAC address and key pairs of a dictionary as bytes.
+
+    An invalid key raises ValueError, unless strict is False: then invalid keys
+    are logged and skipped.
+    """
+    valid_keys = []
+    for mac, key in keys.items():
+        try:
+            valid_keys.append(validate_key(mac, key))
+        except ValueError as error:
+            if strict:
+                raise
+            _LOGGER.error("Skipping encryption key: %s", error)
+    return valid_keys
+
+
+def _attach_shared_memory(name):
+    """Attach to an existing shared memory block, without tracking it in this process"""
+    # pylint: disable=import-outside-toplevel
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers attached blocks with the resource tracker too.
+        # Processes started by multiprocessing share the resource tracker of the
+        # process that created the block, so the registration is harmless.
+        return shared_memory.SharedMemory(name=name)
+
+
+class KeyStore(Mapping):
+    """Encryption keys, keyed on MAC address (bytes).
+
+    The MAC addresses and keys are validated and normalised to bytes once, when
+    they are added, so the vendor parsers can use them as they are. The keys are
+    kept in a dictionary that is never modified: every change builds a new
+    dictionary and swaps it in with a single assignment, so parsers always see
+    either the old or the new keys. Changes are made one at a time, so changes
+    from several threads are not lost. A reload from file only replaces the
+    keys when all keys in the file are valid. The keys that a store is created
+    with are checked leniently by default: invalid keys are logged and skipped,
+    so one malformed entry doesn't stop the parser from starting.
+
+    Parsers subscribe to the store and are notified with the MAC addresses that
+    changed, to drop the cipher state of the old keys. A store can be shared
+    read-only with worker processes through shared memory, see share() and
+    from_shared_memory().
+    """
+
+    def __init__(self, keys=None, strict=False):
+        self.read_only = False
+        self._keys = MappingProxyType({})
+        self._listeners = []
+        self._lock = threading.RLock()
+        if keys:
+            self.update(keys, strict)
+
+    def __getitem__(self, mac):
+        return self._keys[mac]
+
+    def __setitem__(self, mac, key):
+        # keys[mac] = key, as with the dictionary of keys of earlier versions
+        self.add(mac, key)
+
+    def __delitem__(self, mac):
+        self.remove(mac)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, mac):
+        return mac in self._keys
+
+    def __repr__(self):
+        return f"KeyStore(keys={len(self._keys)}, read_only={self.read_only})"
+
+    def get(self, mac, default=None):
+        """Return the key of a device, or default"""
+        return self._keys.get(mac, default)
+
+    def add(self, mac, key):
+        """Add or replace the key of a device"""
+        self.update({mac: key})
+
+    def remove(self, mac):
+        """Remove the key of a device, raise KeyError for an unknown device"""
+        mac = normalize_id(mac)
+        with self._lock:
+            if mac not in self._keys:
+                raise KeyError(mac)
+            keys = dict(self._keys)
+            del keys[mac]
+            self._swap(keys)
+
+    def update(self, keys, strict=True):
+        """Add or replace the keys of a dictionary with MAC address and key pairs.
+
+        An invalid key raises ValueError and no keys are added, unless strict is
+        False: then invalid keys are logged and skipped.
+        """
+        keys = validate_keys(keys, strict)
+        with self._lock:
+            new_keys = dict(self._keys)
+            new_keys.update(keys)
+            self._swap(new_keys)
+
+    def replace(self, keys):
+        """Replace all keys by the keys of a dictionary with MAC address and key pairs"""
+        keys = dict(validate_keys(keys))
+        with self._lock:
+            self._swap(keys)
+
+    def load(self, path):
+        """Replace all keys by the keys in a JSON or CSV file, see read_file"""
+        self.replace(self.read_file(path))
+
+    @classmethod
+    def from_file(cls, path, strict=False):
+        """Create a key store from a JSON or CSV file, see read_file"""
+        return cls(cls.read_file(path), strict)
+
+    @staticmethod
+    def read_file(path):
+        """Return a dictionary with the keys in a JSON or CSV file.
+
+        A JSON file has an object with MAC address and key pairs. A CSV file has a
+        MAC address and key per row, with an optional "mac,key" header. Files with
+        a .csv extension are read as CSV, other files as JSON.
+        """
+        with open(path, encoding="utf-8", newline="") as key_file:
+            if str(path).lower().endswith(".csv"):
+                rows = [row for row in csv.reader(key_file) if row]
+                if rows and [field.strip().lower() for field in rows[0]] == ["mac", "key"]:
+                    rows = rows[1:]
+                return {mac.strip(): key.strip() for mac, key in rows}
+            return json.load(key_file)
+
+    def _swap(self, keys):
+        """Swap in new keys and notify the subscribers of the changed devices"""
+        if self.read_only:
+            raise TypeError("The keys of a key store from shared memory can't be changed")
+        old_keys = self._keys
+        self._keys = MappingProxyType(keys)
+        changes = {
+            mac: old_keys.get(mac) for mac in old_keys.keys() | keys.keys()
+            if old_keys.get(mac) != keys.get(mac)
+        }
+        if changes:
+            self._notify(changes)
+
+    def subscribe(self, callback):
+        """Call callback with a {mac: old key} dictionary when keys change.
+
+        Bound methods are referenced weakly, so a parser that subscribes to a
+        store can still be garbage collected.
+        """
+        try:
+            ref = weakref.WeakMethod(callback)
+        except TypeError:
+            ref = lambda: callback  # noqa: E731
+        with self._lock:
+            self._listeners.append(ref)
+
+    def unsubscribe(self, callback):
+        """Stop calling callback when keys change"""
+        with self._lock:
+            self._listeners = [ref for ref in self._listeners if ref() not in (None, callback)]
+
+    def _notify(self, changes):
+        """Call the subscribers, and remove the garbage collected ones"""
+        listeners = []
+        for ref in self._listeners:
+            callback = ref()
+            if callback is not None:
+                listeners.append(ref)
+                callback(changes)
+        self._listeners = listeners
+
+    def share(self):
+        """Copy the keys to a new shared memory block and return it.
+
+        Pass the name of the block to from_shared_memory() in the worker processes.
+        The caller owns the block and has to close() and unlink() it when the
+        workers are done. The block is a snapshot: later changes of the store are
+        not copied to it. After a change, share the store again and replace the
+        key stores of the workers with stores from the new block.
+        """
+        # pylint: disable=import-outside-toplevel
+        from multiprocessing import shared_memory
+
+        keys = self._keys
+        shm = shared_memory.SharedMemory(
+            create=True, size=SHM_HEADER.size + SHM_RECORD.size * max(len(keys), 1)
+        )
+        SHM_HEADER.pack_into(shm.buf, 0, SHM_MAGIC, len(keys))
+        offset = SHM_HEADER.size
+        for mac, key in keys.items():
+            SHM_RECORD.pack_into(shm.buf, offset, mac, len(key), key)
+            offset += SHM_RECORD.size
+        return shm
+
+    @classmethod
+    def from_shared_memory(cls, name):
+        """Return a read-only key store with a copy of the keys in a shared memory block.
+
+        The keys are copied once, so the store doesn't follow later changes of
+        the store that shared them, see share(). The keys were validated by that
+        store, so they are not validated again.
+        """
+        shm = _attach_shared_memory(name)
+        try:
+            magic, count = SHM_HEADER.unpack_from(shm.buf, 0)
+            if magic != SHM_MAGIC:
+                raise ValueError(f"Shared memory block {name} doesn't contain encryption keys")
+            keys = {}
+            for mac, key_length, key in SHM_RECORD.iter_unpack(
+                shm.buf[SHM_HEADER.size:SHM_HEADER.size + SHM_RECORD.size * count]
+            ):
+                keys[mac] = key[:key_length]
+        finally:
+            shm.close()
+        store = cls()
+        store._keys = MappingProxyType(keys)
+        store.read_only = True
+        return store
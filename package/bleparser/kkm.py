@@ -1,9 +1,10 @@
 """Parser for KKM beacon BLE advertisements"""
 import logging
 import math
-from struct import unpack
+from struct import unpack_from
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -22,8 +23,8 @@ def parse_kkm(self, data, source_mac, rssi):
     }
     if len(data) == 19:
         # K6 Sensor Beacon
-        (frame_type, version, control_byte, volt, temp, temp_frac, humi, humi_frac, accx, accy, accz) = unpack(
-            ">BBBHbBBBhhh", data[4:19]
+        (frame_type, version, control_byte, volt, temp, temp_frac, humi, humi_frac, accx, accy, accz) = unpack_from(
+            ">BBBHbBBBhhh", data, 4
         )
         if frame_type == 0x21 and version == 1:
             if temp < 0:
@@ -54,8 +55,8 @@ def parse_kkm(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN KKM DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex(),
+                LazyMac(source_mac),
+                LazyHex(data),
             )
         return None
     # reformat battery info to match BLE monitor format
@@ -75,7 +76,7 @@ def parse_kkm(self, data, source_mac, rssi):
         result["battery"] = round(batt, 1)
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and kkm_mac.lower() not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(kkm_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(kkm_mac))
         return None
 
     return result
@@ -34,8 +34,6 @@ def read_impedance(data):
 
 def parse_laica(self, data, source_mac, rssi):
     """Parser for Laica sensors"""
-    xvalue = data[4:]
-
     result = {
         "type": "Laica Smart Scale",
         "firmware": "Laica",
@@ -58,17 +56,14 @@ def parse_laica(self, data, source_mac, rssi):
         })
 
     # Check for duplicate messages
-    packet_id = xvalue.hex()
-    try:
-        prev_packet = self.lpacket_ids[source_mac]
-    except KeyError:
-        # start with empty first packet
-        prev_packet = None
+    packet_id = data[4:].hex()
+    devices, slot = self.devices.lookup(source_mac)
+    prev_packet = devices.packet_ids[slot]
     if prev_packet == packet_id:
         # only process new messages
         if self.filter_duplicates is True:
             return None
-    self.lpacket_ids[source_mac] = packet_id
+    devices.packet_ids[slot] = packet_id
 
     result.update({
         "packet": packet_id,
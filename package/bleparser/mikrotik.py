@@ -1,9 +1,9 @@
 """Parser for Mikrotik BLE advertisements"""
 import logging
 import math
-from struct import unpack
+from struct import unpack_from
 
-from .helpers import to_mac, to_unformatted_mac
+from .helpers import LazyHex, LazyMac, to_unformatted_mac
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,7 +19,6 @@ def parse_mikrotik(self, data, source_mac, rssi):
     firmware = "Mikrotik"
     result = {"firmware": firmware}
     if msg_length == 22:
-        xvalue = data[4:]
         (
             version,
             user_data,
@@ -31,7 +30,7 @@ def parse_mikrotik(self, data, source_mac, rssi):
             uptime,
             flags,
             batt
-        ) = unpack("<BBHBBBBBBBbIBB", xvalue)
+        ) = unpack_from("<BBHBBBBBBBbIBB", data, 4)
 
         # Check if the device uses encryption
         is_encrypted = user_data & 1
@@ -39,7 +38,7 @@ def parse_mikrotik(self, data, source_mac, rssi):
             _LOGGER.info(
                 "Mikrotik device with MAC address %s uses encryption, which is not supported (yet)"
                 "Disable encryption if you want to use this device in Home Assistant",
-                to_mac(source_mac),
+                LazyMac(source_mac),
             )
             return None
 
@@ -90,14 +89,14 @@ def parse_mikrotik(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Mikrotik DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and source_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(source_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(source_mac))
         return None
 
     result.update({
@@ -1,9 +1,10 @@
 """Parser for Xiaomi Mi Scale BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -17,8 +18,7 @@ def parse_miscale(self, data, source_mac, rssi):
 
     if msg_length == 14 and uuid16 == 0x181D:  # Mi Scale V1
         device_type = "Mi Scale V1"
-        xvalue = data[4:]
-        (control_byte, weight) = unpack("<BH7x", xvalue)
+        (control_byte, weight) = unpack_from("<BH7x", data, 4)
 
         has_impedance = False
         is_stabilized = control_byte & (1 << 5)
@@ -36,8 +36,7 @@ def parse_miscale(self, data, source_mac, rssi):
 
     elif msg_length == 17 and uuid16 == 0x181B:  # Mi Scale V2
         device_type = "Mi Scale V2"
-        xvalue = data[4:]
-        (measunit, control_byte, impedance, weight) = unpack("<BB7xHH", xvalue)
+        (measunit, control_byte, impedance, weight) = unpack_from("<BB7xHH", data, 4)
         has_impedance = control_byte & (1 << 1)
         is_stabilized = control_byte & (1 << 5)
         weight_removed = control_byte & (1 << 7)
@@ -65,8 +64,8 @@ def parse_miscale(self, data, source_mac, rssi):
         if self.report_unknown == "Mi Scale":
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Mi Scale DEVICE: MAC: %s, ADV: %s",
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
@@ -93,17 +92,14 @@ def parse_miscale(self, data, source_mac, rssi):
     miscale_mac = source_mac
 
     # Check for duplicate messages
-    packet_id = xvalue.hex()
-    try:
-        prev_packet = self.lpacket_ids[miscale_mac]
-    except KeyError:
-        # start with empty first packet
-        prev_packet = None
+    packet_id = data[4:].hex()
+    devices, slot = self.devices.lookup(miscale_mac)
+    prev_packet = devices.packet_ids[slot]
     if prev_packet == packet_id:
         # only process new messages
         if self.filter_duplicates is True:
             return None
-    self.lpacket_ids[miscale_mac] = packet_id
+    devices.packet_ids[slot] = packet_id
     if prev_packet is None:
         if self.filter_duplicates is True:
             # ignore first message after a restart
@@ -111,7 +107,7 @@ def parse_miscale(self, data, source_mac, rssi):
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and miscale_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(miscale_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(miscale_mac))
         return None
 
     result.update({
@@ -1,9 +1,10 @@
 """Parser for Moat BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -19,7 +20,7 @@ def parse_moat(self, data, source_mac, rssi):
     result = {"firmware": firmware}
     if msg_length == 22 and device_id == 0x1000:
         device_type = "Moat S2"
-        (temp, humi, volt) = unpack("<HHH", data[14:20])
+        (temp, humi, volt) = unpack_from("<HHH", data, 14)
         temperature = -46.85 + 175.72 * temp / 65536.0
         humidity = -6.0 + 125.0 * humi / 65536.0
         voltage = volt / 1000
@@ -46,14 +47,14 @@ def parse_moat(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Moat DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in whitelist, if needed
     if self.discovery is False and moat_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(moat_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(moat_mac))
         return None
 
     result.update({
@@ -1,9 +1,10 @@
 """Parser for Oral-B BLE advertisements."""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -38,8 +39,8 @@ def parse_oral_b(self, data, source_mac, rssi):
     oral_b_mac = source_mac
     result = {"firmware": firmware}
     if msg_length == 15:
-        (state, pressure, counter, mode, sector, sector_timer, no_of_sectors) = unpack(
-            ">BBHBBBB", data[7:15]
+        (state, pressure, counter, mode, sector, sector_timer, no_of_sectors) = unpack_from(
+            ">BBHBBBB", data, 7
         )
 
         if state == 3:
@@ -98,14 +99,14 @@ def parse_oral_b(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Oral-B DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in whitelist, if needed
     if self.discovery is False and oral_b_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(oral_b_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(oral_b_mac))
         return None
 
     result.update({
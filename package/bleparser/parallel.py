@@ -0,0 +1,273 @@
+"""Parsing of HCI events in worker processes, sharded by MAC address"""
+import gc
+from itertools import count, islice
+import multiprocessing
+import queue
+
+from .advertisement import LE_EXTENDED_ADVERTISING_REPORT
+from .crypto import CcmCipher
+from .dispatch import get_routing_table, load_parsers
+from .registry import mac_stripe
+
+# Seconds between the checks that the worker processes are still alive
+WORKER_POLL_INTERVAL = 1.0
+
+
+def event_mac(data):
+    """Return the MAC address of the (first) report of an HCI event, or None"""
+    if len(data) < 14:
+        return None
+    if data[3] == LE_EXTENDED_ADVERTISING_REPORT:
+        return bytes(data[8:14][::-1])
+    return bytes(data[7:13][::-1])
+
+
+def preload_tables(freeze=True):
+    """Import and build the shared tables of the parser, e.g. before forking worker processes.
+
+    Imports all vendor modules with their tables (MANUFACTURER_DICT, TILT_TYPES,
+    XIAOMI_DEVICES, the BTHome MEAS_DECODERS, ...), compiles the routing table
+    and loads pycryptodome (when installed). Forked workers share these pages
+    with the parent instead of each building their own copy.
+
+    With freeze, the garbage collector is run and all objects that are left are
+    moved to its permanent generation (gc.freeze). The collections in the
+    workers then don't write to the GC headers of the tables, which would copy
+    their pages into each worker. Objects that are frozen are never collected
+    in this process either, so preload once, right before starting the workers.
+    """
+    load_parsers()
+    get_routing_table()
+    try:
+        # loads the AES library and the ECB mode module
+        CcmCipher(bytes(16))
+    except ImportError:
+        pass
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+
+def _worker(parser_kwargs, tasks, results):
+    """Parse the chunks of one shard with a BleParser of its own, until None is received"""
+    # pylint: disable=import-outside-toplevel
+    from . import BleParser
+
+    parse_raw_data = BleParser(**parser_kwargs).parse_raw_data
+    # results that are not read anymore when the parser is closed don't keep the worker alive
+    results.cancel_join_thread()
+    for run, window, positions, events in iter(tasks.get, None):
+        parsed = []
+        errors = {}
+        for position, data in zip(positions, events):
+            try:
+                parsed.append(parse_raw_data(data))
+            except Exception as error:  # pylint: disable=broad-except
+                parsed.append(None)
+                errors[position] = error
+        results.put((run, window, positions, parsed, errors))
+
+
+class ParallelBleParser:
+    """Parse HCI events in worker processes, each with its own BleParser.
+
+    Events are sharded by MAC address: all events of a device go to the same
+    worker, in input order, so each worker owns the duplicate filtering and
+    advertisement priority state of its devices, and the results are the same
+    as with a single BleParser. The workers are created with the same keyword
+    arguments as BleParser (keys, whitelists, ...), the keys are copied to the
+    workers when they start.
+
+    The input is split in windows of chunk_size events, with a chunk per worker.
+    At most prefetch windows are in progress, so an iterator of events is read
+    as the results are used. imap yields the results in input order,
+    imap_unordered as soon as the chunk of a worker is parsed.
+
+    With preload, the tables of the parser are built and frozen with
+    preload_tables() before the workers are started, with the "fork" start
+    method (when mp_context isn't given), so the workers share them with this
+    process.
+
+    An exception of a vendor parser is raised again when the result of that
+    event is yielded. Use it as a context manager, or call close() to stop the
+    workers. A ParallelBleParser should only be used from one thread.
+    """
+
+    def __init__(
+        self, workers=None, chunk_size=256, prefetch=None, mp_context=None, preload=False, **parser_kwargs
+    ):  # pylint: disable=too-many-arguments
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if workers < 1:
+            raise ValueError("workers should be at least 1")
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.prefetch = 2 * workers if prefetch is None else prefetch
+        if parser_kwargs.get("inventory") is not None:
+            inventory = parser_kwargs.pop("inventory")
+            parser_kwargs.update(
+                sensor_whitelist=list(inventory.sensor_whitelist),
+                tracker_whitelist=list(inventory.tracker_whitelist),
+                report_unknown_whitelist=list(inventory.report_unknown_whitelist),
+                aeskeys=inventory.aeskeys,
+            )
+        if parser_kwargs.get("aeskeys") is not None:
+            # a KeyStore can't be pickled, the workers get a copy of the keys
+            parser_kwargs["aeskeys"] = dict(parser_kwargs["aeskeys"])
+        self.parser_kwargs = parser_kwargs
+
+        if preload:
+            if mp_context is None and "fork" in multiprocessing.get_all_start_methods():
+                mp_context = "fork"
+            preload_tables()
+        if mp_context is None or isinstance(mp_context, str):
+            mp_context = multiprocessing.get_context(mp_context)
+        self._results = mp_context.Queue()
+        self._tasks = [mp_context.Queue() for _ in range(workers)]
+        self._processes = [
+            mp_context.Process(
+                target=_worker,
+                args=(parser_kwargs, tasks, self._results),
+                name=f"bleparser-worker-{index}",
+                daemon=True,
+            )
+            for index, tasks in enumerate(self._tasks)
+        ]
+        for process in self._processes:
+            process.start()
+        self._run = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def shard(self, data):
+        """Return the worker of an HCI event"""
+        mac = event_mac(data)
+        return 0 if mac is None else mac_stripe(mac, self.workers)
+
+    def _chunks(self, events):
+        """Send the chunks of each window to the workers, yield (window, start, events, chunks) of the window"""
+        self._run += 1
+        run = self._run
+        events = iter(events)
+        shard = self.shard
+        tasks = self._tasks
+        start = 0
+        for window in count():
+            window_events = list(islice(events, self.chunk_size))
+            if not window_events:
+                return
+            chunks = {}
+            for position, data in enumerate(window_events, start):
+                data = bytes(data)
+                worker = shard(data)
+                chunk = chunks.get(worker)
+                if chunk is None:
+                    chunk = chunks[worker] = ([], [])
+                chunk[0].append(position)
+                chunk[1].append(data)
+            for worker, (positions, chunk_events) in chunks.items():
+                tasks[worker].put((run, window, positions, chunk_events))
+            yield window, start, len(window_events), len(chunks)
+            start += len(window_events)
+
+    def _receive(self):
+        """Return the next chunk result of the current run"""
+        while True:
+            try:
+                run, window, positions, parsed, errors = self._results.get(timeout=WORKER_POLL_INTERVAL)
+            except queue.Empty:
+                if not all(process.is_alive() for process in self._processes):
+                    raise RuntimeError("A bleparser worker process has stopped") from None
+                continue
+            # results of an earlier run that was not read to the end are dropped
+            if run == self._run:
+                return window, positions, parsed, errors
+
+    def imap_unordered(self, events):
+        """Yield an (index, (sensor_msg, tracker_msg)) tuple for each event, in the order they are parsed"""
+        # window -> number of chunks to receive
+        pending = {}
+        for window, start, size, chunks in self._chunks(events):
+            pending[window] = chunks
+            while len(pending) >= self.prefetch:
+                yield from self._receive_unordered(pending)
+        while pending:
+            yield from self._receive_unordered(pending)
+
+    def _receive_unordered(self, pending):
+        """Yield the results of the next chunk"""
+        window, positions, parsed, errors = self._receive()
+        pending[window] -= 1
+        if not pending[window]:
+            del pending[window]
+        for position, result in zip(positions, parsed):
+            if position in errors:
+                raise errors[position]
+            yield position, result
+
+    def imap(self, events):
+        """Yield a (sensor_msg, tracker_msg) tuple for each event, in the order of the events"""
+        # window -> [start, number of chunks to receive, results, errors]
+        pending = {}
+        next_window = 0
+        for window, start, size, chunks in self._chunks(events):
+            pending[window] = [start, chunks, [None] * size, {}]
+            next_window = yield from self._ordered_results(pending, next_window, self.prefetch)
+        yield from self._ordered_results(pending, next_window, 1)
+
+    def _ordered_results(self, pending, next_window, limit):
+        """Yield the results of the parsed windows in order, until fewer than limit windows are pending.
+
+        Returns the next window to yield.
+        """
+        while pending and (len(pending) >= limit or not pending[next_window][1]):
+            entry = pending[next_window]
+            if entry[1]:
+                self._receive_ordered(pending)
+            else:
+                del pending[next_window]
+                next_window += 1
+                yield from self._window_results(entry)
+        return next_window
+
+    def _receive_ordered(self, pending):
+        """Store the results of the next chunk in its window"""
+        window, positions, parsed, errors = self._receive()
+        entry = pending[window]
+        start, results = entry[0], entry[2]
+        for position, result in zip(positions, parsed):
+            results[position - start] = result
+        entry[1] -= 1
+        entry[3].update(errors)
+
+    @staticmethod
+    def _window_results(entry):
+        """Yield the results of a window, raise the exception of a failed event"""
+        start, chunks, results, errors = entry
+        for index, result in enumerate(results, start):
+            if index in errors:
+                raise errors[index]
+            yield result
+
+    def parse_raw_batch(self, events):
+        """Parse a batch of raw HCI events, see BleParser.parse_raw_batch"""
+        return list(self.imap(events))
+
+    def close(self):
+        """Stop the worker processes"""
+        if not self._processes:
+            return
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(WORKER_POLL_INTERVAL * 10)
+            if process.is_alive():
+                process.terminate()
+        for tasks in self._tasks:
+            tasks.close()
+        self._results.close()
+        self._processes = []
@@ -1,9 +1,10 @@
 """Parser for Cleargrass or Qingping BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -34,8 +35,7 @@ def parse_qingping(self, data, source_mac, rssi):
         if device_type == "CGDN1":
             qingping_mac = source_mac
         else:
-            qingping_mac_reversed = data[6:12]
-            qingping_mac = qingping_mac_reversed[::-1]
+            qingping_mac = bytes(data[11:5:-1])
 
         result = {
             "rssi": rssi,
@@ -47,17 +47,17 @@ def parse_qingping(self, data, source_mac, rssi):
             xdata_size = data[xdata_point - 1]
             if xdata_point + xdata_size <= msg_length:
                 if xdata_id == 0x01 and xdata_size == 4:
-                    (temp, humi) = unpack("<hH", data[xdata_point:xdata_point + xdata_size])
+                    (temp, humi) = unpack_from("<hH", data, xdata_point)
                     result.update({"temperature": temp / 10, "humidity": humi / 10})
                 elif xdata_id == 0x02 and xdata_size == 1:
                     batt = data[xdata_point]
                     result.update({"battery": batt})
                 elif xdata_id == 0x07 and xdata_size == 2:
-                    (pres,) = unpack("<H", data[xdata_point:xdata_point + xdata_size])
+                    (pres,) = unpack_from("<H", data, xdata_point)
                     result.update({"pressure": pres / 10})
                 elif xdata_id == 0x08 and xdata_size == 4:
-                    (motion, illuminance_1, illuminance_2) = unpack(
-                        "<BHB", data[xdata_point:xdata_point + xdata_size]
+                    (motion, illuminance_1, illuminance_2) = unpack_from(
+                        "<BHB", data, xdata_point
                     )
                     result.update({
                         "motion": motion,
@@ -66,16 +66,16 @@ def parse_qingping(self, data, source_mac, rssi):
                     if motion:
                         result.update({"motion timer": 1})
                 elif xdata_id == 0x09 and xdata_size == 4:
-                    (illuminance,) = unpack("<I", data[xdata_point:xdata_point + xdata_size])
+                    (illuminance,) = unpack_from("<I", data, xdata_point)
                     result.update({"illuminance": illuminance})
                 elif xdata_id == 0x11 and xdata_size == 1:
                     light = data[xdata_point]
                     result.update({"light": light})
                 elif xdata_id == 0x12 and xdata_size == 4:
-                    (pm2_5, pm10) = unpack("<HH", data[xdata_point:xdata_point + xdata_size])
+                    (pm2_5, pm10) = unpack_from("<HH", data, xdata_point)
                     result.update({"pm2.5": pm2_5, "pm10": pm10})
                 elif xdata_id == 0x13 and xdata_size == 2:
-                    (co2,) = unpack("<H", data[xdata_point:xdata_point + xdata_size])
+                    (co2,) = unpack_from("<H", data, xdata_point)
                     result.update({"co2": co2})
                 elif xdata_id == 0x0F and xdata_size == 1:
                     packet_id = data[xdata_point]
@@ -83,7 +83,7 @@ def parse_qingping(self, data, source_mac, rssi):
                 else:
                     _LOGGER.debug(
                         "Unknown data received from Qingping device: %s",
-                        data[xdata_point - 2:].hex()
+                        LazyHex(data[xdata_point - 2:])
                     )
             xdata_point += xdata_size + 2
     else:
@@ -93,8 +93,8 @@ def parse_qingping(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Qingping DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
@@ -105,7 +105,7 @@ def parse_qingping(self, data, source_mac, rssi):
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and qingping_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(qingping_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(qingping_mac))
         return None
 
     result.update({
@@ -0,0 +1,410 @@
+"""Struct-of-arrays registry with the state of each device"""
+from array import array
+from collections import OrderedDict
+import threading
+import time
+
+# Whitelist flags of a device
+FLAG_SENSOR_WHITELIST = 1
+FLAG_TRACKER_WHITELIST = 2
+FLAG_REPORT_UNKNOWN_WHITELIST = 4
+# The flags have to be resolved (again)
+FLAG_UNRESOLVED = 128
+
+# Value of an integer column for a device without a value
+MISSING = -(2 ** 63)
+
+
+def mac_to_int(mac):
+    """Return the MAC address as 48-bit integer, raise ValueError if it isn't 6 bytes long"""
+    if len(mac) != 6:
+        # a shorter key would get the integer of another MAC address, a longer one doesn't fit
+        raise ValueError(f"MAC address should be 6 bytes long: {mac!r}")
+    return int.from_bytes(mac, "big")
+
+
+def int_to_mac(value):
+    """Return the 48-bit integer as MAC address (bytes)"""
+    return value.to_bytes(6, "big")
+
+
+def mac_stripe(mac, stripes):
+    """Return the stripe (0 to stripes - 1) of a device, for lock striping and sharding"""
+    return int.from_bytes(mac, "big") % stripes
+
+
+class DeviceRegistry:
+    """Registry with the state of each device, keyed on MAC address.
+
+    Each device gets a slot, found with a single lookup of the MAC address as
+    48-bit integer. The state of the devices is stored in columns, indexed on
+    slot: the last packet id, advertisement priority, movement counter, last
+    encryption counter, last seen time and whitelist flags. A device only gets a
+    slot when its state is written, so advertisements of other devices (noise)
+    don't take slots or evict the state of the sensors.
+
+    The registry is bounded: when maxsize is exceeded, the least recently used
+    device is evicted. With ttl (in seconds), devices that haven't been seen for
+    ttl seconds are removed as well. A device that is evicted is handled like a
+    device that is seen for the first time.
+
+    The whitelist flags are resolved with resolver, a function that returns the
+    flags of a MAC address, when they are first used and after refresh().
+
+    The vendor parsers look up the slot of a device once per advertisement with
+    lookup() and read and write the columns directly. The keys are MAC
+    addresses of 6 bytes, other keys raise ValueError.
+    """
+
+    def __init__(self, maxsize=65536, ttl=None, clock=time.monotonic, resolver=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self.expirations = 0
+        self._clock = clock
+        self._resolver = resolver
+        # mac (int) -> slot, ordered from least to most recently used
+        self._slots = OrderedDict()
+        self._free = []
+        self._last_mac = None
+        self._last_slot = -1
+
+        # columns, indexed on slot
+        self.macs = self._column("q")
+        self.packet_ids = []
+        self.adv_priority = self._column("q")
+        self.movements = self._column("q")
+        self.counters = self._column("q")
+        self.last_seen = self._column("d")
+        self.flags = self._column("B")
+
+    @staticmethod
+    def _column(typecode):
+        """Return an empty column for values of an array typecode"""
+        return array(typecode)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __iter__(self):
+        """Iterate over the MAC addresses, from least to most recently used"""
+        return (int_to_mac(mac) for mac in list(self._slots))
+
+    def slots(self):
+        """Return a list with (mac, slot) tuples, from least to most recently used"""
+        return [(int_to_mac(mac), slot) for mac, slot in self._slots.items()]
+
+    def find(self, mac):
+        """Return the slot of a device, or -1 for an unknown device"""
+        if mac == self._last_mac:
+            slot = self._last_slot
+        else:
+            mac_int = mac_to_int(mac)
+            slot = self._slots.get(mac_int, -1)
+            if slot < 0:
+                return -1
+            self._slots.move_to_end(mac_int)
+            self._last_mac = mac
+            self._last_slot = slot
+        if self.ttl is not None:
+            now = self._clock()
+            if now - self.last_seen[slot] > self.ttl:
+                self._release(slot)
+                self.expirations += 1
+                return -1
+            self.last_seen[slot] = now
+        return slot
+
+    # the methods are also called as _find, _slot and _resolve within the registry,
+    # so LockedDeviceRegistry doesn't take its lock again
+    _find = find
+
+    def lookup(self, mac):
+        """Return (registry, slot) of a device, add the device if it is unknown.
+
+        registry has the columns of the slot: the registry itself, or the stripe
+        of the device in a StripedDeviceRegistry.
+        """
+        if mac == self._last_mac and self.ttl is None:
+            return self, self._last_slot
+        return self, self._slot(mac)
+
+    def slot(self, mac):
+        """Return the slot of a device, add the device if it is unknown"""
+        slot = self._find(mac)
+        if slot >= 0:
+            return slot
+        now = self._clock()
+        if self.ttl is not None:
+            self._expire(now)
+        if self.maxsize is not None:
+            while self._slots and len(self._slots) >= self.maxsize:
+                self._release(next(iter(self._slots.values())))
+                self.evictions += 1
+        mac_int = mac_to_int(mac)
+        if self._free:
+            slot = self._free.pop()
+            self.macs[slot] = mac_int
+            self.packet_ids[slot] = None
+            self.adv_priority[slot] = MISSING
+            self.movements[slot] = MISSING
+            self.counters[slot] = MISSING
+            self.last_seen[slot] = now
+            self.flags[slot] = FLAG_UNRESOLVED
+        else:
+            slot = len(self.macs)
+            self.macs.append(mac_int)
+            self.packet_ids.append(None)
+            self.adv_priority.append(MISSING)
+            self.movements.append(MISSING)
+            self.counters.append(MISSING)
+            self.last_seen.append(now)
+            self.flags.append(FLAG_UNRESOLVED)
+        self._slots[mac_int] = slot
+        self._last_mac = mac
+        self._last_slot = slot
+        return slot
+
+    _slot = slot
+
+    def _release(self, slot):
+        """Remove the device in a slot"""
+        del self._slots[self.macs[slot]]
+        self.packet_ids[slot] = None
+        self._free.append(slot)
+        if slot == self._last_slot:
+            self._last_mac = None
+            self._last_slot = -1
+
+    def _expire(self, now):
+        """Remove the idle devices, these are at the start of the registry"""
+        slots = self._slots
+        last_seen = self.last_seen
+        ttl = self.ttl
+        while slots:
+            slot = next(iter(slots.values()))
+            if now - last_seen[slot] <= ttl:
+                break
+            self._release(slot)
+            self.expirations += 1
+
+    def remove(self, mac):
+        """Remove a device, raise KeyError for an unknown device"""
+        slot = self._find(mac)
+        if slot < 0:
+            raise KeyError(mac)
+        self._release(slot)
+
+    def resolve(self, slot):
+        """Return the whitelist flags of the device in a slot, resolve them if needed"""
+        flags = self.flags[slot]
+        if flags & FLAG_UNRESOLVED:
+            flags = 0 if self._resolver is None else self._resolver(int_to_mac(self.macs[slot]))
+            self.flags[slot] = flags
+        return flags
+
+    _resolve = resolve
+
+    def device_flags(self, mac):
+        """Return the whitelist flags of a device, without adding an unknown device"""
+        slot = self._find(mac)
+        if slot >= 0:
+            return self._resolve(slot)
+        return 0 if self._resolver is None else self._resolver(mac)
+
+    def refresh(self, macs=None):
+        """Resolve the whitelist flags again on next use.
+
+        With macs, only the devices with these MAC addresses are resolved again.
+        """
+        if macs is not None:
+            for mac in macs:
+                slot = self._slots.get(mac_to_int(mac), -1)
+                if slot >= 0:
+                    self.flags[slot] = FLAG_UNRESOLVED
+            return
+        for slot in self._slots.values():
+            self.flags[slot] = FLAG_UNRESOLVED
+
+    def clear(self):
+        """Remove all devices and reset the counters"""
+        for slot in list(self._slots.values()):
+            self._release(slot)
+        self.evictions = 0
+        self.expirations = 0
+
+    def info(self):
+        """Return the registry statistics"""
+        return {
+            "size": len(self._slots),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class LockedDeviceRegistry(DeviceRegistry):
+    """DeviceRegistry that can be used from several threads.
+
+    The slots, the free list and the last used device are shared by all
+    devices, so every registry operation holds the lock. The lock is only held for
+    the lookup or update of the registry itself. The vendor parsers read and
+    write the columns of the slot from lookup() without the lock, so the columns
+    are lists: a list item can be written while another thread appends a slot,
+    also on Python builds without GIL, unlike an array that is resized. A slot
+    is only reused after its device is evicted, the least recently used device
+    of maxsize devices, so not while the advertisement that looked it up is
+    parsed, unless maxsize other devices are added in the meantime.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.lock = threading.RLock()
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def _column(typecode):
+        return []
+
+    def __len__(self):
+        with self.lock:
+            return len(self._slots)
+
+    def __iter__(self):
+        with self.lock:
+            return iter([int_to_mac(mac) for mac in self._slots])
+
+    def slots(self):
+        with self.lock:
+            return super().slots()
+
+    def find(self, mac):
+        with self.lock:
+            return self._find(mac)
+
+    def slot(self, mac):
+        with self.lock:
+            return self._slot(mac)
+
+    def lookup(self, mac):
+        with self.lock:
+            return self, self._slot(mac)
+
+    def remove(self, mac):
+        with self.lock:
+            super().remove(mac)
+
+    def resolve(self, slot):
+        with self.lock:
+            return self._resolve(slot)
+
+    def device_flags(self, mac):
+        with self.lock:
+            return super().device_flags(mac)
+
+    def refresh(self, macs=None):
+        with self.lock:
+            super().refresh(macs)
+
+    def clear(self):
+        with self.lock:
+            super().clear()
+
+    def info(self):
+        with self.lock:
+            return super().info()
+
+
+class StripedDeviceRegistry:
+    """Device registry for the thread safe mode of BleParser.
+
+    A single LockedDeviceRegistry is locked for every state access of every
+    device, so all parser threads wait for the same lock. This registry is split
+    in a LockedDeviceRegistry per stripe, by MAC address (see mac_stripe), each
+    with a lock of its own, so threads that parse different devices rarely wait
+    for each other. The lock of a stripe is only held for the operation on the
+    stripe, and no other lock is taken while it is held. Vendor parsers also
+    keep state for the MAC address in the payload, which can be in another
+    stripe than the device lock that is held, so the device locks can't be used
+    for this without the risk of a deadlock.
+
+    maxsize is split over the stripes, when a stripe is full the least recently
+    used device of that stripe is evicted.
+    """
+
+    def __init__(self, maxsize=65536, ttl=None, clock=time.monotonic, resolver=None, stripes=64):
+        if stripes < 1:
+            raise ValueError("stripes should be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        stripe_size = None if maxsize is None else -(-maxsize // stripes)
+        self.stripes = [LockedDeviceRegistry(stripe_size, ttl, clock, resolver) for _ in range(stripes)]
+
+    def __len__(self):
+        return sum(len(stripe) for stripe in self.stripes)
+
+    def __iter__(self):
+        """Iterate over the MAC addresses, per stripe from least to most recently used"""
+        return (mac for stripe in self.stripes for mac in stripe)
+
+    def stripe(self, mac):
+        """Return the LockedDeviceRegistry with the state of a device"""
+        return self.stripes[mac_stripe(mac, len(self.stripes))]
+
+    def lookup(self, mac):
+        """Return (stripe, slot) of a device, add the device if it is unknown"""
+        return self.stripes[mac_stripe(mac, len(self.stripes))].lookup(mac)
+
+    def remove(self, mac):
+        """Remove a device, raise KeyError for an unknown device"""
+        self.stripe(mac).remove(mac)
+
+    def device_flags(self, mac):
+        """Return the whitelist flags of a device, without adding an unknown device"""
+        return self.stripe(mac).device_flags(mac)
+
+    def refresh(self, macs=None):
+        """Resolve the whitelist flags again on next use, see DeviceRegistry.refresh"""
+        if macs is None:
+            for stripe in self.stripes:
+                stripe.refresh()
+            return
+        for mac in macs:
+            self.stripe(mac).refresh([mac])
+
+    def clear(self):
+        """Remove all devices and reset the counters"""
+        for stripe in self.stripes:
+            stripe.clear()
+
+    def info(self):
+        """Return the registry statistics, summed over the stripes"""
+        infos = [stripe.info() for stripe in self.stripes]
+        return {
+            "size": sum(info["size"] for info in infos),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "evictions": sum(info["evictions"] for info in infos),
+            "expirations": sum(info["expirations"] for info in infos),
+        }
+
+
+class StripedLock:
+    """Locks for the devices, striped by MAC address.
+
+    A device always gets the same lock of stripes locks, so the advertisements
+    of a device are parsed one at a time, while threads that parse different
+    devices rarely share a lock. The locks are reentrant.
+    """
+
+    def __init__(self, stripes=64):
+        if stripes < 1:
+            raise ValueError("stripes should be at least 1")
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def __len__(self):
+        return len(self._locks)
+
+    def lock(self, mac):
+        """Return the lock of a device"""
+        return self._locks[mac_stripe(mac, len(self._locks))]
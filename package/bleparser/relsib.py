@@ -1,9 +1,10 @@
 """Parser for Relsib EClerk-Eco-RHTC BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -30,7 +31,7 @@ def parse_relsib(self, data, source_mac, rssi):
         # Device is sending placeholder when sensor is not ready
         nan = 0x8000
 
-        (temp, humi, co2) = unpack("<HHH", data[xdata_point:xdata_point + 6])
+        (temp, humi, co2) = unpack_from("<HHH", data, xdata_point)
         if temp != nan:
             result.update({"temperature": temp / 100})
         if humi != nan:
@@ -54,14 +55,14 @@ def parse_relsib(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Relsib DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and relsib_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(relsib_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(relsib_mac))
         return None
 
     result.update({
@@ -2,12 +2,14 @@
 import base64
 import logging
 import math
-from struct import unpack
+from struct import unpack, unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
+from .registry import MISSING
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -66,8 +68,8 @@ def parse_ruuvitag(self, data, source_mac, rssi):
             version = data[4]
             if version == 3:
                 # Ruuvitag V3 format
-                (version, humi, temp, frac, pres, accx, accy, accz, volt) = unpack(
-                    ">BBbBHhhhH", data[4:18]
+                (version, humi, temp, frac, pres, accx, accy, accz, volt) = unpack_from(
+                    ">BBbBHhhhH", data, 4
                 )
 
                 # See https://github.com/ttu/ruuvitag-sensor/blob/master/ruuvitag_sensor/decoder.py
@@ -101,36 +103,30 @@ def parse_ruuvitag(self, data, source_mac, rssi):
                 )
             elif version == 5:
                 # Ruuvitag V5 format
-                (version, temp, humi, pres, accx, accy, accz, power, move_cnt, packet_id) = unpack(
-                    ">BhHHhhhHBH", data[4:22]
+                (version, temp, humi, pres, accx, accy, accz, power, move_cnt, packet_id) = unpack_from(
+                    ">BhHHhhhHBH", data, 4
                 )
 
                 # Check for duplicate messages
-                try:
-                    prev_packet = self.lpacket_ids[ruuvitag_mac]
-                except KeyError:
-                    # start with empty first packet
-                    prev_packet = None
+                devices, slot = self.devices.lookup(ruuvitag_mac)
+                prev_packet = devices.packet_ids[slot]
                 if prev_packet == packet_id:
                     if self.filter_duplicates is True:
                         # only process new messages
                         return None
-                self.lpacket_ids[ruuvitag_mac] = packet_id
+                devices.packet_ids[slot] = packet_id
                 if prev_packet is None:
                     if self.filter_duplicates is True:
                         # ignore first message after a restart
                         return None
                 # Check for an increased movement counter
-                try:
-                    prev_movement = self.movements_list[ruuvitag_mac]
-                except KeyError:
-                    # start with empty movement first
-                    prev_movement = None
-                if prev_movement == move_cnt or prev_movement is None:
+                prev_movement = devices.movements[slot]
+                if prev_movement == move_cnt or prev_movement == MISSING:
+                    # no movement or no movement counter yet
                     motion = 0
                 else:
                     motion = 1
-                self.movements_list[ruuvitag_mac] = move_cnt
+                devices.movements[slot] = move_cnt
 
                 result.update(
                     {
@@ -177,8 +173,8 @@ def parse_ruuvitag(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Ruuvitag DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex(),
+                LazyMac(source_mac),
+                LazyHex(data),
             )
         return None
     # reformat battery info to match BLE monitor format
@@ -198,12 +194,12 @@ def parse_ruuvitag(self, data, source_mac, rssi):
         result["battery"] = round(batt, 1)
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and ruuvitag_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(ruuvitag_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(ruuvitag_mac))
         return None
     if version < 5:
         _LOGGER.info(
             "Firmware version %i is outdated, consider updating your ruuvitag with MAC: %s to view all sensors",
             version,
-            to_mac(ruuvitag_mac),
+            LazyMac(ruuvitag_mac),
         )
     return result
@@ -2,7 +2,8 @@
 import logging
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -28,15 +29,15 @@ def parse_sensirion(self, data, complete_local_name, source_mac, rssi):
                 "BLE ADV from UNKNOWN Sensirion DEVICE: %s RSSI: %s, MAC: %s, ADV: %s",
                 device_type,
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and source_mac not in self.sensor_whitelist:
         _LOGGER.debug(
-            "Discovery is disabled. MAC: %s is not whitelisted!", to_mac(source_mac))
+            "Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(source_mac))
         return None
 
     # not all of the following values are used yet, but this explains the full protocol
@@ -1,9 +1,10 @@
 """Parser for SmartDry BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -17,8 +18,7 @@ def parse_smartdry(self, data, source_mac, rssi):
     if msg_length == 16:
         device_type = "SmartDry cloth dryer"
         firmware = "SmartDry"
-        xvalue = data[4:16]
-        (temp, humi, shake, volt) = unpack("<ffHH", xvalue)
+        (temp, humi, shake, volt) = unpack_from("<ffHH", data, 4)
         if data[15] == 0:
             wake = False
         elif data[15] == 6:
@@ -61,14 +61,14 @@ def parse_smartdry(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN SmartDry DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and smartdry_mac.lower() not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(smartdry_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(smartdry_mac))
         return None
 
     result.update({
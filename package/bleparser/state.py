@@ -0,0 +1,150 @@
+"""Per-device state for the vendor parsers"""
+from .registry import MISSING, mac_stripe
+
+
+def _missing(column):
+    """Return the value of a registry column for a device without a value"""
+    return None if column == "packet_ids" else MISSING
+
+
+class DeviceStateStore:
+    """Dictionary-like view on a column of a DeviceRegistry, keyed on MAC address.
+
+    Used for the last packet ids, advertisement priorities and movement counters
+    of the devices (ble_parser.lpacket_ids, ...), for code outside the vendor
+    parsers. Each item access looks up the device in the registry, the vendor
+    parsers look up the slot of a device once with DeviceRegistry.lookup and
+    access the columns directly. The size cap and the eviction of idle devices
+    are handled by the registry.
+    """
+
+    def __init__(self, registry, column):
+        self.registry = registry
+        self._column = getattr(registry, column)
+        self._missing = _missing(column)
+
+    def __len__(self):
+        return len(self.items())
+
+    def __iter__(self):
+        return iter([mac for mac, value in self.items()])
+
+    def __contains__(self, mac):
+        try:
+            self[mac]
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, mac):
+        slot = self.registry.find(mac)
+        if slot < 0:
+            raise KeyError(mac)
+        value = self._column[slot]
+        if value == self._missing:
+            raise KeyError(mac)
+        return value
+
+    def __setitem__(self, mac, value):
+        self._column[self.registry.slot(mac)] = value
+
+    def __delitem__(self, mac):
+        slot = self.registry.find(mac)
+        if slot < 0 or self._column[slot] == self._missing:
+            raise KeyError(mac)
+        self._column[slot] = self._missing
+
+    def get(self, mac, default=None):
+        """Return the state of a device, or default"""
+        try:
+            return self[mac]
+        except KeyError:
+            return default
+
+    def items(self):
+        """Return a list with (mac, state) tuples, without refreshing the devices"""
+        column = self._column
+        missing = self._missing
+        return [(mac, column[slot]) for mac, slot in self.registry.slots() if column[slot] != missing]
+
+    def info(self):
+        """Return the statistics of the registry"""
+        return self.registry.info()
+
+
+class LockedDeviceStateStore(DeviceStateStore):
+    """DeviceStateStore on a LockedDeviceRegistry, for the thread safe mode of the parser.
+
+    The slot lookup and the column access are done under the registry lock in one
+    go, so the slot can't be reused by another device in between, and a column
+    isn't written while another thread resizes it.
+    """
+    # pylint: disable=protected-access
+
+    def __getitem__(self, mac):
+        registry = self.registry
+        with registry.lock:
+            slot = registry._find(mac)
+            value = self._column[slot] if slot >= 0 else self._missing
+        if value == self._missing:
+            raise KeyError(mac)
+        return value
+
+    def __setitem__(self, mac, value):
+        registry = self.registry
+        with registry.lock:
+            self._column[registry._slot(mac)] = value
+
+    def __delitem__(self, mac):
+        with self.registry.lock:
+            super().__delitem__(mac)
+
+    def items(self):
+        with self.registry.lock:
+            return super().items()
+
+
+class StripedDeviceStateStore(DeviceStateStore):
+    """DeviceStateStore on a StripedDeviceRegistry, for the thread safe mode of the parser.
+
+    The state of a device is read and written under the lock of its stripe of
+    the registry only, like LockedDeviceStateStore does with the lock of a
+    LockedDeviceRegistry.
+    """
+    # pylint: disable=protected-access
+
+    def __init__(self, registry, column):  # pylint: disable=super-init-not-called
+        self.registry = registry
+        # (registry, column) of each stripe
+        self._stripes = [(stripe, getattr(stripe, column)) for stripe in registry.stripes]
+        self._missing = _missing(column)
+
+    def __getitem__(self, mac):
+        stripe, column = self._stripes[mac_stripe(mac, len(self._stripes))]
+        with stripe.lock:
+            slot = stripe._find(mac)
+            value = column[slot] if slot >= 0 else self._missing
+        if value == self._missing:
+            raise KeyError(mac)
+        return value
+
+    def __setitem__(self, mac, value):
+        stripe, column = self._stripes[mac_stripe(mac, len(self._stripes))]
+        with stripe.lock:
+            column[stripe._slot(mac)] = value
+
+    def __delitem__(self, mac):
+        stripe, column = self._stripes[mac_stripe(mac, len(self._stripes))]
+        with stripe.lock:
+            slot = stripe._find(mac)
+            if slot < 0 or column[slot] == self._missing:
+                raise KeyError(mac)
+            column[slot] = self._missing
+
+    def items(self):
+        missing = self._missing
+        items = []
+        for stripe, column in self._stripes:
+            with stripe.lock:
+                items.extend((mac, column[slot]) for mac, slot in stripe.slots() if column[slot] != missing)
+        return items
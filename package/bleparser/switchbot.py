@@ -1,9 +1,10 @@
 """Parser for Switchbot BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -17,8 +18,7 @@ def parse_switchbot(self, data, source_mac, rssi):
     device_id = data[4]
 
     if msg_length == 10 and device_id in [0x54, 0x69]:
-        xvalue = data[6:10]
-        (batt, temp_frac, temp_int, humi) = unpack("<BBBB", xvalue)
+        (batt, temp_frac, temp_int, humi) = unpack_from("<BBBB", data, 6)
         batt = (batt & 127)
 
         temp_sign = temp_int & 128
@@ -48,14 +48,14 @@ def parse_switchbot(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Switchbot DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and switchbot_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(switchbot_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(switchbot_mac))
         return None
 
     result.update({
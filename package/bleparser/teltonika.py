@@ -3,7 +3,8 @@ import logging
 from struct import unpack
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -54,15 +55,15 @@ def parse_teltonika(self, data, complete_local_name, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Teltonika DEVICE: RSSI: %s, MAC: %s, DEVICE TYPE: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
+                LazyMac(source_mac),
                 device_type,
-                data.hex()
+                LazyHex(data)
             )
         return None
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and teltonika_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(teltonika_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(teltonika_mac))
         return None
 
     result.update({
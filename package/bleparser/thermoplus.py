@@ -1,9 +1,10 @@
 # Parser for Thermoplus BLE advertisements
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -23,11 +24,10 @@ def parse_thermoplus(self, data, source_mac, rssi):
             device_type = None
         firmware = "Thermoplus"
 
-        thermoplus_mac_reversed = data[6:12]
-        thermoplus_mac = thermoplus_mac_reversed[::-1]
+        thermoplus_mac = bytes(data[11:5:-1])
+
+        (volt, temp, humi) = unpack_from("<HhH", data, 12)
 
-        xvalue = data[12:18]
-        (volt, temp, humi) = unpack("<HhH", xvalue)
         if volt >= 3000:
             batt = 100
         elif volt >= 2600:
@@ -51,8 +51,8 @@ def parse_thermoplus(self, data, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Thermoplus DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
@@ -63,7 +63,7 @@ def parse_thermoplus(self, data, source_mac, rssi):
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and thermoplus_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(thermoplus_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(thermoplus_mac))
         return None
 
     result.update({
@@ -1,9 +1,10 @@
 """Parser for Thermopro BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -16,8 +17,8 @@ def parse_thermopro(self, data, device_type, source_mac, rssi):
         firmware = "Thermopro"
         thermopro_mac = source_mac
 
-        xvalue = data[3:6]
-        (temp, humi) = unpack("<hB", xvalue)
+        (temp, humi) = unpack_from("<hB", data, 3)
+
         result = {
             "temperature": temp / 10,
             "humidity": humi,
@@ -29,8 +30,8 @@ def parse_thermopro(self, data, device_type, source_mac, rssi):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Thermopro DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
 
@@ -41,7 +42,7 @@ def parse_thermopro(self, data, device_type, source_mac, rssi):
 
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and thermopro_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(thermopro_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(thermopro_mac))
         return None
 
     result.update({
@@ -1,6 +1,6 @@
 """Parser for Tilt BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 
 from .const import (
     CONF_MAC,
@@ -19,7 +19,8 @@ from .const import (
     TILT_TYPES,
 )
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_uuid,
     to_unformatted_mac,
 )
@@ -30,10 +31,10 @@ _LOGGER = logging.getLogger(__name__)
 def parse_tilt(self, data: str, source_mac: str, rssi: float):
     """Tilt parser"""
     if data[5] == 0x15 and len(data) == 27:
-        uuid = data[6:22]
+        uuid = bytes(data[6:22])
         color = TILT_TYPES[int.from_bytes(uuid, byteorder='big')]
         device_type = "Tilt " + color
-        (major, minor, power) = unpack(">hhb", data[22:27])
+        (major, minor, power) = unpack_from(">hhb", data, 22)
 
         tracker_data = {
             CONF_RSSI: rssi,
@@ -61,8 +62,8 @@ def parse_tilt(self, data: str, source_mac: str, rssi: float):
             _LOGGER.info(
                 "BLE ADV from UNKNOWN TILT DEVICE: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None, None
 
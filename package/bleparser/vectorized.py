@@ -0,0 +1,222 @@
+"""Vectorized batch decoders for BLE advertisements with a fixed layout.
+
+The decoders take a batch of AD structures of the same format (the same data
+that is passed to the vendor parsers) and return a dictionary with a NumPy
+array per measurement, with the same keys and values as the vendor parsers.
+The MAC address is returned as 48-bit integer. Duplicate filtering,
+advertisement priority and whitelists are not applied.
+
+NumPy is an optional dependency, install it with `pip install bleparser[numpy]`.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_LOOKUP_TABLES = {}
+
+
+def _numpy():
+    """Return the numpy module, raise an ImportError if it is not installed"""
+    if np is None:
+        raise ImportError("The vectorized decoders require numpy, install it with pip install bleparser[numpy]")
+    return np
+
+
+def _to_array(payloads, dtype):
+    """View a batch of equally sized AD structures as a structured array"""
+    numpy = _numpy()
+    dtype = numpy.dtype(dtype)
+    payloads = list(payloads)
+    buffer = b"".join(payloads)
+    if len(buffer) != len(payloads) * dtype.itemsize:
+        raise ValueError(f"All payloads should be {dtype.itemsize} bytes long")
+    return numpy.frombuffer(buffer, dtype=dtype)
+
+
+def _mac_to_int(mac, reverse=False):
+    """Convert an (n, 6) array with MAC bytes to 48-bit integers"""
+    numpy = _numpy()
+    mac = mac.astype(numpy.uint64)
+    if reverse:
+        mac = mac[:, ::-1]
+    result = numpy.zeros(len(mac), dtype=numpy.uint64)
+    for i in range(6):
+        result = (result << numpy.uint64(8)) | mac[:, i]
+    return result
+
+
+def _lookup_table(name, values, func):
+    """Table with func applied to every possible raw value.
+
+    Used for values that are rounded with round(), as numpy.round doesn't give
+    the same results as the scalar parsers for values that end on a 5.
+    """
+    table = _LOOKUP_TABLES.get(name)
+    if table is None:
+        table = _numpy().array([func(value) for value in values], dtype="f8")
+        _LOOKUP_TABLES[name] = table
+    return table
+
+
+def decode_atc_custom(payloads):
+    """Decode ATC advertisements in the custom format (non-encrypted)"""
+    arr = _to_array(payloads, [
+        ("header", "V4"),
+        ("mac", "u1", (6,)),
+        ("temperature", "<i2"),
+        ("humidity", "<u2"),
+        ("voltage", "<u2"),
+        ("battery", "u1"),
+        ("packet", "u1"),
+        ("trigger", "u1"),
+    ])
+    trigger = arr["trigger"]
+    return {
+        "temperature": arr["temperature"] / 100,
+        "humidity": arr["humidity"] / 100,
+        "voltage": arr["voltage"] / 1000,
+        "battery": arr["battery"].copy(),
+        "switch": (trigger >> 1) & 1,
+        "opening": (~trigger ^ 1) & 1,
+        "packet": arr["packet"].copy(),
+        "mac": _mac_to_int(arr["mac"], reverse=True),
+    }
+
+
+def decode_atc1441(payloads):
+    """Decode ATC advertisements in the atc1441 format (non-encrypted)"""
+    arr = _to_array(payloads, [
+        ("header", "V4"),
+        ("mac", "u1", (6,)),
+        ("temperature", ">i2"),
+        ("humidity", "u1"),
+        ("battery", "u1"),
+        ("voltage", ">u2"),
+        ("packet", "u1"),
+    ])
+    return {
+        "temperature": arr["temperature"] / 10,
+        "humidity": arr["humidity"].copy(),
+        "voltage": arr["voltage"] / 1000,
+        "battery": arr["battery"].copy(),
+        "packet": arr["packet"].copy(),
+        "mac": _mac_to_int(arr["mac"]),
+    }
+
+
+def decode_ruuvitag_v5(payloads):
+    """Decode Ruuvitag advertisements in the data format 5 (RAWv2).
+
+    Invalid measurements (which are removed from the result by the scalar
+    parser) are set to NaN.
+    """
+    numpy = _numpy()
+    arr = _to_array(payloads, [
+        ("header", "V4"),
+        ("version", "u1"),
+        ("temperature", ">i2"),
+        ("humidity", ">u2"),
+        ("pressure", ">u2"),
+        ("acceleration x", ">i2"),
+        ("acceleration y", ">i2"),
+        ("acceleration z", ">i2"),
+        ("power", ">u2"),
+        ("movement counter", "u1"),
+        ("packet", ">u2"),
+        ("mac", "u1", (6,)),
+    ])
+    if numpy.any(arr["version"] != 5):
+        raise ValueError("All payloads should be in Ruuvitag data format 5")
+    temp_table = _lookup_table("ruuvitag_v5_temperature", range(-32768, 32768), lambda temp: round(temp / 200, 2))
+    humi_table = _lookup_table("ruuvitag_v5_humidity", range(65536), lambda humi: round(humi / 400, 2))
+    pres_table = _lookup_table("ruuvitag_v5_pressure", range(65536), lambda pres: round((pres + 50000) / 100, 2))
+
+    temperature = temp_table[arr["temperature"].astype(numpy.int32) + 32768]
+    humidity = humi_table[arr["humidity"]]
+    pressure = pres_table[arr["pressure"]]
+    temperature[temperature == -163.84] = numpy.nan
+    humidity[humidity == 163.84] = numpy.nan
+    pressure[pressure == 1155.35] = numpy.nan
+
+    accx = arr["acceleration x"].astype(numpy.int64)
+    accy = arr["acceleration y"].astype(numpy.int64)
+    accz = arr["acceleration z"].astype(numpy.int64)
+    acceleration = numpy.sqrt((accx ** 2 + accy ** 2 + accz ** 2).astype(numpy.float64))
+    acceleration[(accx == -32768) | (accy == -32768) | (accz == -32768)] = numpy.nan
+    power = arr["power"]
+    return {
+        "temperature": temperature,
+        "humidity": humidity,
+        "pressure": pressure,
+        "acceleration": acceleration,
+        "acceleration x": accx,
+        "acceleration y": accy,
+        "acceleration z": accz,
+        "voltage": (1600 + (power >> 5)) / 1000,
+        "tx power": -40 + ((power & 0x001F) * 2).astype(numpy.int64),
+        "movement counter": arr["movement counter"].copy(),
+        "packet": arr["packet"].astype(numpy.int64),
+        "mac": _mac_to_int(arr["mac"]),
+    }
+
+
+def decode_govee_h5075(payloads, macs=None):
+    """Decode Govee H5072/H5075 advertisements.
+
+    The MAC address is not included in the payload, the source MAC addresses
+    (bytes) can be passed with macs.
+    """
+    numpy = _numpy()
+    arr = _to_array(payloads, [
+        ("header", "V5"),
+        ("packet", "u1", (3,)),
+        ("battery", "u1"),
+        ("tail", "V1"),
+    ])
+    packet = arr["packet"].astype(numpy.int64)
+    packet = (packet[:, 0] << 16) | (packet[:, 1] << 8) | packet[:, 2]
+    # see decode_temps and decode_humi in govee.py
+    negative = (packet & 0x800000) != 0
+    temperature = ((packet & 0x7FFFFF) // 1000) / 10
+    temperature[negative] = ((packet[negative] & 0x7FFFFF) // 1000) / -10
+    result = {
+        "temperature": temperature,
+        "humidity": ((packet & 0x7FFFFF) % 1000) / 10,
+        "battery": arr["battery"].copy(),
+    }
+    if macs is not None:
+        result["mac"] = _mac_to_int(_to_array(macs, [("mac", "u1", (6,))])["mac"])
+    return result
+
+
+def decode_bparasite(payloads):
+    """Decode b-parasite advertisements (V1.0.0 or V1.1.0, with illuminance)"""
+    numpy = _numpy()
+    payloads = list(payloads)
+    fields = [
+        ("header", "V4"),
+        ("protocol", "u1"),
+        ("packet", "u1"),
+        ("voltage", ">u2"),
+        ("temperature", ">i2"),
+        ("humidity", ">u2"),
+        ("moisture", ">u2"),
+        ("mac", "u1", (6,)),
+    ]
+    with_illuminance = bool(payloads) and len(payloads[0]) == 22
+    if with_illuminance:
+        fields.append(("illuminance", ">u2"))
+    arr = _to_array(payloads, fields)
+    temp_divider = numpy.where((arr["protocol"] >> 4) == 2, 100, 1000)
+    result = {
+        "temperature": arr["temperature"] / temp_divider,
+        "humidity": (arr["humidity"] / 65536) * 100,
+        "voltage": arr["voltage"] / 1000.0,
+        "moisture": (arr["moisture"] / 65536) * 100,
+        "packet": arr["packet"].copy(),
+        "mac": _mac_to_int(arr["mac"]),
+    }
+    if with_illuminance:
+        result["illuminance"] = arr["illuminance"].astype(numpy.int64)
+    return result
@@ -1,8 +1,9 @@
 """Parser for Xiaogui Scale BLE advertisements"""
 import logging
-from struct import unpack
+from struct import unpack_from
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
     to_unformatted_mac,
 )
 
@@ -15,10 +16,10 @@ def parse_xiaogui(self, data, source_mac, rssi):
 
     if msg_length == 17:
         firmware = "Xiaogui"
-        xiaogui_mac = data[11:]
+        xiaogui_mac = bytes(data[11:])
 
         if xiaogui_mac != source_mac:
-            _LOGGER.error("Xiaogui MAC address doesn't match data MAC address. Data: %s", data.hex())
+            _LOGGER.error("Xiaogui MAC address doesn't match data MAC address. Data: %s", LazyHex(data))
             return None
 
         result = {
@@ -28,8 +29,8 @@ def parse_xiaogui(self, data, source_mac, rssi):
             "data": True,
         }
 
-        xvalue = data[3:11]
-        (frame_cnt, weight, impedance, control, stablilized_byte) = unpack(">BHHHB", xvalue)
+        (frame_cnt, weight, impedance, control, stablilized_byte) = unpack_from(">BHHHB", data, 3)
+
         packet_id = frame_cnt << 8 | stablilized_byte
 
         result.update({"packet": packet_id})
@@ -62,7 +63,7 @@ def parse_xiaogui(self, data, source_mac, rssi):
             _LOGGER.error(
                 "Stabilized byte of Xiaogui scale is reporting a new value, "
                 "please report an issue to the developers with this error: Payload is %s",
-                data.hex()
+                LazyHex(data)
             )
             device_type = None
     else:
@@ -72,27 +73,24 @@ def parse_xiaogui(self, data, source_mac, rssi):
         if self.report_unknown == "Xiaogui":
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Xiaogui DEVICE: MAC: %s, ADV: %s",
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
         return None
     else:
         result.update({"type": device_type})
 
     # Check for duplicate messages
-    try:
-        prev_packet = self.lpacket_ids[xiaogui_mac]
-    except KeyError:
-        # start with empty first packet
-        prev_packet = None
+    devices, slot = self.devices.lookup(xiaogui_mac)
+    prev_packet = devices.packet_ids[slot]
     if prev_packet == packet_id:
         # only process new messages
         return None
-    self.lpacket_ids[xiaogui_mac] = packet_id
+    devices.packet_ids[slot] = packet_id
 
     # check for MAC presence in whitelist, if needed
     if self.discovery is False and xiaogui_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(xiaogui_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(xiaogui_mac))
         return None
 
     return result
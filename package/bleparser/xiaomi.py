@@ -2,87 +2,76 @@
 import logging
 import math
 import struct
-from Cryptodome.Cipher import AES
 
 from datetime import datetime
+from functools import partial
 
 from .helpers import (
-    to_mac,
+    LazyHex,
+    LazyMac,
+    LazyStr,
     to_unformatted_mac,
 )
+from .registry import MISSING
 
 _LOGGER = logging.getLogger(__name__)
 
-# Device type dictionary
-# {device type code: device name}
-XIAOMI_TYPE_DICT = {
-    0x0C3C: "CGC1",
-    0x0576: "CGD1",
-    0x066F: "CGDK2",
-    0x0347: "CGG1",
-    0x0B48: "CGG1-ENCRYPTED",
-    0x03D6: "CGH1",
-    0x0A83: "CGPR1",
-    0x03BC: "GCLS002",
-    0x0098: "HHCCJCY01",
-    0x015D: "HHCCPOT002",
-    0x02DF: "JQJCY01YM",
-    0x0997: "JTYJGD03MI",
-    0x1568: "K9B-1BTN",
-    0x1569: "K9B-2BTN",
-    0x0DFD: "K9B-3BTN",
-    0x1889: "MS1BB(MI)",
-    0x2AEB: "HS1BB(MI)",
-    0x01AA: "LYWSDCGQ",
-    0x045B: "LYWSD02",
-    0x16e4: "LYWSD02MMC",
-    0x055B: "LYWSD03MMC",
-    0x098B: "MCCGQ02HL",
-    0x06d3: "MHO-C303",
-    0x0387: "MHO-C401",
-    0x07F6: "MJYD02YL",
-    0x04E9: "MJZNMSQ01YD",
-    0x00DB: "MMC-T201-1",
-    0x03DD: "MUE4094RT",
-    0x0489: "M1S-T500",
-    0x0A8D: "RTCGQ02LM",
-    0x0863: "SJWS01LM",
-    0x045C: "V-SK152",
-    0x040A: "WX08ZM",
-    0x04E1: "XMMF01JQD",
-    0x1203: "XMWSDJ04MMC",
-    0x1949: "XMWXKG01YL",
-    0x098C: "XMZNMST02YD",
-    0x0784: "XMZNMS04LM",
-    0x0E39: "XMZNMS08LM",
-    0x07BF: "YLAI003",
-    0x0153: "YLYK01YL",
-    0x068E: "YLYK01YL-FANCL",
-    0x04E6: "YLYK01YL-VENFAN",
-    0x03BF: "YLYB01YL-BHFRC",
-    0x03B6: "YLKG07YL/YLKG08YL",
-    0x0083: "YM-K1501",
-    0x0113: "YM-K1501EU",
-    0x069E: "ZNMS16LM",
-    0x069F: "ZNMS17LM",
-    0x0380: "DSL-C08",
-    0x0DE7: "SU001-T",
-    0x20DB: "MJZNZ018H",
-    0x18E3: "ZX1",
-}
-
 # Structured objects for data conversions
 TH_STRUCT = struct.Struct("<hH")
 H_STRUCT = struct.Struct("<H")
 T_STRUCT = struct.Struct("<h")
 TTB_STRUCT = struct.Struct("<hhB")
 CND_STRUCT = struct.Struct("<H")
-ILL_STRUCT = struct.Struct("<I")
-LIGHT_STRUCT = struct.Struct("<I")
 FMDH_STRUCT = struct.Struct("<H")
 M_STRUCT = struct.Struct("<L")
 P_STRUCT = struct.Struct("<H")
 BUTTON_STRUCT = struct.Struct("<BBB")
+
+# Button objects: button type -> command of a remote
+REMOTE_COMMAND = {0: "on", 1: "off", 2: "sun", 3: "+", 4: "m", 5: "-"}
+REMOTE_BINARY = {0: 1, 1: 0, 3: 1, 5: 1}
+FAN_REMOTE_COMMAND = {
+    0: "fan toggle",
+    1: "light toggle",
+    2: "wind speed",
+    3: "color temperature",
+    4: "wind mode",
+    5: "brightness",
+}
+VEN_FAN_REMOTE_COMMAND = {
+    0: "swing",
+    1: "power toggle",
+    2: "timer 60 minutes",
+    3: "strong wind speed",
+    4: "timer 30 minutes",
+    5: "low wind speed",
+}
+BATHROOM_REMOTE_COMMAND = {
+    0: "stop",
+    1: "air exchange",
+    2: "fan",
+    3: "speed +",
+    4: "speed -",
+    5: "dry",
+    6: "light toggle",
+    7: "swing",
+    8: "heat",
+}
+CUBE_DIRECTION = {0: "right", 1: "left"}
+# Button objects: button type -> buttons of a switch that are toggled
+TWO_BTN_SWITCH = {0: ("left",), 1: ("right",), 2: ("left", "right")}
+THREE_BTN_SWITCH = {
+    0: ("left",),
+    1: ("middle",),
+    2: ("right",),
+    3: ("left", "middle"),
+    4: ("middle", "right"),
+    5: ("left", "right"),
+    6: ("left", "middle", "right"),
+}
+# Button objects: press -> press type
+BUTTON_PRESS_TYPE = {0: "single press", 1: "double press", 2: "long press", 5: "short press", 6: "long press"}
+BTN_SWITCH_PRESS_TYPE = {0: "single press", 1: "long press", 2: "double press"}
 FLOAT_STRUCT = struct.Struct("<f")
 
 # Definition of lock messages
@@ -214,7 +203,7 @@ def obj0007(xobj):
     return {"door": door, "door action": action}
 
 
-def obj0008(xobj, device_type):
+def obj0008(xobj):
     """armed away"""
     returnData = {}
     value = xobj[0] ^ 1
@@ -223,20 +212,22 @@ def obj0008(xobj, device_type):
         timestamp = int.from_bytes(xobj[1:], 'little')
         timestamp = datetime.fromtimestamp(timestamp).isoformat()
         returnData.update({'timestamp': timestamp})
-    # Lift up door handle outside the door sends this event from DSL-C08.
-    if device_type == "DSL-C08":
-        return{
-            "lock": value,
-            "locktype": 'lock',
-            "action": 'lock outside the door',
-            "method": "manual",
-            "error": None,
-            "key id": None,
-            "timestamp": None,
-        }
     return returnData
 
 
+def obj0008_dsl_c08(xobj):
+    """armed away, lift up door handle outside the door (DSL-C08)"""
+    return {
+        "lock": xobj[0] ^ 1,
+        "locktype": 'lock',
+        "action": 'lock outside the door',
+        "method": "manual",
+        "error": None,
+        "key id": None,
+        "timestamp": None,
+    }
+
+
 def obj0010(xobj):
     """Toothbrush"""
     if xobj[0] == 0:
@@ -251,8 +242,13 @@ def obj0010(xobj):
             return {'toothbrush': 0, 'score': xobj[1]}
 
 
-def obj000b(xobj, device_type):
-    """Lock"""
+def obj000b(xobj, lock_type_by_action=False, one_time_password=False):
+    """Lock
+
+    With lock_type_by_action, the lock type depends on the action (e.g. child
+    lock). With one_time_password, password keys 5000-5999 are one-time
+    passwords.
+    """
     if len(xobj) == 9:
         action = xobj[0] & 0x0F
         method = xobj[0] >> 4
@@ -273,17 +269,13 @@ def obj000b(xobj, device_type):
 
         lock = BLE_LOCK_ACTION[action][0]
         # Decouple lock by type on some devices
-        lock_type = "lock"
-        if device_type == "ZNMS17LM":
-            lock_type = BLE_LOCK_ACTION[action][1]
+        lock_type = BLE_LOCK_ACTION[action][1] if lock_type_by_action else "lock"
         action = BLE_LOCK_ACTION[action][2]
         method = BLE_LOCK_METHOD[method]
 
         # Biometric unlock then disarm
-        if device_type == "DSL-C08":
-            if method == "password":
-                if 5000 <= key_id < 6000:
-                    method = "one-time password"
+        if one_time_password and method == "password" and 5000 <= key_id < 6000:
+            method = "one-time password"
 
         return {
             lock_type: lock,
@@ -298,194 +290,155 @@ def obj000b(xobj, device_type):
         return {}
 
 
-def obj000f(xobj, device_type):
-    """Moving with light"""
+obj000b_lock_type = partial(obj000b, lock_type_by_action=True)
+obj000b_one_time_password = partial(obj000b, one_time_password=True)
+
+
+def obj000f(xobj):
+    """Moving with light, for devices without light or illuminance data"""
+    return {}
+
+
+def obj000f_light(xobj):
+    """Moving with light (MJYD02YL, RTCGQ02LM)"""
     if len(xobj) == 3:
-        (value,) = LIGHT_STRUCT.unpack(xobj + b'\x00')
-
-        if device_type in ["MJYD02YL", "RTCGQ02LM"]:
-            # MJYD02YL:  1 - moving no light, 100 - moving with light
-            # RTCGQ02LM: 0 - moving no light, 256 - moving with light
-            return {"motion": 1, "motion timer": 1, "light": int(value >= 100)}
-        elif device_type == "CGPR1":
-            # CGPR1:     moving, value is illumination in lux
-            return {"motion": 1, "motion timer": 1, "illuminance": value, "light": int(value >= 100)}
-        else:
-            return {}
+        # MJYD02YL:  1 - moving no light, 100 - moving with light
+        # RTCGQ02LM: 0 - moving no light, 256 - moving with light
+        value = int.from_bytes(xobj, 'little')
+        return {"motion": 1, "motion timer": 1, "light": int(value >= 100)}
     else:
         return {}
 
 
-def obj1001(xobj, device_type):
-    """button"""
+def obj000f_illuminance(xobj):
+    """Moving with light (CGPR1)"""
     if len(xobj) == 3:
-        (button_type, value, press) = BUTTON_STRUCT.unpack(xobj)
-
-        # remote command and remote binary
-        remote_command = None
-        fan_remote_command = None
-        ven_fan_remote_command = None
-        bathroom_remote_command = None
-        one_btn_switch = None
-        two_btn_switch_left = None
-        two_btn_switch_right = None
-        three_btn_switch_left = None
-        three_btn_switch_middle = None
-        three_btn_switch_right = None
-        cube_direction = None
-        remote_binary = None
+        # CGPR1:     moving, value is illumination in lux
+        value = int.from_bytes(xobj, 'little')
+        return {"motion": 1, "motion timer": 1, "illuminance": value, "light": int(value >= 100)}
+    else:
+        return {}
+
+
+def obj1001(xobj):
+    """button, for devices without a known button layout"""
+    return None
 
+
+def button_press(button_type, value, press):
+    """Return the press type and dimmer value of a button object"""
+    if press == 3:
         if button_type == 0:
-            remote_command = "on"
-            fan_remote_command = "fan toggle"
-            ven_fan_remote_command = "swing"
-            bathroom_remote_command = "stop"
-            one_btn_switch = "toggle"
-            two_btn_switch_left = "toggle"
-            three_btn_switch_left = "toggle"
-            cube_direction = "right"
-            remote_binary = 1
-        elif button_type == 1:
-            remote_command = "off"
-            fan_remote_command = "light toggle"
-            ven_fan_remote_command = "power toggle"
-            bathroom_remote_command = "air exchange"
-            two_btn_switch_right = "toggle"
-            three_btn_switch_middle = "toggle"
-            cube_direction = "left"
-            remote_binary = 0
-        elif button_type == 2:
-            remote_command = "sun"
-            fan_remote_command = "wind speed"
-            ven_fan_remote_command = "timer 60 minutes"
-            bathroom_remote_command = "fan"
-            two_btn_switch_left = "toggle"
-            two_btn_switch_right = "toggle"
-            three_btn_switch_right = "toggle"
-            remote_binary = None
-        elif button_type == 3:
-            remote_command = "+"
-            fan_remote_command = "color temperature"
-            ven_fan_remote_command = "strong wind speed"
-            bathroom_remote_command = "speed +"
-            three_btn_switch_left = "toggle"
-            three_btn_switch_middle = "toggle"
-            remote_binary = 1
-        elif button_type == 4:
-            remote_command = "m"
-            fan_remote_command = "wind mode"
-            ven_fan_remote_command = "timer 30 minutes"
-            bathroom_remote_command = "speed -"
-            three_btn_switch_middle = "toggle"
-            three_btn_switch_right = "toggle"
-            remote_binary = None
-        elif button_type == 5:
-            remote_command = "-"
-            fan_remote_command = "brightness"
-            ven_fan_remote_command = "low wind speed"
-            bathroom_remote_command = "dry"
-            three_btn_switch_left = "toggle"
-            three_btn_switch_right = "toggle"
-            remote_binary = 1
-        elif button_type == 6:
-            bathroom_remote_command = "light toggle"
-            three_btn_switch_left = "toggle"
-            three_btn_switch_middle = "toggle"
-            three_btn_switch_right = "toggle"
-        elif button_type == 7:
-            bathroom_remote_command = "swing"
-        elif button_type == 8:
-            bathroom_remote_command = "heat"
-
-        # press type and dimmer
-        button_press_type = "no press"
-        btn_switch_press_type = "no press"
-        dimmer = None
-
-        if press == 0:
-            button_press_type = "single press"
-            btn_switch_press_type = "single press"
-        elif press == 1:
-            button_press_type = "double press"
-            btn_switch_press_type = "long press"
-        elif press == 2:
-            button_press_type = "long press"
-            btn_switch_press_type = "double press"
-        elif press == 3:
-            if button_type == 0:
-                button_press_type = "short press"
-                dimmer = value
-            if button_type == 1:
-                button_press_type = "long press"
-                dimmer = value
-        elif press == 4:
-            if button_type == 0:
-                if value <= 127:
-                    button_press_type = "rotate right"
-                    dimmer = value
-                else:
-                    button_press_type = "rotate left"
-                    dimmer = 256 - value
-            elif button_type <= 127:
-                button_press_type = "rotate right (pressed)"
-                dimmer = button_type
-            else:
-                button_press_type = "rotate left (pressed)"
-                dimmer = 256 - button_type
-        elif press == 5:
-            button_press_type = "short press"
-        elif press == 6:
-            button_press_type = "long press"
-
-        # return device specific output
-        result = {}
-        if device_type in ["RTCGQ02LM", "YLAI003", "JTYJGD03MI", "SJWS01LM"]:
-            result["button"] = button_press_type
-        elif device_type == "XMMF01JQD":
-            result["button"] = cube_direction
-        elif device_type == "YLYK01YL":
-            result["remote"] = remote_command
-            result["button"] = button_press_type
-            if remote_binary is not None:
-                if button_press_type == "single press":
-                    result["remote single press"] = remote_binary
-                else:
-                    result["remote long press"] = remote_binary
-        elif device_type == "YLYK01YL-FANRC":
-            result["fan remote"] = fan_remote_command
-            result["button"] = button_press_type
-        elif device_type == "YLYK01YL-VENFAN":
-            result["ventilator fan remote"] = ven_fan_remote_command
-            result["button"] = button_press_type
-        elif device_type == "YLYB01YL-BHFRC":
-            result["bathroom heater remote"] = bathroom_remote_command
-            result["button"] = button_press_type
-        elif device_type == "YLKG07YL/YLKG08YL":
-            result["dimmer"] = dimmer
-            result["button"] = button_press_type
-        elif device_type == "K9B-1BTN":
-            result["button switch"] = btn_switch_press_type
-            result["one btn switch"] = one_btn_switch
-        elif device_type == "K9B-2BTN":
-            result["button switch"] = btn_switch_press_type
-            if two_btn_switch_left:
-                result["two btn switch left"] = two_btn_switch_left
-            if two_btn_switch_right:
-                result["two btn switch right"] = two_btn_switch_right
-        elif device_type == "K9B-3BTN":
-            result["button switch"] = btn_switch_press_type
-            if three_btn_switch_left:
-                result["three btn switch left"] = three_btn_switch_left
-            if three_btn_switch_middle:
-                result["three btn switch middle"] = three_btn_switch_middle
-            if three_btn_switch_right:
-                result["three btn switch right"] = three_btn_switch_right
+            return "short press", value
+        if button_type == 1:
+            return "long press", value
+        return "no press", None
+    if press == 4:
+        if button_type == 0:
+            if value <= 127:
+                return "rotate right", value
+            return "rotate left", 256 - value
+        if button_type <= 127:
+            return "rotate right (pressed)", button_type
+        return "rotate left (pressed)", 256 - button_type
+    return BUTTON_PRESS_TYPE.get(press, "no press"), None
+
+
+def button_decoder(layout):
+    """Return a decoder for button objects (0x1001) with the output of a button layout"""
+    def decoder(xobj):
+        if len(xobj) == 3:
+            return layout(*BUTTON_STRUCT.unpack(xobj))
+        return None
+    decoder.__doc__ = layout.__doc__
+    return decoder
+
+
+@button_decoder
+def obj1001_button(button_type, value, press):
+    """button (RTCGQ02LM, YLAI003, JTYJGD03MI, SJWS01LM)"""
+    return {"button": button_press(button_type, value, press)[0]}
+
+
+@button_decoder
+def obj1001_cube(button_type, value, press):
+    """button (XMMF01JQD)"""
+    return {"button": CUBE_DIRECTION.get(button_type)}
+
+
+@button_decoder
+def obj1001_remote(button_type, value, press):
+    """button (YLYK01YL)"""
+    button_press_type = button_press(button_type, value, press)[0]
+    result = {"remote": REMOTE_COMMAND.get(button_type), "button": button_press_type}
+    remote_binary = REMOTE_BINARY.get(button_type)
+    if remote_binary is not None:
+        if button_press_type == "single press":
+            result["remote single press"] = remote_binary
         else:
-            return None
-        return result
+            result["remote long press"] = remote_binary
+    return result
+
+
+@button_decoder
+def obj1001_fan_remote(button_type, value, press):
+    """button (YLYK01YL-FANCL)"""
+    return {
+        "fan remote": FAN_REMOTE_COMMAND.get(button_type),
+        "button": button_press(button_type, value, press)[0],
+    }
+
+
+@button_decoder
+def obj1001_ven_fan_remote(button_type, value, press):
+    """button (YLYK01YL-VENFAN)"""
+    return {
+        "ventilator fan remote": VEN_FAN_REMOTE_COMMAND.get(button_type),
+        "button": button_press(button_type, value, press)[0],
+    }
 
-    else:
-        return None
+
+@button_decoder
+def obj1001_bathroom_remote(button_type, value, press):
+    """button (YLYB01YL-BHFRC)"""
+    return {
+        "bathroom heater remote": BATHROOM_REMOTE_COMMAND.get(button_type),
+        "button": button_press(button_type, value, press)[0],
+    }
+
+
+@button_decoder
+def obj1001_dimmer(button_type, value, press):
+    """button (YLKG07YL/YLKG08YL)"""
+    button_press_type, dimmer = button_press(button_type, value, press)
+    return {"dimmer": dimmer, "button": button_press_type}
+
+
+@button_decoder
+def obj1001_one_btn_switch(button_type, value, press):
+    """button (K9B-1BTN)"""
+    return {
+        "button switch": BTN_SWITCH_PRESS_TYPE.get(press, "no press"),
+        "one btn switch": "toggle" if button_type == 0 else None,
+    }
+
+
+@button_decoder
+def obj1001_two_btn_switch(button_type, value, press):
+    """button (K9B-2BTN)"""
+    result = {"button switch": BTN_SWITCH_PRESS_TYPE.get(press, "no press")}
+    for button in TWO_BTN_SWITCH.get(button_type, ()):
+        result["two btn switch " + button] = "toggle"
+    return result
+
+
+@button_decoder
+def obj1001_three_btn_switch(button_type, value, press):
+    """button (K9B-3BTN)"""
+    result = {"button switch": BTN_SWITCH_PRESS_TYPE.get(press, "no press")}
+    for button in THREE_BTN_SWITCH.get(button_type, ()):
+        result["three btn switch " + button] = "toggle"
+    return result
 
 
 def obj1004(xobj):
@@ -514,7 +467,7 @@ def obj1006(xobj):
 def obj1007(xobj):
     """Illuminance"""
     if len(xobj) == 3:
-        (illum,) = ILL_STRUCT.unpack(xobj + b'\x00')
+        illum = int.from_bytes(xobj, 'little')
         return {"illuminance": illum, "light": 1 if illum == 100 else 0}
     else:
         return {}
@@ -616,16 +569,19 @@ def obj100d(xobj):
         return {}
 
 
-def obj100e(xobj, device_type):
-    """Lock common attribute"""
+def obj100e(xobj):
+    """Lock common attribute, for devices without lock attributes"""
+    return None
+
+
+def obj100e_dsl_c08(xobj):
+    """Lock common attribute (DSL-C08)"""
     # https://iot.mi.com/new/doc/accesses/direct-access/embedded-development/ble/object-definition#%E9%94%81%E5%B1%9E%E6%80%A7
     if len(xobj) == 1:
-        # Unlock by type on some devices
-        if device_type == "DSL-C08":
-            lock_attribute = int.from_bytes(xobj, 'little')
-            lock = lock_attribute & 0x01 ^ 1
-            childlock = lock_attribute >> 3 ^ 1
-            return {"childlock": childlock, "lock": lock}
+        lock_attribute = int.from_bytes(xobj, 'little')
+        lock = lock_attribute & 0x01 ^ 1
+        childlock = lock_attribute >> 3 ^ 1
+        return {"childlock": childlock, "lock": lock}
 
 
 def obj2000(xobj):
@@ -980,6 +936,142 @@ xiaomi_dataobject_dict = {
     0x5a16: obj5a16,
 }
 
+# Advertisement priority of devices that can also send ATC advertisements
+# (custom firmware), MiBeacon advertisements of these devices are only used
+# when there are no ATC advertisements
+ADV_PRIORITY_ATC = 19
+
+
+class XiaomiDevice:
+    """Capabilities of a Xiaomi device type.
+
+    name is the device type in the results, adv_priority the advertisement
+    priority of devices that can also send ATC advertisements (0 for other
+    devices). objects has the decoders of the objects that differ from
+    xiaomi_dataobject_dict for this device type, button_layout the decoder of
+    its button objects (0x1001). decoders is the compiled decoder table of all
+    objects of the device type, so an object is decoded with one lookup.
+    """
+    __slots__ = ("name", "adv_priority", "button_layout", "decoders")
+
+    def __init__(self, name, adv_priority=0, objects=None, button_layout=None):
+        self.name = name
+        self.adv_priority = adv_priority
+        self.button_layout = button_layout
+        self.decoders = dict(xiaomi_dataobject_dict)
+        if objects:
+            self.decoders.update(objects)
+        if button_layout is not None:
+            self.decoders[0x1001] = button_layout
+
+    def __repr__(self):
+        return f"XiaomiDevice({self.name!r})"
+
+
+# Device type dictionary
+# {device type code: device capabilities}
+XIAOMI_DEVICES = {
+    0x0C3C: XiaomiDevice("CGC1"),
+    0x0576: XiaomiDevice("CGD1"),
+    0x066F: XiaomiDevice("CGDK2", adv_priority=ADV_PRIORITY_ATC),
+    0x0347: XiaomiDevice("CGG1", adv_priority=ADV_PRIORITY_ATC),
+    0x0B48: XiaomiDevice("CGG1-ENCRYPTED"),
+    0x03D6: XiaomiDevice("CGH1"),
+    0x0A83: XiaomiDevice("CGPR1", objects={0x000F: obj000f_illuminance}),
+    0x03BC: XiaomiDevice("GCLS002"),
+    0x0098: XiaomiDevice("HHCCJCY01"),
+    0x015D: XiaomiDevice("HHCCPOT002"),
+    0x02DF: XiaomiDevice("JQJCY01YM"),
+    0x0997: XiaomiDevice("JTYJGD03MI", button_layout=obj1001_button),
+    0x1568: XiaomiDevice("K9B-1BTN", button_layout=obj1001_one_btn_switch),
+    0x1569: XiaomiDevice("K9B-2BTN", button_layout=obj1001_two_btn_switch),
+    0x0DFD: XiaomiDevice("K9B-3BTN", button_layout=obj1001_three_btn_switch),
+    0x1889: XiaomiDevice("MS1BB(MI)"),
+    0x2AEB: XiaomiDevice("HS1BB(MI)"),
+    0x01AA: XiaomiDevice("LYWSDCGQ"),
+    0x045B: XiaomiDevice("LYWSD02"),
+    0x16e4: XiaomiDevice("LYWSD02MMC"),
+    0x055B: XiaomiDevice("LYWSD03MMC", adv_priority=ADV_PRIORITY_ATC),
+    0x098B: XiaomiDevice("MCCGQ02HL"),
+    0x06d3: XiaomiDevice("MHO-C303"),
+    0x0387: XiaomiDevice("MHO-C401", adv_priority=ADV_PRIORITY_ATC),
+    0x07F6: XiaomiDevice("MJYD02YL", objects={0x000F: obj000f_light}),
+    0x04E9: XiaomiDevice("MJZNMSQ01YD"),
+    0x00DB: XiaomiDevice("MMC-T201-1"),
+    0x03DD: XiaomiDevice("MUE4094RT"),
+    0x0489: XiaomiDevice("M1S-T500"),
+    0x0A8D: XiaomiDevice("RTCGQ02LM", objects={0x000F: obj000f_light}, button_layout=obj1001_button),
+    0x0863: XiaomiDevice("SJWS01LM", button_layout=obj1001_button),
+    0x045C: XiaomiDevice("V-SK152"),
+    0x040A: XiaomiDevice("WX08ZM"),
+    0x04E1: XiaomiDevice("XMMF01JQD", button_layout=obj1001_cube),
+    0x1203: XiaomiDevice("XMWSDJ04MMC"),
+    0x1949: XiaomiDevice("XMWXKG01YL"),
+    0x098C: XiaomiDevice("XMZNMST02YD"),
+    0x0784: XiaomiDevice("XMZNMS04LM"),
+    0x0E39: XiaomiDevice("XMZNMS08LM"),
+    0x07BF: XiaomiDevice("YLAI003", button_layout=obj1001_button),
+    0x0153: XiaomiDevice("YLYK01YL", button_layout=obj1001_remote),
+    0x068E: XiaomiDevice("YLYK01YL-FANCL", button_layout=obj1001_fan_remote),
+    0x04E6: XiaomiDevice("YLYK01YL-VENFAN", button_layout=obj1001_ven_fan_remote),
+    0x03BF: XiaomiDevice("YLYB01YL-BHFRC", button_layout=obj1001_bathroom_remote),
+    0x03B6: XiaomiDevice("YLKG07YL/YLKG08YL", button_layout=obj1001_dimmer),
+    0x0083: XiaomiDevice("YM-K1501"),
+    0x0113: XiaomiDevice("YM-K1501EU"),
+    0x069E: XiaomiDevice("ZNMS16LM"),
+    0x069F: XiaomiDevice("ZNMS17LM", objects={0x000B: obj000b_lock_type}),
+    0x0380: XiaomiDevice(
+        "DSL-C08",
+        objects={0x0008: obj0008_dsl_c08, 0x000B: obj000b_one_time_password, 0x100E: obj100e_dsl_c08},
+    ),
+    0x0DE7: XiaomiDevice("SU001-T"),
+    0x20DB: XiaomiDevice("MJZNZ018H"),
+    0x18E3: XiaomiDevice("ZX1"),
+}
+
+# {device type code: device name}
+XIAOMI_TYPE_DICT = {device_id: device.name for device_id, device in XIAOMI_DEVICES.items()}
+
+
+def xiaomi_info(data, device_type, payload):
+    """Return a description of the frame control, capabilities and payload of an advertisement.
+
+    Only used in log messages, so it is built from the raw data on demand instead
+    of for every advertisement.
+    """
+    frctrl = data[4] + (data[5] << 8)
+    frctrl_version = frctrl >> 12
+    frctrl_auth_mode = (frctrl >> 10) & 3
+    sinfo = 'MiVer: ' + str(frctrl_version)
+    sinfo += ', DevID: ' + hex(data[6] + (data[7] << 8)) + ' : ' + device_type
+    sinfo += ', FnCnt: ' + str(data[8])
+    if frctrl & 1:
+        sinfo += ', Request timing'
+    if (frctrl >> 8) & 1:
+        sinfo += ', Registered and bound'
+    else:
+        sinfo += ', Not bound'
+    if (frctrl >> 9) & 1:
+        sinfo += ', Request APP to register and bind'
+    if frctrl_auth_mode == 0:
+        sinfo += ', Old version certification'
+    elif frctrl_auth_mode == 1:
+        sinfo += ', Safety certification'
+    elif frctrl_auth_mode == 2:
+        sinfo += ', Standard certification'
+    if (frctrl >> 5) & 1:
+        i = 15 if (frctrl >> 4) & 1 else 9
+        capability_types = data[i]
+        sinfo += ', Capability: ' + hex(capability_types)
+        if (capability_types & 0x20) != 0:
+            sinfo += ', IO: ' + hex(data[i + 1])
+    if (frctrl >> 3) & 1:
+        sinfo += ', Encryption'
+    else:
+        sinfo += ', No encryption'
+    sinfo += ', Object data: ' + payload.hex()
+    return sinfo
+
 
 def parse_xiaomi(self, data, source_mac, rssi):
     """Parser for Xiaomi sensors"""
@@ -987,104 +1079,76 @@ def parse_xiaomi(self, data, source_mac, rssi):
     i = 9  # till Frame Counter
     msg_length = len(data)
     if msg_length < i:
-        _LOGGER.debug("Invalid data length (initial check), adv: %s", data.hex())
+        _LOGGER.debug("Invalid data length (initial check), adv: %s", LazyHex(data))
         return None
 
     # extract frame control bits
     frctrl = data[4] + (data[5] << 8)
     frctrl_mesh = (frctrl >> 7) & 1  # mesh device
     frctrl_version = frctrl >> 12  # version
-    frctrl_auth_mode = (frctrl >> 10) & 3
-    frctrl_solicited = (frctrl >> 9) & 1
-    frctrl_registered = (frctrl >> 8) & 1
     frctrl_object_include = (frctrl >> 6) & 1
     frctrl_capability_include = (frctrl >> 5) & 1
     frctrl_mac_include = (frctrl >> 4) & 1  # check for MAC address in data
     frctrl_is_encrypted = (frctrl >> 3) & 1  # check for encryption being used
-    frctrl_request_timing = frctrl & 1  # old version
 
     # Check that device is not of mesh type
     if frctrl_mesh != 0:
-        _LOGGER.debug("Xiaomi device data is a mesh type device, which is not supported. Data: %s", data.hex())
+        _LOGGER.debug("Xiaomi device data is a mesh type device, which is not supported. Data: %s", LazyHex(data))
         return None
 
     # Check that version is 2 or higher
     if frctrl_version < 2:
-        _LOGGER.debug("Xiaomi device data is using old data format, which is not supported. Data: %s", data.hex())
+        _LOGGER.debug("Xiaomi device data is using old data format, which is not supported. Data: %s", LazyHex(data))
         return None
 
     # Check that MAC in data is the same as the source MAC
     if frctrl_mac_include != 0:
         i += 6
         if msg_length < i:
-            _LOGGER.debug("Invalid data length (in MAC check), adv: %s", data.hex())
+            _LOGGER.debug("Invalid data length (in MAC check), adv: %s", LazyHex(data))
             return None
-        xiaomi_mac_reversed = data[9:15]
-        xiaomi_mac = xiaomi_mac_reversed[::-1]
-        if xiaomi_mac != source_mac:
-            _LOGGER.debug("Xiaomi MAC address doesn't match data MAC address. Data: %s", data.hex())
+        if data[14:8:-1] != source_mac:
+            _LOGGER.debug("Xiaomi MAC address doesn't match data MAC address. Data: %s", LazyHex(data))
             return None
-    else:
-        xiaomi_mac = source_mac
+    xiaomi_mac = source_mac
 
     # determine the device type
     device_id = data[6] + (data[7] << 8)
     try:
-        device_type = XIAOMI_TYPE_DICT[device_id]
+        device = XIAOMI_DEVICES[device_id]
     except KeyError:
         if self.report_unknown == "Xiaomi":
             _LOGGER.info(
                 "BLE ADV from UNKNOWN Xiaomi device: RSSI: %s, MAC: %s, ADV: %s",
                 rssi,
-                to_mac(source_mac),
-                data.hex()
+                LazyMac(source_mac),
+                LazyHex(data)
             )
-        _LOGGER.debug("Unknown Xiaomi device found. Data: %s", data.hex())
+        _LOGGER.debug("Unknown Xiaomi device found. Data: %s", LazyHex(data))
         return None
 
+    device_type = device.name
     packet_id = data[8]
 
-    sinfo = 'MiVer: ' + str(frctrl_version)
-    sinfo += ', DevID: ' + hex(device_id) + ' : ' + device_type
-    sinfo += ', FnCnt: ' + str(packet_id)
-    if frctrl_request_timing != 0:
-        sinfo += ', Request timing'
-    if frctrl_registered != 0:
-        sinfo += ', Registered and bound'
-    else:
-        sinfo += ', Not bound'
-    if frctrl_solicited != 0:
-        sinfo += ', Request APP to register and bind'
-    if frctrl_auth_mode == 0:
-        sinfo += ', Old version certification'
-    elif frctrl_auth_mode == 1:
-        sinfo += ', Safety certification'
-    elif frctrl_auth_mode == 2:
-        sinfo += ', Standard certification'
-
     # check for MAC presence in sensor whitelist, if needed
     if self.discovery is False and xiaomi_mac not in self.sensor_whitelist:
-        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", to_mac(xiaomi_mac))
+        _LOGGER.debug("Discovery is disabled. MAC: %s is not whitelisted!", LazyMac(xiaomi_mac))
         return None
 
     # check for unique packet_id and advertisement priority
-    try:
-        prev_packet = self.lpacket_ids[xiaomi_mac]
-    except KeyError:
-        # start with empty first packet
-        prev_packet = None
+    devices, slot = self.devices.lookup(xiaomi_mac)
+    prev_packet = devices.packet_ids[slot]
 
-    if device_type in ["LYWSD03MMC", "CGG1", "MHO-C401", "CGDK2"]:
+    adv_priority = device.adv_priority
+    if adv_priority:
         # Check for adv priority and packet_id for devices that can also send in ATC format
-        adv_priority = 19
-        try:
-            prev_adv_priority = self.adv_priority[xiaomi_mac]
-        except KeyError:
+        prev_adv_priority = devices.adv_priority[slot]
+        if prev_adv_priority == MISSING:
             # start with initial adv priority
             prev_adv_priority = 0
         if adv_priority > prev_adv_priority:
             # always process advertisements with a higher priority
-            self.adv_priority[xiaomi_mac] = adv_priority
+            devices.adv_priority[slot] = adv_priority
         elif adv_priority == prev_adv_priority:
             # only process messages with same priority that have a unique packet id
             if prev_packet == packet_id:
@@ -1097,36 +1161,32 @@ def parse_xiaomi(self, data, source_mac, rssi):
         else:
             # do not process advertisements with lower priority (ATC advertisements will be used instead)
             prev_adv_priority -= 1
-            self.adv_priority[xiaomi_mac] = prev_adv_priority
+            devices.adv_priority[slot] = prev_adv_priority
             return None
     else:
         if prev_packet == packet_id:
             if self.filter_duplicates is True:
                 # only process messages with highest priority and messages with unique packet id
                 return None
-    self.lpacket_ids[xiaomi_mac] = packet_id
+    devices.packet_ids[slot] = packet_id
 
     # check for capability byte present
     if frctrl_capability_include != 0:
         i += 1
         if msg_length < i:
-            _LOGGER.debug("Invalid data length (in capability check), adv: %s", data.hex())
+            _LOGGER.debug("Invalid data length (in capability check), adv: %s", LazyHex(data))
             return None
         capability_types = data[i - 1]
-        sinfo += ', Capability: ' + hex(capability_types)
         if (capability_types & 0x20) != 0:
             i += 1
             if msg_length < i:
-                _LOGGER.debug("Invalid data length (in capability type check), adv: %s", data.hex())
+                _LOGGER.debug("Invalid data length (in capability type check), adv: %s", LazyHex(data))
                 return None
-            capability_io = data[i - 1]
-            sinfo += ', IO: ' + hex(capability_io)
 
     # check that data contains object
     if frctrl_object_include != 0:
         # check for encryption
         if frctrl_is_encrypted != 0:
-            sinfo += ', Encryption'
             firmware = "Xiaomi (MiBeacon V" + str(frctrl_version) + " encrypted)"
             if frctrl_version <= 3:
                 payload = decrypt_mibeacon_legacy(self, data, i, xiaomi_mac)
@@ -1135,14 +1195,13 @@ def parse_xiaomi(self, data, source_mac, rssi):
         else:   # No encryption
             # check minimum advertisement length with data
             firmware = "Xiaomi (MiBeacon V" + str(frctrl_version) + ")"
-            sinfo += ', No encryption'
             if msg_length < i + 3:
-                _LOGGER.debug("Invalid data length (in non-encrypted data), adv: %s", data.hex())
+                _LOGGER.debug("Invalid data length (in non-encrypted data), adv: %s", LazyHex(data))
                 return None
             payload = data[i:]
     else:
         # data does not contain Object
-        _LOGGER.debug("Advertisement doesn't contain payload, adv: %s", data.hex())
+        _LOGGER.debug("Advertisement doesn't contain payload, adv: %s", LazyHex(data))
         return None
 
     result = {
@@ -1156,8 +1215,8 @@ def parse_xiaomi(self, data, source_mac, rssi):
 
     if payload is not None:
         result.update({"data": True})
-        sinfo += ', Object data: ' + payload.hex()
         # loop through parse_xiaomi payload
+        decoders = device.decoders
         payload_start = 0
         payload_length = len(payload)
         # assume that the data may have several values of different types
@@ -1166,19 +1225,22 @@ def parse_xiaomi(self, data, source_mac, rssi):
             obj_length = payload[payload_start + 2]
             next_start = payload_start + 3 + obj_length
             if payload_length < next_start:
-                _LOGGER.debug("Invalid payload data length, payload: %s", payload.hex())
+                _LOGGER.debug("Invalid payload data length, payload: %s", LazyHex(payload))
                 break
             dobject = payload[payload_start + 3:next_start]
             if obj_length != 0:
-                resfunc = xiaomi_dataobject_dict.get(obj_typecode, None)
+                resfunc = decoders.get(obj_typecode)
                 if resfunc:
-                    if hex(obj_typecode) in ["0x8", "0x100e", "0x1001", "0xf", "0xb"]:
-                        result.update(resfunc(dobject, device_type))
-                    else:
-                        result.update(resfunc(dobject))
+                    values = resfunc(dobject)
+                    if values:
+                        result.update(values)
                 else:
                     if self.report_unknown == "Xiaomi":
-                        _LOGGER.info("%s, UNKNOWN dataobject in payload! Adv: %s", sinfo, data.hex())
+                        _LOGGER.info(
+                            "%s, UNKNOWN dataobject in payload! Adv: %s",
+                            LazyStr(xiaomi_info, data, device_type, payload),
+                            LazyHex(data)
+                        )
             payload_start = next_start
 
     return result
@@ -1188,76 +1250,94 @@ def decrypt_mibeacon_v4_v5(self, data, i, xiaomi_mac):
     """decrypt MiBeacon v4/v5 encrypted advertisements"""
     # check for minimum length of encrypted advertisement
     if len(data) < i + 9:
-        _LOGGER.debug("Invalid data length (for decryption), adv: %s", data.hex())
+        _LOGGER.debug("Invalid data length (for decryption), adv: %s", LazyHex(data))
+    # skip devices that failed decryption recently
+    if self.decrypt_backoff.blocked(xiaomi_mac):
+        return None
     # try to find encryption key for current device
     try:
         key = self.aeskeys[xiaomi_mac]
         if len(key) != 16:
-            _LOGGER.error("Encryption key should be 16 bytes (32 characters) long")
+            if self.decrypt_backoff.failure(xiaomi_mac):
+                _LOGGER.error("Encryption key should be 16 bytes (32 characters) long")
             return None
     except KeyError:
         # no encryption key found
-        _LOGGER.error("No encryption key found for device with MAC %s", to_mac(xiaomi_mac))
+        if self.decrypt_backoff.failure(xiaomi_mac):
+            _LOGGER.error("No encryption key found for device with MAC %s", LazyMac(xiaomi_mac))
         return None
 
     nonce = b"".join([xiaomi_mac[::-1], data[6:9], data[-7:-4]])
     aad = b"\x11"
     token = data[-4:]
     cipherpayload = data[i:-7]
-    cipher = AES.new(key, AES.MODE_CCM, nonce=nonce, mac_len=4)
-    cipher.update(aad)
+    cipher = self.ciphers.cipher(key)
 
     try:
-        decrypted_payload = cipher.decrypt_and_verify(cipherpayload, token)
+        decrypted_payload = cipher.decrypt(nonce, cipherpayload, aad, token)
     except ValueError as error:
-        _LOGGER.warning("Decryption failed: %s", error)
-        _LOGGER.debug("token: %s", token.hex())
-        _LOGGER.debug("nonce: %s", nonce.hex())
-        _LOGGER.debug("cipherpayload: %s", cipherpayload.hex())
+        if self.decrypt_backoff.failure(xiaomi_mac):
+            _LOGGER.warning("Decryption failed: %s", error)
+        _LOGGER.debug("token: %s", LazyHex(token))
+        _LOGGER.debug("nonce: %s", LazyHex(nonce))
+        _LOGGER.debug("cipherpayload: %s", LazyHex(cipherpayload))
         return None
     if decrypted_payload is None:
         _LOGGER.error(
             "Decryption failed for %s, decrypted payload is None",
-            to_mac(xiaomi_mac),
+            LazyMac(xiaomi_mac),
         )
         return None
+    self.decrypt_backoff.success(xiaomi_mac)
     return decrypted_payload
 
 
+def valid_object_framing(payload):
+    """check that the payload consists of whole data objects (typecode, length, data)"""
+    payload_start = 0
+    payload_length = len(payload)
+    while payload_length >= payload_start + 3:
+        payload_start += 3 + payload[payload_start + 2]
+    return payload_length != 0 and payload_start == payload_length
+
+
 def decrypt_mibeacon_legacy(self, data, i, xiaomi_mac):
     """decrypt MiBeacon v2/v3 encrypted advertisements"""
     # check for minimum length of encrypted advertisement
     if len(data) < i + 7:
-        _LOGGER.debug("Invalid data length (for decryption), adv: %s", data.hex())
+        _LOGGER.debug("Invalid data length (for decryption), adv: %s", LazyHex(data))
+    # skip devices that failed decryption recently
+    if self.decrypt_backoff.blocked(xiaomi_mac):
+        return None
     # try to find encryption key for current device
     try:
         aeskey = self.aeskeys[xiaomi_mac]
         if len(aeskey) != 12:
-            _LOGGER.error("Encryption key should be 12 bytes (24 characters) long")
+            if self.decrypt_backoff.failure(xiaomi_mac):
+                _LOGGER.error("Encryption key should be 12 bytes (24 characters) long")
             return None
-        key = b"".join([aeskey[0:6], bytes.fromhex("8d3d3c97"), aeskey[6:]])
     except KeyError:
         # no encryption key found
-        _LOGGER.error("No encryption key found for device with MAC %s", to_mac(xiaomi_mac))
+        if self.decrypt_backoff.failure(xiaomi_mac):
+            _LOGGER.error("No encryption key found for device with MAC %s", LazyMac(xiaomi_mac))
         return None
 
     nonce = b"".join([data[4:9], data[-4:-1], xiaomi_mac[::-1][:-1]])
-    aad = b"\x11"
     cipherpayload = data[i:-4]
-    cipher = AES.new(key, AES.MODE_CCM, nonce=nonce, mac_len=4)
-    cipher.update(aad)
-
-    try:
-        decrypted_payload = cipher.decrypt(cipherpayload)
-    except ValueError as error:
-        _LOGGER.warning("Decryption failed: %s", error)
-        _LOGGER.debug("nonce: %s", nonce.hex())
-        _LOGGER.debug("cipherpayload: %s", cipherpayload.hex())
-        return None
-    if decrypted_payload is None:
-        _LOGGER.warning(
-            "Decryption failed for %s, decrypted payload is None",
-            to_mac(xiaomi_mac),
-        )
+    # the 16 byte key is derived from the 12 byte key
+    cipher = self.ciphers.legacy_cipher(aeskey)
+
+    # MiBeacon v2/v3 advertisements have no MIC, a wrong key is only
+    # noticed by the data objects of the payload not adding up
+    decrypted_payload = cipher.decrypt_unauthenticated(nonce, cipherpayload)
+    if not valid_object_framing(decrypted_payload):
+        if self.decrypt_backoff.failure(xiaomi_mac):
+            _LOGGER.warning(
+                "Decryption failed for %s, invalid payload data length (wrong encryption key?)",
+                LazyMac(xiaomi_mac),
+            )
+        _LOGGER.debug("nonce: %s", LazyHex(nonce))
+        _LOGGER.debug("cipherpayload: %s", LazyHex(cipherpayload))
         return None
+    self.decrypt_backoff.success(xiaomi_mac)
     return decrypted_payload
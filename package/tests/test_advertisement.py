@@ -0,0 +1,114 @@
+"""The tests for the advertisement view of the ble_parser."""
+from bleparser import BleParser
+from bleparser.advertisement import AdvertisementView
+from bleparser.dispatch import RoutingTable
+
+# flags, UUID16 list, service data (ATC), manufacturer data (Apple), shortened and complete local name
+AD_PAYLOAD = bytes.fromhex(
+    "020106"
+    "03031a18"
+    "10161a18a4c1380283f400a22f5f0bf819"
+    "0aff4c001005031c2a8b6f"
+    "050841544331"
+    "0709415443383346"
+)
+
+
+class TestAdvertisementView:
+    """Tests for the advertisement view"""
+
+    def test_truncated_adstructs(self):
+        """Test that AD structures that are too short or too long are skipped."""
+        # UUID16 list without a full UUID, service data without UUID16, truncated manufacturer data
+        adv = AdvertisementView(bytes.fromhex("020201" "03161a18" "0aff4c00"))
+
+        assert adv.service_class_uuid16 is None
+        assert adv.service_data_list == []
+        assert adv.man_spec_data_list == []
+
+    def test_fields(self):
+        """Test the extracted advertisement fields."""
+        adv = AdvertisementView(AD_PAYLOAD)
+
+        assert adv.service_class_uuid16 == 0x1A18
+        assert adv.service_class_uuid128 is None
+        assert adv.local_name == "ATC83F"
+        assert adv.service_data_list == [bytes.fromhex("10161a18a4c1380283f400a22f5f0bf819")]
+        assert adv.man_spec_data_list == [bytes.fromhex("0aff4c001005031c2a8b6f")]
+
+    def test_offsets(self):
+        """Test that the view records the offsets of the AD structures."""
+        adv = AdvertisementView(AD_PAYLOAD)
+
+        assert adv.service_data_offsets == (7,)
+        assert adv.man_spec_data_offsets == (24,)
+        assert adv.data is AD_PAYLOAD
+
+    def test_shortened_local_name(self):
+        """Test that the shortened local name is used without complete local name."""
+        adv = AdvertisementView(AD_PAYLOAD[:-8])
+
+        assert adv.local_name == "ATC1"
+
+    def test_scan_reuse(self):
+        """Test that a reused view doesn't keep the fields of the previous AD payload."""
+        adv = AdvertisementView(AD_PAYLOAD)
+        assert adv.local_name == "ATC83F"
+        adv.scan(bytes.fromhex("0201060aff4c001005031c2a8b6f"))
+
+        assert adv.service_class_uuid16 is None
+        assert adv.local_name == ""
+        assert adv.service_data_list == []
+        assert adv.man_spec_data_list == [bytes.fromhex("0aff4c001005031c2a8b6f")]
+
+    def test_service_data(self):
+        """Test the lookup of service data on UUID16."""
+        adv = AdvertisementView(AD_PAYLOAD)
+
+        assert adv.service_data(0x181A) == bytes.fromhex("10161a18a4c1380283f400a22f5f0bf819")
+        assert adv.service_data(0xFE95) is None
+
+    def test_manufacturer_data(self):
+        """Test the lookup of manufacturer specific data on company id."""
+        adv = AdvertisementView(AD_PAYLOAD)
+
+        assert adv.manufacturer_data(0x004C) == bytes.fromhex("0aff4c001005031c2a8b6f")
+        assert adv.manufacturer_data(0x0499) is None
+
+    def test_invalid_local_name_not_decoded(self):
+        """Test that a local name is only decoded when it is used."""
+        data_string = "043e2602010000f4830238c1a41a10161a18a4c1380283f400a22f5f0bf8190908ff415443383346df"
+        data = bytes(bytearray.fromhex(data_string))
+        ble_parser = BleParser()
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(data)
+
+        assert sensor_msg["firmware"] == "ATC (Atc1441)"
+        assert sensor_msg["temperature"] == 16.2
+
+    def test_nested_parse_raw_data(self):
+        """Test that parse_raw_data can be called again while it parses an advertisement."""
+        atc_data = bytes.fromhex("043e1d02010000f4830238c1a41110161a18a4c1380283f400a22f5f0bf819df")
+        xiaomi_data = bytes.fromhex(
+            "043e2502010000219335342d5819020106151695fe5020aa01da219335342d580d1004fe004802c4"
+        )
+        ble_parser = BleParser()
+        nested = []
+
+        def handler(parse, parser, data, mac, rssi, adv):
+            nested.append(parser.parse_raw_data(xiaomi_data))
+            # the view of the outer call is not reused by the nested call
+            assert adv.service_data_list == [data]
+            return parse(parser, data, mac, rssi), None
+
+        ble_parser.routing_table = RoutingTable(
+            [
+                ("ATC", [0x181A], None, None, ("atc", handler, False)),
+                ("Xiaomi", [0xFE95], None, None, ("xiaomi", None, False)),
+            ],
+            [],
+        )
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(atc_data)
+
+        assert sensor_msg["firmware"] == "ATC (Atc1441)"
+        assert nested[0][0]["firmware"] == "Xiaomi (MiBeacon V2)"
+        assert ble_parser.parse_raw_data(xiaomi_data)[0]["firmware"] == "Xiaomi (MiBeacon V2)"
@@ -0,0 +1,106 @@
+"""The tests for the BleParser API."""
+from bleparser import BleParser
+
+ATC_DATA = [
+    "043e1d02010000f4830238c1a41110161a18a4c1380283f400a22f5f0bf819df",
+    "043e1f02010000f4830238c1a41312161a18f4830238c1a4a9066911b60b58f70dde",
+    "043e1f02010000f4830238c1a41312161a18f4830238c1a4a9066911b60b58f70dde",
+]
+
+
+def multi_report_event(events):
+    """Combine the reports of single report events in one event"""
+    reports = b"".join(event[5:] for event in events)
+    return bytes([0x04, 0x3E, len(reports) + 2, events[0][3], len(events)]) + reports
+
+
+class TestBleParser:
+    """Tests for the BleParser API"""
+
+    def test_parse_raw_batch(self):
+        """Test parsing a batch of HCI events."""
+        events = [bytes.fromhex(data_string) for data_string in ATC_DATA]
+        ble_parser = BleParser(filter_duplicates=True)
+        results = ble_parser.parse_raw_batch(events)
+
+        # same results as parsing the events one by one
+        ble_parser = BleParser(filter_duplicates=True)
+        assert results == [ble_parser.parse_raw_data(data) for data in events]
+        assert results[0][0]["firmware"] == "ATC (Atc1441)"
+        assert results[1][0]["firmware"] == "ATC (Custom)"
+        # duplicate packet
+        assert results[2] == (None, None)
+
+    def test_parse_raw_batch_generator(self):
+        """Test parsing a batch of HCI events from a generator."""
+        ble_parser = BleParser()
+        results = ble_parser.parse_raw_batch(bytes.fromhex(data_string) for data_string in ATC_DATA)
+
+        assert len(results) == 3
+        assert results[2][0]["packet"] == 247
+
+    def test_parse_advertisement_batch(self):
+        """Test parsing a batch of advertisements."""
+        mac = bytes.fromhex("A4C1380283F4")
+        service_data = bytes.fromhex("10161a18a4c1380283f400a22f5f0bf819")
+        ble_parser = BleParser()
+        results = ble_parser.parse_advertisement_batch(
+            [(mac, -33, None, None, "", [service_data], None), (mac, -34)]
+        )
+
+        assert results[0][0]["temperature"] == 16.2
+        assert results[0][0]["rssi"] == -33
+        assert results[1] == (None, None)
+
+    def test_parse_raw_data_buffer(self):
+        """Test parsing HCI events from a reused buffer."""
+        buffer = bytearray.fromhex(ATC_DATA[0])
+        ble_parser = BleParser()
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(memoryview(buffer))
+        assert sensor_msg["temperature"] == 16.2
+
+        # the parser state doesn't keep a reference to the buffer
+        buffer[:] = bytes(len(buffer))
+        assert list(ble_parser.lpacket_ids) == [bytes.fromhex("A4C1380283F4")]
+        assert all(type(mac) is bytes for mac in ble_parser.adv_priority)
+
+    def test_parse_raw_reports(self):
+        """Test parsing an HCI LE Advertising Report event with multiple reports."""
+        events = [bytes.fromhex(data_string) for data_string in ATC_DATA[:2]]
+        data = multi_report_event(events)
+        ble_parser = BleParser()
+        results = list(ble_parser.parse_raw_reports(data))
+
+        # one result per report, same as the single report events
+        ble_parser = BleParser()
+        assert results == [ble_parser.parse_raw_data(event) for event in events]
+        assert results[0][0]["firmware"] == "ATC (Atc1441)"
+        assert results[1][0]["firmware"] == "ATC (Custom)"
+        # parse_raw_data only accepts events with a single report
+        assert BleParser().parse_raw_data(data) == (None, None)
+
+    def test_parse_raw_reports_extended(self):
+        """Test parsing an HCI LE Extended Advertising Report event with multiple reports."""
+        events = [
+            bytes.fromhex(data_string) for data_string in [
+                "043e320d0113000135673cdceaf80100ff7fb0000000000000000000180201060dffd506000867355367925c0b0406094d79434f32",
+                "043e390d011300008995c08c47c80100ff7fc70000000000000000001f02010603021d1809ff5701c8478cc095890d161d18821400e507040b101708",
+            ]
+        ]
+        ble_parser = BleParser()
+        results = list(ble_parser.parse_raw_reports(multi_report_event(events)))
+
+        ble_parser = BleParser()
+        assert results == [ble_parser.parse_raw_data(event) for event in events]
+        assert results[0][0]["firmware"] == "Sensirion"
+        assert results[1][0]["rssi"] == -57
+
+    def test_parse_raw_reports_truncated(self):
+        """Test that a truncated report stops the iteration."""
+        event = bytes.fromhex(ATC_DATA[0])
+        data = multi_report_event([event, event[:-4]])
+        ble_parser = BleParser()
+        results = list(ble_parser.parse_raw_reports(data))
+
+        assert len(results) == 1
+        assert results[0][0]["temperature"] == 16.2
@@ -1,5 +1,7 @@
 """The tests for the BTHome V2 (DIY sensor) ble_parser."""
 from bleparser import BleParser
+from bleparser.bthome import FORMAT_INT, FORMAT_UINT, MEAS_DECODERS
+from bleparser.crypto import CcmCipher
 
 
 class TestBTHome:
@@ -511,3 +513,89 @@ class TestBTHome:
         assert sensor_msg["button_3"] == 1
         assert sensor_msg["button_4"] == 0
         assert sensor_msg["rssi"] == -67
+
+    def test_bthome_v2_encrypted_duplicate_not_decrypted(self, monkeypatch):
+        """Test that encrypted duplicates are filtered on the counter before decryption"""
+        data_string = "043E2202010000A5808FE64854160201061216d2fc41a47266c95f730011223378237214CC"
+        data = bytes(bytearray.fromhex(data_string))
+        p_mac = bytes.fromhex("5448E68F80A5")
+        p_key = bytes.fromhex("231d39c1d7cc1ab1aee224cd096db932")
+
+        ble_parser = BleParser(aeskeys={p_mac: p_key}, filter_duplicates=True)
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(data)
+        assert sensor_msg["temperature"] == 25.06
+        assert ble_parser.encryption_counters[p_mac] == 0x33221100
+
+        decrypted = []
+        monkeypatch.setattr(CcmCipher, "decrypt", lambda *args: decrypted.append(args))
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(data)
+        assert sensor_msg is None
+        assert decrypted == []
+
+    def test_bthome_v2_encrypted_invalid_mic(self):
+        """Test that an advertisement with an invalid MIC doesn't update the counter"""
+        data_string = "043E2202010000A5808FE64854160201061216d2fc41a47266c95f730011223378237214CC"
+        invalid_data_string = "043E2202010000A5808FE64854160201061216d2fc41a47266c95f730011223300000000CC"
+        p_mac = bytes.fromhex("5448E68F80A5")
+        p_key = bytes.fromhex("231d39c1d7cc1ab1aee224cd096db932")
+
+        ble_parser = BleParser(aeskeys={p_mac: p_key}, filter_duplicates=True)
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(invalid_data_string))
+        assert sensor_msg is None
+        assert p_mac not in ble_parser.encryption_counters
+
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(data_string))
+        assert sensor_msg["temperature"] == 25.06
+
+    def test_bthome_v2_encrypted_no_key(self):
+        """Test BTHome parser for encrypted advertisements without encryption key"""
+        data_string = "043E2202010000A5808FE64854160201061216d2fc41a47266c95f730011223378237214CC"
+        data = bytes(bytearray.fromhex(data_string))
+
+        ble_parser = BleParser()
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(data)
+
+        assert sensor_msg is None
+
+    def test_bthome_v2_decoders(self):
+        """Test the compiled BTHome measurement decoders"""
+        temperature = MEAS_DECODERS[0x02]
+        packet = MEAS_DECODERS[0x00]
+
+        assert temperature.key == "temperature"
+        assert temperature.unit == "°C"
+        assert temperature.data_length == 2
+        assert temperature.data_format == FORMAT_INT
+        assert temperature.decimal_places == 2
+        assert packet.data_format == FORMAT_UINT
+        assert packet.decimal_places is None
+        assert MEAS_DECODERS[0x3A].is_button
+
+    def test_bthome_v2_reentrant(self, monkeypatch):
+        """Test that an advertisement parsed during the decryption of another one doesn't change its result"""
+        data_string = "043E2202010000A5808FE64854160201061216d2fc41a47266c95f730011223378237214CC"
+        button_data_string = "043e2002010301ca2474b6c67c140201061016d2fc4400c201643a003a033a013a00bd"
+        p_mac = bytes.fromhex("5448E68F80A5")
+        p_key = bytes.fromhex("231d39c1d7cc1ab1aee224cd096db932")
+
+        ble_parser = BleParser(aeskeys={p_mac: p_key})
+        inner_msgs = []
+        decrypt = CcmCipher.decrypt
+
+        def interleaved_decrypt(*args):
+            inner_msgs.append(ble_parser.parse_raw_data(bytes.fromhex(button_data_string))[0])
+            return decrypt(*args)
+
+        monkeypatch.setattr(CcmCipher, "decrypt", interleaved_decrypt)
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(data_string))
+
+        assert sensor_msg["firmware"] == "BTHome V2 (encrypted)"
+        assert sensor_msg["mac"] == "5448E68F80A5"
+        assert sensor_msg["packet"] == 0x33221100
+        assert sensor_msg["rssi"] == -52
+        assert sensor_msg["temperature"] == 25.06
+        assert inner_msgs[0]["firmware"] == "BTHome V2"
+        assert inner_msgs[0]["mac"] == "7CC6B67424CA"
+        assert inner_msgs[0]["packet"] == 194
+        assert inner_msgs[0]["rssi"] == -67
+        assert not hasattr(ble_parser, "bthome_mac")
@@ -0,0 +1,264 @@
+"""The tests for the AES-CCM decryption of the ble_parser."""
+import random
+import threading
+
+import pytest
+from Cryptodome.Cipher import AES
+
+from bleparser import BleParser
+from bleparser.crypto import CcmCipher, CipherCache, DecryptBackoff, ThreadLocalCipherCache
+from bleparser.inventory import DeviceInventory
+
+KEY = bytes.fromhex("b9ea895fac7eea6d30532432a516f3a3")
+MAC_1 = bytes.fromhex("A4C1388D18B2")
+MAC_2 = bytes.fromhex("A4C1388D18B3")
+
+
+class FakeClock:
+    """Clock that only moves when told to"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# RFC 3610 packet vectors #1 and #2: key, nonce, header (aad), payload, encrypted payload and mic
+RFC3610_KEY = bytes.fromhex("c0c1c2c3c4c5c6c7c8c9cacbcccdcecf")
+RFC3610_VECTORS = [
+    (
+        "00000003020100a0a1a2a3a4a5",
+        "0001020304050607",
+        "08090a0b0c0d0e0f101112131415161718191a1b1c1d1e",
+        "588c979a61c663d2f066d0c2c0f989806d5f6b61dac384" "17e8d12cfdf926e0",
+    ),
+    (
+        "00000004030201a0a1a2a3a4a5",
+        "0001020304050607",
+        "08090a0b0c0d0e0f101112131415161718191a1b1c1d1e1f",
+        "72c91a36e135f8cf291ca894085c87e3cc15c439c9e43a3b" "a091d56e10400916",
+    ),
+]
+
+
+def encrypt(key, nonce, plaintext, aad, mac_len=4):
+    """Encrypt with the AES-CCM cipher of pycryptodome"""
+    cipher = AES.new(key, AES.MODE_CCM, nonce=nonce, mac_len=mac_len)
+    if aad:
+        cipher.update(aad)
+    return cipher.encrypt_and_digest(plaintext)
+
+
+class TestCcmCipher:
+    """Tests for the AES-CCM cipher"""
+
+    @pytest.mark.parametrize("nonce_size", [11, 12, 13])
+    @pytest.mark.parametrize("aad", [b"", b"\x11"])
+    def test_decrypt(self, nonce_size, aad):
+        """Test that the result is the same as with pycryptodome."""
+        cipher = CcmCipher(KEY)
+        nonce = bytes(range(nonce_size))
+        for size in range(40):
+            plaintext = bytes(range(100, 100 + size))
+            ciphertext, mic = encrypt(KEY, nonce, plaintext, aad)
+
+            assert cipher.decrypt(nonce, memoryview(ciphertext), aad, mic) == plaintext
+            assert cipher.decrypt_unauthenticated(nonce, ciphertext) == plaintext
+
+    @pytest.mark.parametrize("nonce, aad, plaintext, result", RFC3610_VECTORS)
+    def test_rfc3610_vectors(self, nonce, aad, plaintext, result):
+        """Test the packet vectors of RFC 3610, with an 8 byte mic and 8 bytes of aad."""
+        cipher = CcmCipher(RFC3610_KEY)
+        result = bytes.fromhex(result)
+
+        assert cipher.decrypt(bytes.fromhex(nonce), result[:-8], bytes.fromhex(aad), result[-8:]).hex() == plaintext
+        with pytest.raises(ValueError, match="MAC check failed"):
+            cipher.decrypt(bytes.fromhex(nonce), result[:-8], bytes.fromhex(aad)[1:], result[-8:])
+
+    def test_decrypt_random(self):
+        """Test random keys, nonces, mic sizes and aad of several blocks against pycryptodome."""
+        rnd = random.Random(3610)
+        for _ in range(300):
+            key = rnd.randbytes(16)
+            nonce = rnd.randbytes(rnd.randint(7, 13))
+            aad = rnd.randbytes(rnd.choice([0, 1, 2, 13, 14, 15, 16, 40]))
+            plaintext = rnd.randbytes(rnd.randint(0, 70))
+            mac_len = rnd.randrange(4, 17, 2)
+            ciphertext, mic = encrypt(key, nonce, plaintext, aad, mac_len)
+            cipher = CcmCipher(key)
+
+            assert cipher.decrypt(nonce, ciphertext, aad, mic) == plaintext
+            assert cipher.decrypt_unauthenticated(nonce, ciphertext) == plaintext
+
+    def test_tampered_input(self):
+        """Test that a change of a single bit of the ciphertext, aad or mic is rejected."""
+        cipher = CcmCipher(KEY)
+        nonce = bytes(range(12))
+        aad = bytes.fromhex("11223344")
+        ciphertext, mic = encrypt(KEY, nonce, bytes(range(20)), aad)
+        message = aad + ciphertext + mic
+
+        for bit in range(8 * len(message)):
+            tampered = bytearray(message)
+            tampered[bit >> 3] ^= 1 << (bit & 7)
+            with pytest.raises(ValueError, match="MAC check failed"):
+                cipher.decrypt(nonce, tampered[4:-4], tampered[:4], tampered[-4:])
+        with pytest.raises(ValueError, match="MAC check failed"):
+            cipher.decrypt(bytes(12), ciphertext, aad, mic)
+        assert cipher.decrypt(nonce, ciphertext, aad, mic) == bytes(range(20))
+
+    def test_mic_check(self):
+        """Test that a wrong mic is rejected."""
+        cipher = CcmCipher(KEY)
+        nonce = bytes(12)
+        ciphertext, mic = encrypt(KEY, nonce, b"\x01\x02\x03", b"\x11")
+
+        with pytest.raises(ValueError, match="MAC check failed"):
+            cipher.decrypt(nonce, ciphertext, b"\x11", bytes(4))
+        with pytest.raises(ValueError, match="MAC check failed"):
+            cipher.decrypt(nonce, ciphertext, b"", mic)
+
+    def test_invalid_lengths(self):
+        """Test that nonce, mic, aad and ciphertext lengths that AES-CCM doesn't allow are rejected."""
+        cipher = CcmCipher(KEY)
+        nonce = bytes(12)
+        ciphertext, mic = encrypt(KEY, nonce, b"\x01\x02\x03", b"\x11")
+
+        for bad_nonce in (bytes(6), bytes(14)):
+            with pytest.raises(ValueError, match="Nonce"):
+                cipher.decrypt(bad_nonce, ciphertext, b"\x11", mic)
+            with pytest.raises(ValueError, match="Nonce"):
+                cipher.decrypt_unauthenticated(bad_nonce, ciphertext)
+        for bad_mic in (b"", mic[:3], mic + b"\x00", bytes(18)):
+            with pytest.raises(ValueError, match="MIC"):
+                cipher.decrypt(nonce, ciphertext, b"\x11", bad_mic)
+        with pytest.raises(ValueError, match="AAD"):
+            cipher.decrypt(nonce, ciphertext, bytes(0xFF00), mic)
+        with pytest.raises(ValueError, match="too long"):
+            cipher.decrypt_unauthenticated(bytes(13), bytes(0x10000))
+        assert cipher.decrypt(nonce, ciphertext, b"\x11", mic) == b"\x01\x02\x03"
+
+    def test_long_aad(self):
+        """Test aad up to the largest length with a two byte length encoding."""
+        cipher = CcmCipher(KEY)
+        nonce = bytes(13)
+        aad = (bytes(range(256)) * 255)[:-1]
+        ciphertext, mic = encrypt(KEY, nonce, b"\x01\x02\x03", aad)
+
+        assert len(aad) == 0xFEFF
+        assert cipher.decrypt(nonce, ciphertext, aad, mic) == b"\x01\x02\x03"
+
+
+class TestCipherCache:
+    """Tests for the cipher cache"""
+
+    def test_cipher(self):
+        """Test that ciphers are cached on key."""
+        ciphers = CipherCache()
+
+        assert ciphers.cipher(KEY) is ciphers.cipher(bytes(KEY))
+        assert len(ciphers) == 1
+        ciphers.clear()
+        assert len(ciphers) == 0
+
+    def test_legacy_cipher(self):
+        """Test the derived key of MiBeacon v2/v3 advertisements."""
+        aeskey = bytes.fromhex("e85feb2b6f8a3a0b5b3b2f1c")
+        key = bytes.fromhex("e85feb2b6f8a8d3d3c973a0b5b3b2f1c")
+        nonce = bytes(13)
+        ciphertext, mic = encrypt(key, nonce, b"\x0d\x10\x04", b"\x11")
+        ciphers = CipherCache()
+
+        assert ciphers.legacy_cipher(aeskey).decrypt(nonce, ciphertext, b"\x11", mic) == b"\x0d\x10\x04"
+        assert ciphers.legacy_cipher(aeskey) is ciphers.legacy_cipher(aeskey)
+
+    def test_thread_local_cipher(self):
+        """Test that each thread gets ciphers of its own."""
+        ciphers = ThreadLocalCipherCache()
+        cipher = ciphers.cipher(KEY)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(ciphers.cipher(KEY)))
+        thread.start()
+        thread.join()
+
+        assert ciphers.cipher(KEY) is cipher
+        assert other[0] is not cipher
+        assert other[0].key == KEY
+        ciphers.discard(KEY)
+        assert len(ciphers) == 0
+        assert ciphers.cipher(KEY) is not cipher
+
+
+class TestDecryptBackoff:
+    """Tests for the backoff of devices that fail decryption"""
+
+    def test_backoff(self):
+        """Test that the delay doubles after each failure, up to max_delay."""
+        clock = FakeClock()
+        backoff = DecryptBackoff(delay=1.0, max_delay=3.0, clock=clock)
+
+        assert backoff.failure(MAC_1) is True
+        # a single failure doesn't block the device
+        assert backoff.blocked(MAC_1) is False
+        assert backoff.failure(MAC_1) is False
+        assert backoff.blocked(MAC_1) is True
+        clock.now = 1.0
+        assert backoff.blocked(MAC_1) is False
+        backoff.failure(MAC_1)
+        clock.now = 2.5
+        assert backoff.blocked(MAC_1) is True
+        clock.now = 3.0
+        backoff.failure(MAC_1)
+        backoff.failure(MAC_2)
+        backoff.failure(MAC_2)
+        clock.now = 5.5
+        # 4 failures: capped at 3 seconds instead of 4 seconds
+        assert backoff.quarantined() == [MAC_1]
+        assert backoff.info() == {"size": 2, "quarantined": 1, "skipped": 2}
+
+        backoff.success(MAC_1)
+        assert backoff.blocked(MAC_1) is False
+        assert backoff.failure(MAC_1) is True
+
+    def test_maxsize(self):
+        """Test that the number of devices is bounded."""
+        backoff = DecryptBackoff(maxsize=1)
+        backoff.failure(MAC_1)
+        backoff.failure(MAC_2)
+
+        assert len(backoff) == 1
+        assert backoff.failure(MAC_1) is True
+
+    def test_parser_backoff(self):
+        """Test that decryption is skipped for a device with a wrong key, until the keys change."""
+        data_string = "043e1b02010000b2188d38c1a40f0e161a1811d603fbfa7b6dfb1e26fde2"
+        data = bytes.fromhex(data_string)
+        ble_parser = BleParser(aeskeys={MAC_1: bytes(16)})
+        for _ in range(3):
+            sensor_msg, tracker_msg = ble_parser.parse_raw_data(data)
+            assert sensor_msg["data"] is False
+
+        assert ble_parser.decrypt_backoff.quarantined() == [MAC_1]
+        assert ble_parser.decrypt_backoff.skipped == 1
+
+        ble_parser.set_inventory(DeviceInventory(aeskeys={MAC_1: KEY}))
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(data)
+        assert sensor_msg["firmware"] == "ATC (Custom encrypted)"
+        assert ble_parser.decrypt_backoff.quarantined() == []
+
+    def test_parser_backoff_legacy(self):
+        """Test the backoff of MiBeacon v2/v3 devices, a decrypted advertisement removes the device."""
+        data = bytes.fromhex("043E25020103008B98C54124F819181695FE5830B603D28B98C54124F8C3491476757E00000099DE")
+        mac = bytes.fromhex("F82441C5988B")
+        ble_parser = BleParser()
+        for _ in range(3):
+            ble_parser.parse_raw_data(data)
+        assert ble_parser.decrypt_backoff.quarantined() == [mac]
+
+        ble_parser.set_inventory(DeviceInventory(aeskeys={mac: bytes.fromhex("b853075158487ca39a5b5ea9")}))
+        # a corrupted advertisement
+        ble_parser.decrypt_backoff.failure(mac)
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(data)
+
+        assert sensor_msg["firmware"] == "Xiaomi (MiBeacon V3 encrypted)"
+        assert mac not in ble_parser.decrypt_backoff
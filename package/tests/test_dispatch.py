@@ -0,0 +1,143 @@
+"""The tests for the routing table of the ble_parser."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import bleparser
+from bleparser import BleParser
+from bleparser.advertisement import Advertisement
+from bleparser.dispatch import Route, RoutingTable, get_parser
+
+
+class TestDispatch:
+    """Tests for the routing table"""
+
+    def test_service_data_route(self):
+        """Test routing of service data on UUID16."""
+        routing_table = RoutingTable()
+        adv = Advertisement(None, None, "", [], [])
+        data = bytes.fromhex("151695fe5020aa01da219335342d580d1004fe004802")
+
+        route = routing_table.match_service_data(data, adv)
+        assert route.name == "Xiaomi"
+
+    def test_service_data_route_length(self):
+        """Test routing of service data with a length check (Eddystone)."""
+        routing_table = RoutingTable()
+        adv = Advertisement(None, None, "", [], [])
+
+        route = routing_table.match_service_data(bytes.fromhex("1216aafe") + bytes(15), adv)
+        assert route.name == "KKM"
+        route = routing_table.match_service_data(bytes.fromhex("1416aafe") + bytes(17), adv)
+        assert route is None
+
+    def test_service_data_route_atc_bparasite(self):
+        """Test routing of Environmental Sensing service data to ATC or b-parasite on the length."""
+        routing_table = RoutingTable()
+        adv = Advertisement(None, None, "", [], [])
+
+        route = routing_table.match_service_data(bytes.fromhex("10161a18a4c1380283f400a22f5f0bf819"), adv)
+        assert route.name == "ATC"
+        route = routing_table.match_service_data(bytes.fromhex("13161a18") + bytes(16), adv)
+        assert route.name == "b-parasite"
+
+    def test_service_data_route_local_name(self):
+        """Test routing of service data with a check on the local name (Relsib)."""
+        routing_table = RoutingTable()
+        data = bytes.fromhex("071620aa0102")
+
+        route = routing_table.match_service_data(data, Advertisement(None, None, "ECo", [], []))
+        assert route.name == "Relsib"
+        route = routing_table.match_service_data(data, Advertisement(None, None, "", [], []))
+        assert route is None
+
+    def test_manufacturer_data_route_priority(self):
+        """Test that company id routes have priority over local name routes."""
+        routing_table = RoutingTable()
+        adv = Advertisement(None, None, "sps", [], [])
+
+        route = routing_table.match_manufacturer_data(bytes.fromhex("0aff1234") + bytes(7), adv)
+        assert route.name == "Inkbird IBS-TH"
+        route = routing_table.match_manufacturer_data(bytes.fromhex("0aff88ec") + bytes(7), adv)
+        assert route.name == "Govee H5051/H5071/H5072/H5075/H5074"
+
+    def test_manufacturer_data_unknown_f0ff(self):
+        """Test that unknown advertisements with service class uuid16 0xF0FF are not routed."""
+        routing_table = RoutingTable()
+        data = bytes.fromhex("1bff0215beac") + bytes(22)
+
+        route = routing_table.match_manufacturer_data(data, Advertisement(None, None, "", [], []))
+        assert route.name == "AltBeacon"
+        route = routing_table.match_manufacturer_data(data, Advertisement(0xF0FF, None, "", [], []))
+        assert route is None
+
+    def test_manufacturer_data_noise(self):
+        """Test that unsupported manufacturer specific data is not routed."""
+        routing_table = RoutingTable()
+        adv = Advertisement(None, None, "", [], [])
+
+        # Apple (non iBeacon) and Microsoft advertisements
+        assert routing_table.match_manufacturer_data(bytes.fromhex("0aff4c001005031c2a8b6f"), adv) is None
+        assert routing_table.match_manufacturer_data(bytes.fromhex("1eff060001092002") + bytes(23), adv) is None
+
+    def test_parse_advertisement_fields(self):
+        """Test that the fields of a previous parse_advertisement call are not reused."""
+        ble_parser = BleParser()
+        mac = bytes.fromhex("487E48E2A5B2")
+        data = bytes.fromhex("07ffc2170127022c")
+
+        sensor_msg, tracker_msg = ble_parser.parse_advertisement(
+            mac, -60, local_name="TP357 (2A01)", man_spec_data_list=[data]
+        )
+        assert sensor_msg["firmware"] == "Thermopro"
+        sensor_msg, tracker_msg = ble_parser.parse_advertisement(mac, -60, man_spec_data_list=[data])
+        assert sensor_msg is None
+
+    def test_route_same_device(self):
+        """Test routing of different advertisements of the same device."""
+        ble_parser = BleParser()
+        mac = bytes.fromhex("A4C138246C11")
+        govee_data = bytes.fromhex("09ff88ec00012d6e6400")
+        ibeacon_data = bytes.fromhex("1aff4c000215494e54454c4c495f524f434b535f48575075f2ffc2")
+
+        sensor_msg, tracker_msg = ble_parser.parse_advertisement(mac, -77, man_spec_data_list=[ibeacon_data])
+        assert sensor_msg["firmware"] == "iBeacon"
+        sensor_msg, tracker_msg = ble_parser.parse_advertisement(mac, -77, man_spec_data_list=[govee_data])
+        assert sensor_msg["firmware"] == "Govee"
+        sensor_msg, tracker_msg = ble_parser.parse_advertisement(
+            mac, -77, man_spec_data_list=[govee_data, ibeacon_data]
+        )
+        assert sensor_msg["firmware"] == "Govee"
+
+    def test_get_parser(self):
+        """Test loading vendor parsers on first use."""
+        assert get_parser("xiaomi").__name__ == "parse_xiaomi"
+        with pytest.raises(KeyError):
+            get_parser("dispatch")
+
+    def test_route_load(self):
+        """Test that a route keeps the parser function of its vendor module after the first match."""
+        route = Route("Xiaomi", ("xiaomi", None, False))
+        assert route.parse is None
+        assert route.load() is get_parser("xiaomi")
+        assert route.parse is get_parser("xiaomi")
+
+    def test_lazy_import(self):
+        """Test that vendor modules and pycryptodome are not imported with bleparser."""
+        code = (
+            "import sys, bleparser\n"
+            "print(sorted(name for name in sys.modules if name.startswith(('bleparser.xiaomi', 'Cryptodome'))))\n"
+            "bleparser.BleParser().parse_raw_data(bytes.fromhex("
+            "'043e1d02010000f4830238c1a41110161a18a4c1380283f400a22f5f0bf819df'))\n"
+            "print(sorted(name for name in sys.modules if name in ('bleparser.atc', 'bleparser.xiaomi')))\n"
+        )
+        package_dir = os.path.dirname(os.path.dirname(bleparser.__file__))
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            env=dict(os.environ, PYTHONPATH=package_dir),
+            check=True, capture_output=True, text=True,
+        ).stdout
+
+        assert output.splitlines() == ["[]", "['bleparser.atc']"]
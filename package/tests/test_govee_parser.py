@@ -112,6 +112,20 @@ class TestGovee:
         assert sensor_msg["battery"] == 100
         assert sensor_msg["rssi"] == -77
 
+    def test_Govee_H5075_intelli_rocks(self):
+        """Test Govee H5075 parser with INTELLI_ROCKS glued on to the end of the manufacturer specific data."""
+        data = bytes.fromhex("22ff88ec00012d6e6400") + bytes(4) + b"INTELLI_ROCKS_HWPu" + bytes(3)
+        ble_parser = BleParser()
+        for man_spec_data in (data, memoryview(data)):
+            sensor_msg, tracker_msg = ble_parser.parse_advertisement(
+                bytes.fromhex("A4C138246C11"), -77, man_spec_data_list=[man_spec_data]
+            )
+
+            assert sensor_msg["type"] == "H5072/H5075"
+            assert sensor_msg["temperature"] == 7.7
+            assert sensor_msg["humidity"] == 16.6
+            assert sensor_msg["battery"] == 100
+
     def test_Govee_H5178_sensor_0(self):
         """Test Govee H5178 parser."""
         data_string = "043E2B0201000045C5DF38C1A41F0A09423531373843353435030388EC0201050CFF010001010003A00F640000BF"
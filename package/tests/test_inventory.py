@@ -0,0 +1,100 @@
+"""The tests for the device inventory of the ble_parser."""
+import json
+
+import pytest
+
+from bleparser import BleParser
+from bleparser.inventory import DeviceInventory
+
+DATA_STRING = "043e1d02010000f4830238c1a41110161a18a4c1380283f400a22f5f0bf819df"
+MAC = bytes.fromhex("A4C1380283F4")
+UUID = bytes.fromhex("e2c56db5dffb48d2b060d0f5a71096e0")
+KEY = bytes.fromhex("b9ea895fac7eea6d30532432a516f3a3")
+
+
+class TestDeviceInventory:
+    """Tests for the device inventory"""
+
+    def test_normalize(self):
+        """Test that MAC addresses, UUIDs and keys are normalised to bytes."""
+        inventory = DeviceInventory(
+            sensor_whitelist=["A4:C1:38:02:83:F4", "e2c56db5-dffb-48d2-b060-d0f5a71096e0"],
+            tracker_whitelist=[bytearray(MAC)],
+            aeskeys={"a4c1380283f4": "b9ea895fac7eea6d30532432a516f3a3"},
+        )
+
+        assert inventory.sensor_whitelist == frozenset([MAC, UUID])
+        assert inventory.tracker_whitelist == frozenset([MAC])
+        assert inventory.report_unknown_whitelist == frozenset()
+        assert inventory.aeskeys == {MAC: KEY}
+        # keys set as items are validated and normalised as well
+        inventory.aeskeys["A4:C1:38:02:83:F4"] = KEY.hex()
+        assert inventory.aeskeys == {MAC: KEY}
+        with pytest.raises(ValueError):
+            inventory.aeskeys[MAC] = "b9ea895f"
+
+    def test_from_file(self, tmp_path):
+        """Test loading an inventory from a JSON file."""
+        path = tmp_path / "inventory.json"
+        path.write_text(json.dumps({
+            "sensor_whitelist": ["A4:C1:38:02:83:F4"],
+            "aeskeys": {"A4:C1:38:02:83:F4": "b9ea895fac7eea6d30532432a516f3a3"},
+        }))
+        inventory = DeviceInventory.from_file(path)
+
+        assert inventory.sensor_whitelist == frozenset([MAC])
+        assert inventory.aeskeys[MAC] == KEY
+
+    def test_from_dict_unknown_keys(self):
+        """Test that unknown keys are rejected."""
+        with pytest.raises(ValueError):
+            DeviceInventory.from_dict({"sensors": ["A4:C1:38:02:83:F4"]})
+
+    def test_set_inventory(self):
+        """Test swapping the inventory of a running parser."""
+        ble_parser = BleParser(discovery=False)
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+        assert sensor_msg is None
+
+        ble_parser.set_inventory(DeviceInventory(sensor_whitelist=[MAC], tracker_whitelist=[MAC]))
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+        assert sensor_msg["temperature"] == 16.2
+        assert tracker_msg == {"is connected": True, "mac": "A4C1380283F4", "rssi": -33}
+
+    def test_whitelist_setter(self):
+        """Test that assigning a whitelist replaces the inventory."""
+        ble_parser = BleParser(tracker_whitelist=[MAC])
+        ble_parser.tracker_whitelist = []
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+
+        assert ble_parser.inventory.tracker_whitelist == frozenset()
+        assert tracker_msg is None
+
+    def test_whitelist_updates(self):
+        """Test that the whitelists of a parser can be updated like lists and sets."""
+        ble_parser = BleParser(discovery=False)
+        ble_parser.sensor_whitelist.append("A4:C1:38:02:83:F4")
+        ble_parser.tracker_whitelist.add(MAC)
+        ble_parser.tracker_whitelist.extend([MAC, UUID])
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+
+        assert ble_parser.sensor_whitelist == frozenset([MAC])
+        assert ble_parser.inventory.tracker_whitelist == frozenset([MAC, UUID])
+        assert sensor_msg["temperature"] == 16.2
+        assert tracker_msg == {"is connected": True, "mac": "A4C1380283F4", "rssi": -33}
+
+        ble_parser.tracker_whitelist.remove(UUID)
+        ble_parser.tracker_whitelist.discard(UUID)
+        with pytest.raises(KeyError):
+            ble_parser.tracker_whitelist.remove(UUID)
+        assert ble_parser.tracker_whitelist == frozenset([MAC])
+        ble_parser.sensor_whitelist.clear()
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+
+        assert sensor_msg is None
+        assert tracker_msg == {"is connected": True, "mac": "A4C1380283F4", "rssi": -33}
+
+    def test_inventory_and_whitelists(self):
+        """Test that an inventory can't be combined with whitelists."""
+        with pytest.raises(ValueError):
+            BleParser(inventory=DeviceInventory(), sensor_whitelist=[MAC])
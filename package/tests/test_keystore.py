@@ -0,0 +1,167 @@
+"""The tests for the encryption key store of the ble_parser."""
+import json
+import threading
+
+import pytest
+
+from bleparser import BleParser, DeviceInventory, KeyStore
+
+MAC = bytes.fromhex("A4C1388D18B2")
+MAC_2 = bytes.fromhex("A4C138000002")
+KEY = bytes.fromhex("b9ea895fac7eea6d30532432a516f3a3")
+KEY_2 = bytes.fromhex("e9ea895fac7cca6d30532432a516f3a8")
+LEGACY_KEY = bytes.fromhex("b853075158487ca39a5b5ea9")
+
+# ATC encrypted advertisement of MAC, encrypted with KEY
+DATA_STRING = "043e1b02010000b2188d38c1a40f0e161a1811d603fbfa7b6dfb1e26fde2"
+
+
+class TestKeyStore:
+    """Tests for the key store"""
+
+    def test_validation(self):
+        """Test that keys are normalised and validated when they are added."""
+        keys = KeyStore({"A4:C1:38:8D:18:B2": KEY.hex(), MAC_2: LEGACY_KEY})
+
+        assert keys == {MAC: KEY, MAC_2: LEGACY_KEY}
+        with pytest.raises(ValueError):
+            keys.add(MAC, "e9ea895fac7cca6d")
+        with pytest.raises(ValueError):
+            keys.add(MAC, "not a key")
+        with pytest.raises(ValueError):
+            KeyStore({"A4:C1:38": KEY}, strict=True)
+        assert keys[MAC] == KEY
+
+    def test_skip_invalid_keys(self, caplog):
+        """Test that invalid keys are logged and skipped when a store or parser is created."""
+        keys = KeyStore({"A4:C1:38": KEY, MAC: "e9ea895fac7cca6d", MAC_2: LEGACY_KEY})
+        assert keys == {MAC_2: LEGACY_KEY}
+        assert caplog.text.count("Skipping encryption key") == 2
+
+        ble_parser = BleParser(aeskeys={MAC: KEY, MAC_2: "not a key"})
+        assert ble_parser.aeskeys == {MAC: KEY}
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+        assert sensor_msg["temperature"] == 23.45
+        # keys added later are still checked strictly
+        with pytest.raises(ValueError):
+            keys.update({MAC: KEY, MAC_2: "not a key"})
+        assert keys == {MAC_2: LEGACY_KEY}
+
+    def test_add_remove(self):
+        """Test adding and removing keys."""
+        changes = []
+        keys = KeyStore()
+        keys.subscribe(changes.append)
+        keys.add(MAC, KEY)
+        keys.add(MAC, KEY)
+        keys.add(MAC, KEY_2)
+        keys.remove("A4C1388D18B2")
+
+        assert len(keys) == 0
+        assert changes == [{MAC: None}, {MAC: KEY}, {MAC: KEY_2}]
+        with pytest.raises(KeyError):
+            keys.remove(MAC)
+
+    def test_item_assignment(self):
+        """Test that keys can be set and deleted like the items of a dictionary."""
+        changes = []
+        keys = KeyStore()
+        keys.subscribe(changes.append)
+        keys["A4:C1:38:8D:18:B2"] = KEY.hex()
+        keys[MAC_2] = LEGACY_KEY
+        del keys[MAC_2]
+
+        assert keys == {MAC: KEY}
+        assert changes == [{MAC: None}, {MAC_2: None}, {MAC_2: LEGACY_KEY}]
+        with pytest.raises(ValueError):
+            keys[MAC] = "e9ea895fac7cca6d"
+        with pytest.raises(KeyError):
+            del keys[MAC_2]
+        assert keys[MAC] == KEY
+
+    def test_add_from_threads(self):
+        """Test that keys added from several threads are not lost."""
+        keys = KeyStore()
+        macs = [(0xA4C138000000 + index).to_bytes(6, "big") for index in range(400)]
+
+        def add(start):
+            for mac in macs[start::4]:
+                keys.add(mac, KEY)
+
+        threads = [threading.Thread(target=add, args=(start,)) for start in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(keys) == len(macs)
+
+    def test_load(self, tmp_path):
+        """Test the reload from JSON and CSV files."""
+        json_path = tmp_path / "keys.json"
+        json_path.write_text(json.dumps({MAC.hex(): KEY.hex()}))
+        csv_path = tmp_path / "keys.csv"
+        csv_path.write_text(f"mac,key\n{MAC.hex()},{KEY_2.hex()}\n{MAC_2.hex()},{LEGACY_KEY.hex()}\n")
+        invalid_path = tmp_path / "invalid.csv"
+        invalid_path.write_text(f"{MAC_2.hex()},{KEY.hex()}\n{MAC.hex()},abcd\n")
+
+        keys = KeyStore.from_file(json_path)
+        assert keys == {MAC: KEY}
+        keys.load(csv_path)
+        assert keys == {MAC: KEY_2, MAC_2: LEGACY_KEY}
+        # nothing is replaced when the file has an invalid key
+        with pytest.raises(ValueError):
+            keys.load(invalid_path)
+        assert keys == {MAC: KEY_2, MAC_2: LEGACY_KEY}
+
+    def test_shared_memory(self):
+        """Test sharing a snapshot of the keys read-only through shared memory."""
+        keys = KeyStore({MAC: KEY, MAC_2: LEGACY_KEY})
+        shm = keys.share()
+        try:
+            shared = KeyStore.from_shared_memory(shm.name)
+        finally:
+            shm.close()
+            shm.unlink()
+        keys.add(MAC, KEY_2)
+
+        assert shared == {MAC: KEY, MAC_2: LEGACY_KEY}
+        assert shared.read_only
+        with pytest.raises(TypeError):
+            shared.add(MAC, KEY_2)
+
+    def test_parser_reload(self):
+        """Test that the parser uses the new keys and drops the old ciphers."""
+        keys = KeyStore({MAC: KEY_2})
+        ble_parser = BleParser(inventory=DeviceInventory(aeskeys=keys))
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+        assert sensor_msg["data"] is False
+        assert len(ble_parser.ciphers) == 1
+        assert MAC in ble_parser.decrypt_backoff
+
+        keys.add(MAC, KEY)
+        assert len(ble_parser.ciphers) == 0
+        assert MAC not in ble_parser.decrypt_backoff
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+        assert sensor_msg["temperature"] == 23.45
+
+        ble_parser.aeskeys = {}
+        keys.remove(MAC)
+        assert len(ble_parser.ciphers) == 0
+
+    def test_parser_item_assignment(self):
+        """Test that a key set with ble_parser.aeskeys[mac] = key is used and replaces the old cipher."""
+        ble_parser = BleParser(aeskeys={MAC: KEY_2})
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+        assert sensor_msg["data"] is False
+        assert len(ble_parser.ciphers) == 1
+
+        ble_parser.aeskeys[MAC] = KEY
+        assert len(ble_parser.ciphers) == 0
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+        assert sensor_msg["temperature"] == 23.45
+
+        del ble_parser.aeskeys[MAC]
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(DATA_STRING))
+        assert sensor_msg is None
+        assert MAC not in ble_parser.aeskeys
@@ -0,0 +1,94 @@
+"""The tests for the parsing in worker processes of the ble_parser."""
+import gc
+import sys
+
+import pytest
+
+from bleparser import BleParser
+from bleparser.dispatch import VENDOR_MODULES
+from bleparser.parallel import ParallelBleParser, event_mac, preload_tables
+
+# advertisement with a local name that isn't valid UTF-8
+INVALID_NAME_DATA_STRING = "043e2502010000012a98487e48190d0954a0333537202832413031290201bd07ffc2170127022cbc"
+
+
+def bthome_event(mac, packet_id):
+    """Return the HCI event of a BTHome V2 advertisement with a packet id and temperature"""
+    service_data = bytes.fromhex("d2fc4000") + bytes([packet_id]) + bytes.fromhex("02ca09")
+    adstructs = bytes.fromhex("020106") + bytes([len(service_data) + 1, 0x16]) + service_data
+    report = bytes.fromhex("010000") + mac[::-1] + bytes([len(adstructs)]) + adstructs + b"\xcc"
+    return bytes([0x04, 0x3E, len(report) + 1, 0x02]) + report
+
+
+def corpus():
+    """Return events of 10 devices, each advertisement is received twice"""
+    macs = [(0x5448E6000000 + index).to_bytes(6, "big") for index in range(10)]
+    return [bthome_event(mac, packet_id) for packet_id in range(1, 6) for mac in macs for _ in range(2)]
+
+
+class TestParallelBleParser:
+    """Tests for the parser with worker processes"""
+
+    def test_results(self):
+        """Test that the results are the same as with a single parser, in input order."""
+        events = corpus()
+        expected = BleParser(filter_duplicates=True).parse_raw_batch(events)
+
+        with ParallelBleParser(workers=2, chunk_size=16, filter_duplicates=True) as parser:
+            assert parser.parse_raw_batch(events) == expected
+            assert list(parser.imap(iter(events))) == expected
+
+        assert sum(sensor_msg is not None for sensor_msg, tracker_msg in expected) == 50
+
+    def test_imap_unordered(self):
+        """Test that each result is yielded once with the index of its event."""
+        events = corpus()
+        expected = BleParser(filter_duplicates=True).parse_raw_batch(events)
+
+        with ParallelBleParser(workers=3, chunk_size=16, prefetch=2, filter_duplicates=True) as parser:
+            results = list(parser.imap_unordered(events))
+
+        assert sorted(index for index, result in results) == list(range(len(events)))
+        assert [result for index, result in sorted(results, key=lambda item: item[0])] == expected
+
+    def test_exception(self):
+        """Test that the exception of a vendor parser is raised for its event."""
+        events = corpus()[:4] + [bytes.fromhex(INVALID_NAME_DATA_STRING)] + corpus()[4:8]
+
+        with ParallelBleParser(workers=2, chunk_size=4) as parser:
+            results = parser.imap(events)
+            for _ in range(4):
+                sensor_msg, tracker_msg = next(results)
+                assert sensor_msg["temperature"] == 25.06
+            with pytest.raises(UnicodeDecodeError):
+                next(results)
+            # the parser can be used again after an exception
+            assert len(parser.parse_raw_batch(events[:4])) == 4
+
+    def test_shard(self):
+        """Test that the events of a device go to the same worker."""
+        mac = bytes.fromhex("5448E68F80A5")
+
+        assert event_mac(bthome_event(mac, 1)) == mac
+        assert event_mac(b"\x04\x3e") is None
+        with ParallelBleParser(workers=4) as parser:
+            assert parser.shard(bthome_event(mac, 1)) == parser.shard(bthome_event(mac, 2))
+            assert {parser.shard(event) for event in corpus()} == {0, 1, 2, 3}
+        with pytest.raises(ValueError):
+            ParallelBleParser(workers=0)
+
+    def test_preload(self):
+        """Test that the tables are built and frozen before the workers are forked."""
+        events = corpus()
+        expected = BleParser(filter_duplicates=True).parse_raw_batch(events)
+        gc.unfreeze()
+        try:
+            preload_tables(freeze=False)
+            assert all(f"bleparser.{vendor}" in sys.modules for vendor in VENDOR_MODULES)
+            assert gc.get_freeze_count() == 0
+
+            with ParallelBleParser(workers=2, chunk_size=16, preload=True, filter_duplicates=True) as parser:
+                assert gc.get_freeze_count() > 0
+                assert parser.parse_raw_batch(events) == expected
+        finally:
+            gc.unfreeze()
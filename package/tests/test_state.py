@@ -0,0 +1,372 @@
+"""The tests for the per-device state of the ble_parser."""
+import sys
+import threading
+
+import pytest
+
+from bleparser import BleParser
+from bleparser.registry import (
+    FLAG_SENSOR_WHITELIST,
+    FLAG_TRACKER_WHITELIST,
+    DeviceRegistry,
+    LockedDeviceRegistry,
+    StripedDeviceRegistry,
+    StripedLock,
+    mac_stripe,
+)
+from bleparser.state import DeviceStateStore, StripedDeviceStateStore
+
+MAC_1 = bytes.fromhex("A4C138000001")
+MAC_2 = bytes.fromhex("A4C138000002")
+MAC_3 = bytes.fromhex("A4C138000003")
+MAC_4 = bytes.fromhex("A4C138000004")
+
+
+class FakeClock:
+    """Clock that only moves when told to"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def bthome_event(mac, packet_id):
+    """Return the HCI event of a BTHome V2 advertisement with a packet id and temperature"""
+    service_data = bytes.fromhex("d2fc4000") + bytes([packet_id]) + bytes.fromhex("02ca09")
+    adstructs = bytes.fromhex("020106") + bytes([len(service_data) + 1, 0x16]) + service_data
+    report = bytes.fromhex("010000") + mac[::-1] + bytes([len(adstructs)]) + adstructs + b"\xcc"
+    return bytes([0x04, 0x3E, len(report) + 1, 0x02]) + report
+
+
+class TestDeviceRegistry:
+    """Tests for the device registry"""
+
+    def test_slots(self):
+        """Test that each device gets its own slot."""
+        registry = DeviceRegistry()
+        slot_1 = registry.slot(MAC_1)
+        slot_2 = registry.slot(MAC_2)
+
+        assert slot_1 != slot_2
+        assert registry.find(bytearray(MAC_1)) == slot_1
+        assert registry.find(MAC_3) == -1
+        assert registry.macs[slot_2] == 0xA4C138000002
+        # least recently used first
+        assert list(registry) == [MAC_2, MAC_1]
+
+    def test_slot_reuse(self):
+        """Test that the slot of a removed device is reused with empty state."""
+        registry = DeviceRegistry()
+        packet_ids = DeviceStateStore(registry, "packet_ids")
+        adv_priority = DeviceStateStore(registry, "adv_priority")
+        packet_ids[MAC_1] = 12
+        adv_priority[MAC_1] = 29
+        slot = registry.find(MAC_1)
+        registry.remove(MAC_1)
+
+        assert registry.slot(MAC_2) == slot
+        assert MAC_2 not in packet_ids
+        assert MAC_2 not in adv_priority
+
+    def test_resolver(self):
+        """Test the whitelist flags."""
+        resolved = []
+
+        def resolver(mac):
+            resolved.append(mac)
+            if mac == MAC_1:
+                return FLAG_SENSOR_WHITELIST | FLAG_TRACKER_WHITELIST
+            return 0
+
+        registry = DeviceRegistry(resolver=resolver)
+        slot_1 = registry.slot(MAC_1)
+        slot_2 = registry.slot(MAC_2)
+
+        assert registry.resolve(slot_1) == FLAG_SENSOR_WHITELIST | FLAG_TRACKER_WHITELIST
+        assert registry.resolve(slot_1) == FLAG_SENSOR_WHITELIST | FLAG_TRACKER_WHITELIST
+        assert registry.resolve(slot_2) == 0
+        assert resolved == [MAC_1, MAC_2]
+
+        registry.refresh()
+        assert registry.device_flags(MAC_1) == FLAG_SENSOR_WHITELIST | FLAG_TRACKER_WHITELIST
+        assert resolved == [MAC_1, MAC_2, MAC_1]
+
+    def test_lookup(self):
+        """Test that lookup returns the registry and slot of a device and adds unknown devices."""
+        registry = DeviceRegistry()
+        packet_ids = DeviceStateStore(registry, "packet_ids")
+        devices, slot = registry.lookup(MAC_1)
+        devices.packet_ids[slot] = 12
+
+        assert devices is registry
+        assert registry.lookup(MAC_1) == (registry, slot)
+        assert registry.lookup(MAC_2) != (registry, slot)
+        assert packet_ids[MAC_1] == 12
+        assert MAC_2 not in packet_ids
+
+    def test_invalid_mac(self):
+        """Test that keys that aren't MAC addresses of 6 bytes are rejected."""
+        registry = DeviceRegistry()
+        packet_ids = DeviceStateStore(registry, "packet_ids")
+        registry.slot(MAC_1)
+
+        for mac in (MAC_1[:5], MAC_1 + b"\x00", b""):
+            with pytest.raises(ValueError):
+                registry.find(mac)
+            with pytest.raises(ValueError):
+                registry.lookup(mac)
+            with pytest.raises(ValueError):
+                packet_ids[mac] = 1
+        assert list(registry) == [MAC_1]
+
+    def test_device_flags_unknown_device(self):
+        """Test that the flags of an unknown device are looked up without adding it."""
+        registry = DeviceRegistry(maxsize=1, resolver=lambda mac: FLAG_TRACKER_WHITELIST if mac == MAC_2 else 0)
+        slot = registry.slot(MAC_1)
+
+        assert registry.device_flags(MAC_2) == FLAG_TRACKER_WHITELIST
+        assert registry.device_flags(MAC_3) == 0
+        assert list(registry) == [MAC_1]
+        assert registry.find(MAC_1) == slot
+        assert registry.info()["evictions"] == 0
+
+
+class TestDeviceStateStore:
+    """Tests for the bounded per-device state"""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used device is evicted."""
+        store = DeviceStateStore(DeviceRegistry(maxsize=2), "packet_ids")
+        store[MAC_1] = 1
+        store[MAC_2] = 2
+        assert store[MAC_1] == 1
+        store[MAC_3] = 3
+
+        assert len(store) == 2
+        assert MAC_2 not in store
+        assert store.get(MAC_1) == 1
+        assert store.info()["evictions"] == 1
+
+    def test_ttl_expiration(self):
+        """Test that idle devices expire."""
+        clock = FakeClock()
+        store = DeviceStateStore(DeviceRegistry(maxsize=10, ttl=60, clock=clock), "adv_priority")
+        store[MAC_1] = 1
+        store[MAC_2] = 2
+        clock.now = 50
+        assert store[MAC_2] == 2
+        clock.now = 100
+
+        # MAC_1 is idle for 100 seconds, MAC_2 for 50 seconds
+        with pytest.raises(KeyError):
+            store[MAC_1]
+        assert store[MAC_2] == 2
+        assert store.info()["expirations"] == 1
+
+    def test_ttl_expiration_on_write(self):
+        """Test that idle devices are removed when other devices are added."""
+        clock = FakeClock()
+        store = DeviceStateStore(DeviceRegistry(maxsize=10, ttl=60, clock=clock), "movements")
+        for mac in [MAC_1, MAC_2, MAC_3]:
+            store[mac] = 0
+        clock.now = 100
+        store[MAC_4] = 0
+
+        assert list(store) == [MAC_4]
+        assert store.info() == {"size": 1, "maxsize": 10, "ttl": 60, "evictions": 0, "expirations": 3}
+
+    def test_parser_state_bounded(self):
+        """Test that the parser state is bounded."""
+        data_strings = [
+            "043e1d02010000f4830238c1a41110161a18a4c1380283f400a22f5f0bf819df",
+            "043e1d02010000f5830238c1a41110161a18a4c1380283f500a22f5f0bf819df",
+        ]
+        ble_parser = BleParser(device_state_size=1)
+        for data_string in data_strings:
+            sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(data_string))
+            assert sensor_msg["temperature"] == 16.2
+
+        assert list(ble_parser.lpacket_ids) == [bytes.fromhex("A4C1380283F5")]
+        assert ble_parser.device_state_info()["evictions"] == 1
+
+    def test_parser_tracker_whitelist(self):
+        """Test the tracker whitelist flag of the device registry."""
+        data_string = "043e1d02010000f4830238c1a41110161a18a4c1380283f400a22f5f0bf819df"
+        mac = bytes.fromhex("A4C1380283F4")
+        ble_parser = BleParser(tracker_whitelist=[mac])
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(bytes.fromhex(data_string))
+
+        assert tracker_msg == {"is connected": True, "mac": "A4C1380283F4", "rssi": -33}
+        assert ble_parser.devices.resolve(ble_parser.devices.find(mac)) == FLAG_TRACKER_WHITELIST
+
+    def test_parser_noise_not_stored(self):
+        """Test that advertisements of unsupported devices don't evict the state of the sensors."""
+        data_string = "043e1d02010000f4830238c1a41110161a18a4c1380283f400a22f5f0bf819df"
+        apple_data = bytes.fromhex("0aff4c001005031c2a8b6f")
+        tracker_mac = bytes.fromhex("5448E68F80A5")
+        ble_parser = BleParser(device_state_size=1, tracker_whitelist=[tracker_mac])
+        ble_parser.parse_raw_data(bytes.fromhex(data_string))
+        for index in range(10):
+            mac = bytes.fromhex(f"5448E68F80{index:02X}")
+            sensor_msg, tracker_msg = ble_parser.parse_advertisement(mac, -60, man_spec_data_list=[apple_data])
+        sensor_msg, tracker_msg = ble_parser.parse_advertisement(tracker_mac, -60, man_spec_data_list=[apple_data])
+
+        assert tracker_msg == {"is connected": True, "mac": "5448E68F80A5", "rssi": -60}
+        assert list(ble_parser.lpacket_ids) == [bytes.fromhex("A4C1380283F4")]
+        assert ble_parser.device_state_info()["evictions"] == 0
+
+
+class TestThreadSafeParser:
+    """Tests for the thread safe mode of the parser"""
+
+    def test_striped_lock(self):
+        """Test that a device always gets the same lock."""
+        locks = StripedLock(4)
+
+        assert len(locks) == 4
+        assert locks.lock(MAC_1) is locks.lock(bytes(MAC_1))
+        assert locks.lock(MAC_1) is not locks.lock(MAC_2)
+        with pytest.raises(ValueError):
+            StripedLock(0)
+
+    def test_locked_registry(self):
+        """Test that devices added from several threads get a slot of their own."""
+        registry = LockedDeviceRegistry(maxsize=None)
+        macs = [(0xA4C138000000 + index).to_bytes(6, "big") for index in range(4000)]
+
+        def add(start):
+            for mac in macs[start::4]:
+                registry.slot(mac)
+
+        threads = [threading.Thread(target=add, args=(start,)) for start in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(registry) == len(macs)
+        assert sorted(slot for mac, slot in registry.slots()) == list(range(len(macs)))
+        assert all(registry.macs[registry.find(mac)] == int.from_bytes(mac, "big") for mac in macs)
+
+    def test_striped_registry(self):
+        """Test that each stripe of the registry keeps the devices of its own MAC addresses."""
+        registry = StripedDeviceRegistry(maxsize=4, stripes=2)
+        # MAC_1 and MAC_3 in one stripe, MAC_2 and MAC_4 in the other
+        macs = [MAC_1, MAC_3, MAC_2, MAC_4]
+        for mac in macs:
+            registry.stripe(mac).slot(mac)
+
+        assert [mac_stripe(mac, 2) for mac in macs] == [1, 1, 0, 0]
+        assert registry.stripe(MAC_1) is registry.stripes[1]
+        assert registry.stripes[1].maxsize == 2
+        assert sorted(registry) == sorted(macs)
+        registry.remove(MAC_3)
+        assert len(registry) == 3
+        with pytest.raises(ValueError):
+            StripedDeviceRegistry(stripes=0)
+
+    def test_striped_registry_lookup(self):
+        """Test that lookup returns the stripe of a device, with list columns."""
+        registry = StripedDeviceRegistry(maxsize=4, stripes=2)
+        store = StripedDeviceStateStore(registry, "adv_priority")
+        devices, slot = registry.lookup(MAC_1)
+        devices.adv_priority[slot] = 39
+
+        assert devices is registry.stripes[1]
+        assert isinstance(devices.adv_priority, list)
+        assert registry.lookup(MAC_1) == (devices, slot)
+        assert store[MAC_1] == 39
+        with pytest.raises(ValueError):
+            registry.lookup(MAC_1[:5])
+
+    def test_striped_registry_eviction(self):
+        """Test that a full stripe evicts its least recently used device."""
+        registry = StripedDeviceRegistry(maxsize=4, stripes=2)
+        store = StripedDeviceStateStore(registry, "packet_ids")
+        store[MAC_1] = 1
+        store[MAC_2] = 2
+        store[MAC_3] = 3
+        # the stripe of MAC_1 and MAC_3 is full
+        store[bytes.fromhex("A4C138000005")] = 5
+
+        assert MAC_1 not in store
+        assert store[MAC_2] == 2
+        assert store[MAC_3] == 3
+        assert registry.info() == {"size": 3, "maxsize": 4, "ttl": None, "evictions": 1, "expirations": 0}
+
+    def test_striped_state_store(self):
+        """Test the state of devices in different stripes."""
+        registry = StripedDeviceRegistry(maxsize=None, stripes=4)
+        store = StripedDeviceStateStore(registry, "movements")
+        other = StripedDeviceStateStore(registry, "adv_priority")
+        for value, mac in enumerate([MAC_1, MAC_2, MAC_3, MAC_4]):
+            store[mac] = value
+        del store[MAC_3]
+
+        assert store[MAC_2] == 1
+        assert MAC_3 not in store
+        assert MAC_2 not in other
+        assert sorted(store.items()) == [(MAC_1, 0), (MAC_2, 1), (MAC_4, 3)]
+        with pytest.raises(KeyError):
+            del store[MAC_3]
+
+    def test_striped_registry_refresh(self):
+        """Test that the whitelist flags are looked up again in the stripe of the device."""
+        resolved = []
+
+        def resolver(mac):
+            resolved.append(mac)
+            return FLAG_SENSOR_WHITELIST
+
+        registry = StripedDeviceRegistry(stripes=2, resolver=resolver)
+        for mac in [MAC_1, MAC_2]:
+            registry.stripe(mac).slot(mac)
+        assert registry.device_flags(MAC_1) == FLAG_SENSOR_WHITELIST
+        assert registry.device_flags(MAC_2) == FLAG_SENSOR_WHITELIST
+        registry.refresh([MAC_2])
+        assert registry.device_flags(MAC_1) == FLAG_SENSOR_WHITELIST
+        assert registry.device_flags(MAC_2) == FLAG_SENSOR_WHITELIST
+
+        assert resolved == [MAC_1, MAC_2, MAC_2]
+
+    def test_parser_striped_registry(self):
+        """Test that the thread safe parser has a registry stripe per device lock."""
+        ble_parser = BleParser(thread_safe=True, lock_stripes=8, device_state_size=64)
+        ble_parser.parse_raw_data(bthome_event(MAC_1, 1))
+
+        assert len(ble_parser.devices.stripes) == 8
+        assert list(ble_parser.devices.stripe(MAC_1)) == [MAC_1]
+        assert ble_parser.lpacket_ids[MAC_1] == 1
+        assert ble_parser.device_state_info()["size"] == 1
+
+    def test_duplicates_from_threads(self):
+        """Test that an advertisement received by several threads is reported once."""
+        macs = [(0x5448E6000000 + index).to_bytes(6, "big") for index in range(32)]
+        rounds = 20
+        ble_parser = BleParser(filter_duplicates=True, thread_safe=True, lock_stripes=8)
+        barrier = threading.Barrier(4)
+        reports = []
+
+        def scan():
+            for packet_id in range(1, rounds + 1):
+                events = [bthome_event(mac, packet_id) for mac in macs]
+                barrier.wait()
+                for data in events:
+                    sensor_msg, tracker_msg = ble_parser.parse_raw_data(data)
+                    if sensor_msg is not None:
+                        reports.append((sensor_msg["mac"], sensor_msg["packet"]))
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=scan) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        assert len(reports) == len(macs) * rounds
+        assert len(set(reports)) == len(macs) * rounds
@@ -0,0 +1,111 @@
+"""The tests for the vectorized decoders."""
+import math
+import random
+
+import pytest
+
+from bleparser import BleParser
+from bleparser.atc import parse_atc
+from bleparser.bparasite import parse_bparasite
+from bleparser.govee import parse_govee
+from bleparser.ruuvitag import parse_ruuvitag
+
+np = pytest.importorskip("numpy")
+
+from bleparser.vectorized import (  # noqa: E402
+    decode_atc1441,
+    decode_atc_custom,
+    decode_bparasite,
+    decode_govee_h5075,
+    decode_ruuvitag_v5,
+)
+
+MAC = bytes.fromhex("A4C1380283F4")
+
+
+def random_payloads(header, length, count=500):
+    """Random payloads with a fixed header"""
+    rnd = random.Random(length)
+    return [header + bytes(rnd.randrange(256) for _ in range(length - len(header))) for _ in range(count)]
+
+
+def assert_columns(columns, payloads, parse_func, keys, macs=None):
+    """Compare the vectorized results with the scalar parser"""
+    for index, data in enumerate(payloads):
+        result = parse_func(BleParser(), data, MAC if macs is None else macs[index], -60)
+        for key in keys:
+            if key in result:
+                assert columns[key][index] == result[key], key
+            else:
+                assert math.isnan(columns[key][index]), key
+        assert int(columns["mac"][index]) == int(result["mac"], 16)
+
+
+class TestVectorized:
+    """Tests for the vectorized decoders"""
+
+    def test_atc_custom(self):
+        """Test the vectorized decoder for the ATC custom format."""
+        payloads = [bytes.fromhex("12161a18b2188d38c1a42b089011f70a43200f")]
+        payloads += random_payloads(b"\x12\x16\x1a\x18", 19)
+        columns = decode_atc_custom(payloads)
+
+        assert columns["temperature"][0] == 20.91
+        assert_columns(
+            columns, payloads, parse_atc,
+            ["temperature", "humidity", "voltage", "battery", "switch", "opening", "packet"]
+        )
+
+    def test_atc1441(self):
+        """Test the vectorized decoder for the ATC atc1441 format."""
+        payloads = [bytes.fromhex("10161a18a4c1380283f400a22f5f0bf819")]
+        payloads += random_payloads(b"\x10\x16\x1a\x18", 17)
+        columns = decode_atc1441(payloads)
+
+        assert columns["temperature"][0] == 16.2
+        assert_columns(columns, payloads, parse_atc, ["temperature", "humidity", "voltage", "battery", "packet"])
+
+    def test_ruuvitag_v5(self):
+        """Test the vectorized decoder for Ruuvitag data format 5."""
+        payloads = [bytes.fromhex("1BFF990405138A5F61C4F0FFE4FFDC0414C5B6EC29B3F27A52FAD4CD")]
+        payloads += random_payloads(b"\x1b\xff\x99\x04\x05", 28)
+        # invalid measurements
+        payloads.append(bytes.fromhex("1BFF9904058000FFFFFFFF8000800080000000000000F27A52FAD4CD"))
+        columns = decode_ruuvitag_v5(payloads)
+
+        assert columns["temperature"][0] == 25.01
+        assert math.isnan(columns["temperature"][-1])
+        assert_columns(
+            columns, payloads, parse_ruuvitag,
+            [
+                "temperature", "humidity", "pressure", "acceleration", "voltage",
+                "tx power", "packet"
+            ],
+            # the MAC address is included in the payload
+            macs=[data[22:28] for data in payloads]
+        )
+
+    def test_govee_h5075(self):
+        """Test the vectorized decoder for Govee H5072/H5075."""
+        payloads = [bytes.fromhex("09ff88ec0003215d6400")]
+        payloads += random_payloads(b"\x09\xff\x88\xec\x00", 10)
+        columns = decode_govee_h5075(payloads, macs=[MAC] * len(payloads))
+
+        assert columns["temperature"][0] == 20.5
+        assert_columns(columns, payloads, parse_govee, ["temperature", "humidity", "battery"])
+
+    def test_bparasite(self):
+        """Test the vectorized decoder for b-parasite."""
+        for length, header in [(22, b"\x15\x16\x1a\x18"), (20, b"\x13\x16\x1a\x18")]:
+            payloads = random_payloads(header, length)
+            columns = decode_bparasite(payloads)
+
+            keys = ["temperature", "humidity", "voltage", "moisture", "packet"]
+            if length == 22:
+                keys.append("illuminance")
+            assert_columns(columns, payloads, parse_bparasite, keys)
+
+    def test_invalid_length(self):
+        """Test that payloads with a different length are rejected."""
+        with pytest.raises(ValueError):
+            decode_atc_custom([bytes(19), bytes(18)])
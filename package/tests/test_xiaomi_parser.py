@@ -1,5 +1,8 @@
 """The tests for the Xiaomi ble_parser."""
+import logging
+
 from bleparser import BleParser
+from bleparser.xiaomi import ADV_PRIORITY_ATC, XIAOMI_DEVICES
 
 
 class TestXiaomi:
@@ -525,9 +528,57 @@ class TestXiaomi:
         assert sensor_msg["button"] == "rotate left"
         assert sensor_msg["rssi"] == -17
 
+    def test_Xiaomi_YLKG07YL_wrong_key(self):
+        """Test Xiaomi parser for YLKG07YL, YLKG08YL with wrong (legacy) encryption key."""
+        self.aeskeys = {}
+        data_string = "043E25020103008B98C54124F819181695FE5830B603D28B98C54124F8C3491476757E00000099DE"
+        data = bytes(bytearray.fromhex(data_string))
+
+        aeskey = "00112233445566778899aabb"
+
+        is_ext_packet = True if data[3] == 0x0D else False
+        mac = (data[8 if is_ext_packet else 7:14 if is_ext_packet else 13])[::-1]
+        mac_address = mac.hex()
+        p_mac = bytes.fromhex(mac_address.replace(":", "").lower())
+        p_key = bytes.fromhex(aeskey.lower())
+        self.aeskeys[p_mac] = p_key
+        # pylint: disable=unused-variable
+        ble_parser = BleParser(aeskeys=self.aeskeys)
+        sensor_msg, tracker_msg = ble_parser.parse_raw_data(data)
+
+        assert sensor_msg["firmware"] == "Xiaomi (MiBeacon V3 encrypted)"
+        assert sensor_msg["type"] == "YLKG07YL/YLKG08YL"
+        assert sensor_msg["mac"] == "F82441C5988B"
+        assert sensor_msg["packet"] == 210
+        assert sensor_msg["data"] is False
+        assert "dimmer" not in sensor_msg
+        assert p_mac in ble_parser.decrypt_backoff
+        assert sensor_msg["rssi"] == -34
+
     def test_Xiaomi_K9B(self):
         """Test Xiaomi parser for K9B."""
 
+    def test_Xiaomi_devices(self):
+        """Test the capabilities and compiled decoder tables of Xiaomi device types."""
+        k9b = XIAOMI_DEVICES[0x0DFD]
+        fan_remote = XIAOMI_DEVICES[0x068E]
+
+        assert k9b.name == "K9B-3BTN"
+        assert k9b.adv_priority == 0
+        assert XIAOMI_DEVICES[0x055B].adv_priority == ADV_PRIORITY_ATC
+        assert k9b.decoders[0x1004] is fan_remote.decoders[0x1004]
+        assert k9b.decoders[0x1001](bytes.fromhex("040002")) == {
+            "button switch": "double press",
+            "three btn switch middle": "toggle",
+            "three btn switch right": "toggle",
+        }
+        assert fan_remote.decoders[0x1001](bytes.fromhex("030000")) == {
+            "fan remote": "color temperature",
+            "button": "single press",
+        }
+        # devices without lock attributes
+        assert XIAOMI_DEVICES[0x0153].decoders[0x100E](b"\x00") is None
+
     def test_Xiaomi_XMWXKG01YL(self):
         """Test Xiaomi parser for XMWXKG01YL."""
 
@@ -801,4 +852,20 @@ class TestXiaomi:
         assert sensor_msg["packet"] == 10
         assert sensor_msg["data"]
         assert sensor_msg["battery"] == 76
-        assert sensor_msg["rssi"] == -52
\ No newline at end of file
+        assert sensor_msg["rssi"] == -52
+
+    def test_Xiaomi_unknown_object(self, caplog):
+        """Test the log message of Xiaomi parser for an unknown object."""
+        data_string = "043e2502010000219335342d5819020106151695fe5020aa01da219335342d58dd1d04fe004802c4"
+        data = bytes(bytearray.fromhex(data_string))
+
+        ble_parser = BleParser(report_unknown="Xiaomi")
+        with caplog.at_level(logging.INFO, logger="bleparser.xiaomi"):
+            sensor_msg, tracker_msg = ble_parser.parse_raw_data(data)
+
+        assert sensor_msg["type"] == "LYWSDCGQ"
+        assert caplog.messages == [
+            "MiVer: 2, DevID: 0x1aa : LYWSDCGQ, FnCnt: 218, Not bound, Old version certification, "
+            "No encryption, Object data: dd1d04fe004802, UNKNOWN dataobject in payload! "
+            "Adv: 151695fe5020aa01da219335342d58dd1d04fe004802"
+        ]